@@ -0,0 +1,121 @@
+"""
+tar 流输出
+
+把初始化结果直接渲染为确定性的 tar 流（不落地到目标文件系统），供容器镜像构建使用：
+
+- 条目按路径排序，目录在其内容之前
+- mtime 统一为 SOURCE_DATE_EPOCH（未设置时为 0），uid/gid 为 0，属主名为空
+- 权限位规范化：目录 0755，文件 0644（源文件可执行时 0755）
+- 使用 GNU tar 格式，不写入随时间变化的扩展头
+- 换行符不做平台转换，安装清单作为最后一个条目写入
+
+相同输入（模板 + 变量）产出逐字节相同的归档。
+"""
+
+import hashlib
+import io
+import json
+import os
+import tarfile
+import tempfile
+
+from install_manifest import MANIFEST_FORMAT, MANIFEST_NAME, sha256_bytes
+from template_engine import find_unbound, render_stream
+from template_tree import entry_mode, iter_entry_output, open_entry_text, output_path, read_entry_bytes
+
+# 超大模板流式渲染时，超过此大小才溢出到临时文件
+_SPOOL_LIMIT = 8 * 1024 * 1024
+
+
+def archive_mtime() -> int:
+    """归档条目使用的 mtime（遵循 SOURCE_DATE_EPOCH 约定）"""
+    try:
+        return int(os.environ.get("SOURCE_DATE_EPOCH", "0"))
+    except ValueError:
+        return 0
+
+
+def _tarinfo(name: str, mtime: int, size: int = 0, mode: int = 0o644, is_dir: bool = False):
+    """构造规范化的 TarInfo"""
+    info = tarfile.TarInfo(name)
+    info.type = tarfile.DIRTYPE if is_dir else tarfile.REGTYPE
+    info.mode = 0o755 if is_dir or mode & 0o111 else 0o644
+    info.size = 0 if is_dir else size
+    info.mtime = mtime
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    return info
+
+
+def _entry_payload(tree: dict, entry: dict, variables: dict) -> tuple:
+    """返回 (文件对象, 大小, 内容哈希, 未绑定变量)"""
+    if entry["template"] and entry.get("stream"):
+        spool = tempfile.SpooledTemporaryFile(max_size=_SPOOL_LIMIT)
+        text = io.TextIOWrapper(spool, encoding="utf-8", newline="")
+        with open_entry_text(tree, entry) as src:
+            unbound = render_stream(src, text, variables)
+        text.flush()
+        text.detach()
+        size = spool.tell()
+        spool.seek(0)
+        digest = hashlib.sha256()
+        for chunk in iter(lambda: spool.read(1 << 20), b""):
+            digest.update(chunk)
+        spool.seek(0)
+        return spool, size, digest.hexdigest(), unbound
+
+    if entry["template"]:
+        data = b"".join(iter_entry_output(tree, entry, variables))
+        unbound = find_unbound(entry["compiled"], variables)
+    else:
+        data = read_entry_bytes(tree, entry)
+        unbound = []
+    return io.BytesIO(data), len(data), sha256_bytes(data), unbound
+
+
+def write_archive(tree: dict, variables: dict, fileobj, prefix: str = ".comate") -> dict:
+    """
+    将模板树渲染为确定性 tar 流写入 fileobj，返回统计信息
+
+    归档中同时包含安装清单，解包后可直接使用 --upgrade。
+    渲染失败的模板（编译错误、解码失败）与写入目录时一样跳过，记录在 stats["errors"]。
+    """
+    mtime = archive_mtime()
+    stats = {"files": 0, "dirs": 0, "bytes": 0, "unbound": [], "errors": []}
+    manifest = {"format": MANIFEST_FORMAT, "variables": dict(variables), "files": {}}
+
+    members = [(prefix, None)]
+    members += [(prefix + "/" + rel_dir, None) for rel_dir in tree["dirs"]]
+    members += [(prefix + "/" + output_path(entry["path"]), entry) for entry in tree["files"]]
+    members.sort(key=lambda member: member[0].split("/"))
+
+    with tarfile.open(fileobj=fileobj, mode="w|", format=tarfile.GNU_FORMAT) as tar:
+        for name, entry in members:
+            if entry is None:
+                tar.addfile(_tarinfo(name, mtime, is_dir=True))
+                stats["dirs"] += 1
+                continue
+
+            try:
+                payload, size, digest, unbound = _entry_payload(tree, entry, variables)
+            except (OSError, ValueError) as e:
+                stats["errors"].append(f"{entry['path']}: {e}")
+                continue
+            with payload:
+                tar.addfile(_tarinfo(name, mtime, size, entry_mode(entry)), payload)
+            stats["files"] += 1
+            stats["bytes"] += size
+            if unbound:
+                stats["unbound"].append(entry["path"] + ": " + ", ".join(unbound))
+            manifest["files"][name[len(prefix) + 1:]] = {
+                "sha256": digest,
+                "size": size,
+                "mtime_ns": mtime * 1000000000,
+            }
+
+        data = (json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n").encode("utf-8")
+        tar.addfile(_tarinfo(prefix + "/" + MANIFEST_NAME, mtime, len(data)), io.BytesIO(data))
+        stats["files"] += 1
+        stats["bytes"] += len(data)
+
+    return stats
@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+模板漂移审计（只读）
+
+扫描根目录下的所有 .comate 安装，将其中的文件与已知模板版本逐一比对，报告：
+
+- 版本：与哪个已知版本最吻合（吻合的文件数最多；相同时取较新的版本）
+- 漂移：与最新版本相比，升级时会变化的文件数
+- 本地修改：与所识别版本不一致或缺失的文件
+
+模板文件按各项目安装清单中记录的变量渲染后比对（没有清单时从目录名推断）。
+文件哈希按 (大小, mtime, inode) 缓存在 --cache 文件中，重复审计时只重新读取变化过的文件；
+各项目的比对通过进程池并行执行。审计不会修改任何 .comate 目录。
+
+用法:
+    python3 audit.py ROOT [--release [NAME=]SOURCE ...] [--jobs N] [--cache FILE | --no-cache]
+
+SOURCE 可以是模板目录、模板包文件或 git 提交（任意 commit-ish，见 --git-repo），
+按从旧到新的顺序给出，最后一个视为最新版本；不指定时仅以当前 templates/ 作为唯一版本。
+
+示例:
+    python3 audit.py ~/src --release v1.0=v1.0 --release v1.1=v1.1 --release v1.2=HEAD
+    python3 audit.py ~/src --release old=./templates.pack --release new=../templates --jobs 16
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from bulk_init import SKIP_DIRS
+from install_manifest import MANIFEST_NAME, file_sha256, load_install_manifest, sha256_bytes, sha256_chunks
+from template_tree import (
+    build_variables,
+    infer_project_name,
+    iter_entry_output,
+    load_template_tree,
+    output_path,
+    read_entry_bytes,
+)
+
+# 默认哈希缓存文件
+DEFAULT_CACHE_FILE = Path(os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache") / "specmode" / "audit-cache.json"
+CACHE_FORMAT = 1
+
+AUDIT_STATUSES = ("current", "stale", "modified", "unknown", "error")
+
+# 工作进程内共享的已知版本（由进程池初始化函数设置）
+_worker_releases = None
+
+# (版本序号, 变量) -> 该版本对这组变量的期望输出哈希
+_expected_cache = {}
+
+
+def load_release(name: str, spec: str, git_repo: Path = None) -> dict:
+    """加载一个已知版本：预先计算非模板文件的哈希，模板文件按项目变量渲染时再计算"""
+    from init_specmode import load_source_tree
+
+    path = Path(spec)
+    if path.is_dir():
+        tree = load_template_tree(path.resolve())
+    elif path.is_file():
+        tree = load_source_tree({"pack": path})
+    else:
+        tree = load_source_tree({"git_rev": spec, "git_repo": git_repo})
+    if tree is None:
+        raise ValueError(f"无法加载版本 {name}")
+
+    hashes = {}
+    for entry in tree["files"]:
+        if entry["error"]:
+            raise ValueError(f"版本 {name} 中的模板 {entry['path']} 无法编译: {entry['error']}")
+        if entry["template"]:
+            hashes[output_path(entry["path"])] = None
+        else:
+            hashes[entry["path"]] = entry.get("sha256") or sha256_bytes(read_entry_bytes(tree, entry))
+    return {"name": name, "tree": tree, "hashes": hashes}
+
+
+def expected_hashes(index: int, release: dict, variables: dict) -> dict:
+    """返回某版本在给定变量下每个输出文件的期望哈希（按变量缓存，相同变量的项目只渲染一次）"""
+    key = (index, json.dumps(variables, sort_keys=True))
+    expected = _expected_cache.get(key)
+    if expected is None:
+        tree = release["tree"]
+        expected = dict(release["hashes"])
+        for entry in tree["files"]:
+            if entry["template"]:
+                expected[output_path(entry["path"])] = sha256_chunks(iter_entry_output(tree, entry, variables))
+        _expected_cache[key] = expected
+    return expected
+
+
+def discover_installs(root: Path) -> list:
+    """扫描 root 下所有含 .comate 目录的项目（不进入 .comate 与依赖目录）"""
+    projects = []
+    for dirpath, dirnames, _ in os.walk(str(root.resolve())):
+        if ".comate" in dirnames and os.path.isdir(os.path.join(dirpath, ".comate")):
+            projects.append(dirpath)
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith(".") and d not in SKIP_DIRS)
+    return projects
+
+
+def hash_install(comate_dir: Path, paths: set, cache: dict) -> tuple:
+    """
+    计算 .comate 中属于已知版本的文件哈希
+
+    cache 为 {相对路径: [大小, mtime_ns, inode, sha256]}，stat 签名一致时不读取文件。
+    返回 (当前哈希, 新缓存, 额外文件数, 实际读取的文件数)
+    """
+    current = {}
+    new_cache = {}
+    extra = 0
+    hashed = 0
+    root = str(comate_dir)
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        rel_dir = os.path.relpath(dirpath, root)
+        rel_dir = "" if rel_dir == "." else rel_dir.replace(os.sep, "/") + "/"
+        if not rel_dir:
+            dirnames[:] = [d for d in dirnames if d != ".cache"]
+        for filename in filenames:
+            rel_path = rel_dir + filename
+            if rel_path == MANIFEST_NAME or filename.endswith(".specmode-tmp"):
+                continue
+            if rel_path not in paths:
+                extra += 1
+                continue
+            full_path = os.path.join(dirpath, filename)
+            st = os.stat(full_path)
+            signature = [st.st_size, st.st_mtime_ns, st.st_ino]
+            cached = cache.get(rel_path)
+            if cached and cached[:3] == signature:
+                sha256 = cached[3]
+            else:
+                sha256 = file_sha256(Path(full_path))
+                hashed += 1
+            current[rel_path] = sha256
+            new_cache[rel_path] = signature + [sha256]
+
+    return current, new_cache, extra, hashed
+
+
+def _init_worker(releases: list):
+    """进程池初始化：每个工作进程只接收一次已知版本"""
+    global _worker_releases
+    _worker_releases = releases
+
+
+def audit_install(job: dict, releases: list = None) -> dict:
+    """审计单个项目（不抛异常），job 为 {"project": 项目目录, "cache": 该项目的哈希缓存}"""
+    releases = releases if releases is not None else _worker_releases
+    project = Path(job["project"])
+    result = {
+        "project": job["project"],
+        "status": "error",
+        "version": None,
+        "modified": [],
+        "missing": [],
+        "drift": 0,
+        "extra": 0,
+        "hashed": 0,
+        "cache": {},
+        "message": "",
+    }
+
+    try:
+        comate_dir = project / ".comate"
+        manifest = load_install_manifest(comate_dir) or {}
+        variables = manifest.get("variables") or build_variables(
+            infer_project_name(project), defaults=releases[-1]["tree"].get("variables")
+        )
+
+        paths = set()
+        for release in releases:
+            paths.update(release["hashes"])
+        current, result["cache"], result["extra"], result["hashed"] = hash_install(
+            comate_dir, paths, job["cache"]
+        )
+
+        # 选出吻合文件数最多的版本（相同时取较新的）
+        best, best_score = None, 0
+        for index, release in enumerate(releases):
+            expected = expected_hashes(index, release, variables)
+            score = sum(1 for rel_path, sha256 in expected.items() if current.get(rel_path) == sha256)
+            if score and score >= best_score:
+                best, best_score = index, score
+
+        latest = expected_hashes(len(releases) - 1, releases[-1], variables)
+        result["drift"] = sum(1 for rel_path, sha256 in latest.items() if current.get(rel_path) != sha256)
+
+        if best is None:
+            result["status"] = "unknown"
+            return result
+
+        expected = expected_hashes(best, releases[best], variables)
+        result["version"] = releases[best]["name"]
+        for rel_path, sha256 in sorted(expected.items()):
+            if rel_path not in current:
+                result["missing"].append(rel_path)
+            elif current[rel_path] != sha256:
+                result["modified"].append(rel_path)
+
+        if result["modified"] or result["missing"]:
+            result["status"] = "modified"
+        elif best == len(releases) - 1:
+            result["status"] = "current"
+        else:
+            result["status"] = "stale"
+    except Exception as e:
+        result["status"] = "error"
+        result["message"] = str(e)
+
+    return result
+
+
+def run_audit(releases: list, jobs: list, workers: int = None) -> list:
+    """通过进程池审计所有项目，结果顺序与任务顺序一致"""
+    if workers == 1 or len(jobs) <= 1:
+        return [audit_install(job, releases) for job in jobs]
+
+    if sys.version_info >= (3, 7):
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(releases,)) as executor:
+            return list(executor.map(audit_install, jobs, chunksize=16))
+
+    # Python 3.6 不支持 initializer，随任务传递已知版本
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(audit_install, jobs, [releases] * len(jobs), chunksize=16))
+
+
+def load_cache(cache_file: Path) -> dict:
+    """读取哈希缓存：{项目目录: {相对路径: [大小, mtime_ns, inode, sha256]}}"""
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT:
+        return {}
+    return data.get("projects", {})
+
+
+def save_cache(cache_file: Path, projects: dict):
+    """原子写入哈希缓存（只保留本次审计到的项目）"""
+    cache_file.parent.mkdir(parents=True, exist_ok=True)
+    tmp_file = cache_file.with_name(f"{cache_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(
+        json.dumps({"format": CACHE_FORMAT, "projects": projects}, separators=(",", ":")),
+        encoding="utf-8"
+    )
+    os.replace(str(tmp_file), str(cache_file))
+
+
+def print_audit_report(results: list, latest: str, elapsed: float):
+    """打印审计报告"""
+    icons = {"current": "✅", "stale": "⏳", "modified": "✏️ ", "unknown": "❓", "error": "❌"}
+    counts = {status: 0 for status in AUDIT_STATUSES}
+
+    print()
+    for r in results:
+        counts[r["status"]] += 1
+        line = f"{icons[r['status']]} {r['project']}"
+        if r["status"] == "error":
+            line += f"  - {r['message']}"
+        elif r["status"] == "unknown":
+            line += "  - 无法识别模板版本"
+        else:
+            line += f"  [{r['version']}]"
+            if r["drift"]:
+                line += f"  落后最新版本 {latest}: {r['drift']} 个文件"
+            if r["modified"]:
+                line += f"  本地修改 {len(r['modified'])} 个: " + ", ".join(r["modified"])
+            if r["missing"]:
+                line += f"  缺失 {len(r['missing'])} 个: " + ", ".join(r["missing"])
+        print(line)
+
+    hashed = sum(r["hashed"] for r in results)
+    print()
+    print("=" * 60)
+    print(f"📊 漂移审计: {len(results)} 个项目, {counts['current']} 最新, {counts['stale']} 过期, "
+          f"{counts['modified']} 本地修改, {counts['unknown']} 未识别, {counts['error']} 失败")
+    print(f"   读取文件 {hashed} 个（其余命中哈希缓存）, 总耗时 {elapsed:.2f} s")
+    print("=" * 60)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="审计 .comate 安装相对已知模板版本的漂移",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument("root", help="扫描的根目录")
+    parser.add_argument(
+        "--release",
+        action="append",
+        default=[],
+        metavar="[NAME=]SOURCE",
+        help="已知模板版本（模板目录 / 模板包 / git 提交），按从旧到新的顺序重复指定"
+    )
+    parser.add_argument(
+        "--git-repo",
+        type=Path,
+        help="git 提交所在仓库（默认脚本所在仓库）"
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        help="工作进程数（默认 CPU 核数）"
+    )
+    cache_group = parser.add_mutually_exclusive_group()
+    cache_group.add_argument(
+        "--cache",
+        type=Path,
+        default=DEFAULT_CACHE_FILE,
+        help=f"哈希缓存文件（默认 {DEFAULT_CACHE_FILE}）"
+    )
+    cache_group.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不读取也不写入哈希缓存"
+    )
+
+    args = parser.parse_args()
+    start = time.perf_counter()
+
+    specs = args.release or ["current=" + str(Path(__file__).parent.parent / "templates")]
+    releases = []
+    for spec in specs:
+        name, sep, source = spec.partition("=")
+        if not sep:
+            name, source = spec, spec
+        try:
+            releases.append(load_release(name, source, args.git_repo))
+        except (OSError, ValueError) as e:
+            print(f"❌ 错误：{e}")
+            sys.exit(1)
+
+    cache = {} if args.no_cache else load_cache(args.cache)
+    projects = discover_installs(Path(args.root))
+    jobs = [{"project": project, "cache": cache.get(project, {})} for project in projects]
+    results = run_audit(releases, jobs, args.jobs)
+
+    if not args.no_cache:
+        save_cache(args.cache, {r["project"]: r["cache"] for r in results if r["status"] != "error"})
+
+    print_audit_report(results, releases[-1]["name"], time.perf_counter() - start)
+
+
+if __name__ == "__main__":
+    main()
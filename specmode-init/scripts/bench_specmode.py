@@ -0,0 +1,780 @@
+#!/usr/bin/env python3
+"""
+Spec Mode 工具性能基准
+
+用法:
+    python3 bench_specmode.py render [--vars N] [--size KB] [--repeat N]
+    python3 bench_specmode.py copy [--files N] [--size BYTES] [--threads N] [--dir DIR]
+    python3 bench_specmode.py frontmatter [--files N] [--body KB] [--dir DIR]
+    python3 bench_specmode.py scan [--entries N] [--body KB] [--max-jobs N] [--dir DIR]
+    python3 bench_specmode.py query [--entries N] [--queries N] [--clients N]
+    python3 bench_specmode.py startup [--entries N] [--repeat N] [--budget-ms MS]
+    python3 bench_specmode.py check [--entries N] [--dir DIR]
+    python3 bench_specmode.py report [--entries N] [--jobs N] [--dir DIR]
+    python3 bench_specmode.py triggers [--entries N] [--terms N] [--prompts N]
+    python3 bench_specmode.py search [--entries N] [--queries N] [--limit N]
+
+子命令:
+    render       对比逐变量 str.replace 渲染与编译式单次渲染
+    copy         在合成模板树上对比逐文件 mkdir + shutil.copy2 与复制引擎
+    frontmatter  在合成 SKILL.md 语料上对比旧 frontmatter 解析、共享解析模块与 PyYAML（已安装时）
+    scan         sync_skills / sync_rules 并行校验在 1..N 个线程 / 进程下的扩展性
+    query        查询守护进程的单次查询延迟（p50 / p99）与多客户端并发吞吐
+    startup      冷启动：逐脚本调用与 zipapp / python3 -m specmode 的耗时与 -X importtime 导入耗时；
+                 specmode.cli（命令分发）的累计导入耗时超过 --budget-ms 时以退出码 1 结束
+    check        sync_skills / sync_rules --check（生成戳）与 --dry-run（全量扫描校验）的耗时对比
+    report       sync_skills 各输出格式（text / json / ndjson，及 --quiet）的总耗时、首行延迟与
+                 stdout write 次数，并校验 json / ndjson 输出可解析
+    triggers     请求匹配：逐词子串查找与 Aho-Corasick 自动机的单次匹配耗时，以及自动机的构建、保存与加载耗时
+    search       规则检索：BM25 倒排表的全量写入与单条增量更新耗时，以及 top-k 查询延迟（p50 / p99）
+"""
+
+import argparse
+import json
+import os
+import socket
+import subprocess
+import threading
+import re
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from copy_engine import strategy_counts
+from template_engine import clear_template_cache, compile_template, render_compiled
+from template_tree import load_template_tree, write_tree
+
+
+def legacy_render_template(content: str, variables: dict) -> str:
+    """旧实现：每个变量一次全文 str.replace"""
+    result = content
+    for key, value in variables.items():
+        result = result.replace(f"{{{{{key}}}}}", value)
+    return result
+
+
+def make_render_case(var_count: int, size_kb: int) -> tuple:
+    """构造基准模板与变量表"""
+    variables = {f"var_{i}": f"value-{i}" for i in range(var_count)}
+    line_parts = []
+    total = 0
+    i = 0
+    while total < size_kb * 1024:
+        line = f"第 {i} 行 {{{{var_{i % var_count}}}}} 的普通文本内容，用于填充模板。\n"
+        line_parts.append(line)
+        total += len(line)
+        i += 1
+    return "".join(line_parts), variables
+
+
+def timeit(func, repeat: int) -> float:
+    """返回单次调用的最佳耗时（秒）"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_render(args) -> int:
+    """render 子命令"""
+    content, variables = make_render_case(args.vars, args.size)
+
+    expected = legacy_render_template(content, variables)
+    if render_compiled(compile_template(content), variables) != expected:
+        print("❌ 编译式渲染结果与旧实现不一致")
+        return 1
+
+    legacy = timeit(lambda: legacy_render_template(content, variables), args.repeat)
+
+    def cold():
+        clear_template_cache()
+        render_compiled(compile_template(content), variables)
+
+    cold_time = timeit(cold, args.repeat)
+    compile_template(content)
+    warm = timeit(lambda: render_compiled(compile_template(content), variables), args.repeat)
+
+    print(f"📊 模板 {len(content) // 1024} KB, {args.vars} 个变量, 最佳 {args.repeat} 次")
+    print(f"   旧实现 str.replace:     {legacy * 1000:8.3f} ms")
+    print(f"   编译式（冷缓存）:       {cold_time * 1000:8.3f} ms  ({legacy / cold_time:5.1f}x)")
+    print(f"   编译式（热缓存）:       {warm * 1000:8.3f} ms  ({legacy / warm:5.1f}x)")
+    return 0
+
+
+def legacy_copy_tree(templates_dir: Path, target_dir: Path):
+    """旧实现：rglob 遍历，逐文件 mkdir(parents=True) + shutil.copy2"""
+    for item in templates_dir.rglob("*"):
+        target_path = target_dir / item.relative_to(templates_dir)
+        if item.is_dir():
+            target_path.mkdir(parents=True, exist_ok=True)
+        elif item.is_file():
+            target_path.parent.mkdir(parents=True, exist_ok=True)
+            shutil.copy2(item, target_path)
+
+
+def make_copy_case(root: Path, file_count: int, size: int):
+    """构造合成模板树：每个目录 100 个文件，两级目录"""
+    payload = b"x" * size
+    for i in range(file_count):
+        d = root / f"group-{i // 1000:03d}" / f"dir-{i // 100:04d}"
+        if i % 100 == 0:
+            d.mkdir(parents=True, exist_ok=True)
+        (d / f"file-{i:05d}.md").write_bytes(payload)
+
+
+def bench_copy(args) -> int:
+    """copy 子命令"""
+    base = Path(tempfile.mkdtemp(prefix="specmode-bench-", dir=args.dir))
+    try:
+        templates_dir = base / "templates"
+        make_copy_case(templates_dir, args.files, args.size)
+
+        start = time.perf_counter()
+        legacy_copy_tree(templates_dir, base / "legacy")
+        legacy = time.perf_counter() - start
+
+        start = time.perf_counter()
+        tree = load_template_tree(templates_dir)
+        walk = time.perf_counter() - start
+
+        start = time.perf_counter()
+        serial_stats = write_tree(tree, base / "serial", {}, threads=1)
+        serial = time.perf_counter() - start
+
+        start = time.perf_counter()
+        stats = write_tree(tree, base / "engine", {}, threads=args.threads)
+        engine = time.perf_counter() - start
+
+        counts = strategy_counts(stats["strategies"])
+        print(f"📊 合成模板树: {args.files} 个文件 × {args.size} 字节, 位于 {base}")
+        print(f"   旧实现 rglob + copy2:         {legacy * 1000:9.1f} ms")
+        print(f"   复制引擎 遍历模板树:          {walk * 1000:9.1f} ms")
+        print(f"   复制引擎 写入（单线程）:      {serial * 1000:9.1f} ms  ({legacy / (walk + serial):4.1f}x)")
+        print(f"   复制引擎 写入（线程池）:      {engine * 1000:9.1f} ms  ({legacy / (walk + engine):4.1f}x)")
+        print("   写入方式: " + ", ".join(f"{k} {v} 个" for k, v in sorted(counts.items())))
+        if len(serial_stats["copied"]) != args.files:
+            print("❌ 复制文件数与预期不一致")
+            return 1
+    finally:
+        shutil.rmtree(str(base), ignore_errors=True)
+    return 0
+
+
+def legacy_parse_frontmatter(content: str):
+    """旧实现：整文件读入后逐行 re.match，只识别顶级键"""
+    if not content.startswith("---"):
+        return None
+    end_match = re.search(r'\n---\s*\n', content[3:])
+    if not end_match:
+        return None
+    yaml_content = content[3:end_match.start() + 3]
+    result = {}
+    current_key = None
+    current_value = []
+    for line in yaml_content.split('\n'):
+        key_match = re.match(r'^(\w+):\s*(.*)', line)
+        if key_match:
+            if current_key:
+                value = '\n'.join(current_value).strip()
+                if value.startswith('|'):
+                    value = '\n'.join(current_value[1:]) if len(current_value) > 1 else ''
+                result[current_key] = value.strip()
+            current_key = key_match.group(1)
+            current_value = [key_match.group(2)] if key_match.group(2) else []
+        elif current_key and (line.startswith('  ') or line.strip() == ''):
+            current_value.append(line)
+    if current_key:
+        value = '\n'.join(current_value).strip()
+        if value.startswith('|'):
+            value = '\n'.join(current_value[1:]) if len(current_value) > 1 else ''
+        result[current_key] = value.strip()
+    return result if result else None
+
+
+def make_frontmatter_case(root: Path, file_count: int, body_kb: int) -> list:
+    """构造合成 SKILL.md 语料（frontmatter 与模板中的 SKILL.md 结构一致）"""
+    body = ("## 章节\n\n正文内容，用于模拟技能文档的主体部分。\n" * (body_kb * 1024 // 60 + 1))[:body_kb * 1024]
+    files = []
+    for i in range(file_count):
+        d = root / f"group-{i // 1000:03d}" / f"skill-{i:05d}"
+        d.mkdir(parents=True)
+        path = d / "SKILL.md"
+        path.write_text(
+            "---\n"
+            f"name: skill-{i}\n"
+            "description: |\n"
+            f"  技能 {i} 的说明。\n"
+            f"  **触发词**：新建{i}、主题{i % 50}、扫描{i}\n"
+            "  **使用场景**：批量校验\n"
+            "license: MIT\n"
+            "globs: [\"**/*.go\", conf/**/*.toml]\n"
+            f"alwaysApply: {'true' if i % 2 else 'false'}\n"
+            "metadata:\n"
+            "  audience: developers\n"
+            "  category: meta-skill\n"
+            "---\n\n" + body,
+            encoding="utf-8"
+        )
+        files.append(path)
+    return files
+
+
+def bench_frontmatter(args) -> int:
+    """frontmatter 子命令"""
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "templates" / "lib"))
+    from specmode.frontmatter import read_frontmatter, read_frontmatter_text
+
+    try:
+        import yaml
+        loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    except ImportError:
+        yaml = None
+
+    base = Path(tempfile.mkdtemp(prefix="specmode-bench-", dir=args.dir))
+    try:
+        files = make_frontmatter_case(base, args.files, args.body)
+
+        def run(parse):
+            start = time.perf_counter()
+            results = [parse(path) for path in files]
+            return time.perf_counter() - start, results
+
+        legacy, _ = run(lambda path: legacy_parse_frontmatter(path.read_text(encoding="utf-8")))
+        shared, parsed = run(read_frontmatter)
+        print(f"📊 合成 SKILL.md 语料: {args.files} 个文件, 正文 {args.body} KB, 位于 {base}")
+        print(f"   旧实现 read_text + 逐行 re.match:  {legacy * 1000:9.1f} ms（只有顶级键，值均为字符串）")
+        print(f"   共享模块 read_frontmatter:          {shared * 1000:9.1f} ms  ({legacy / shared:4.1f}x)")
+
+        if yaml is not None:
+            pyyaml, expected = run(lambda path: yaml.load(read_frontmatter_text(path), Loader=loader))
+            print(f"   PyYAML（{loader.__name__}，只读头部）: {pyyaml * 1000:9.1f} ms  ({pyyaml / shared:4.1f}x 慢于共享模块)")
+            if parsed != expected:
+                print("❌ 解析结果与 PyYAML 不一致")
+                return 1
+        else:
+            print("   PyYAML 未安装，跳过对比")
+    finally:
+        shutil.rmtree(str(base), ignore_errors=True)
+    return 0
+
+
+def make_scan_case(root: Path, entry_count: int, body_kb: int) -> tuple:
+    """构造合成 .comate/skills 与 .comate/rules 目录"""
+    skills_dir = root / "skills"
+    rules_dir = root / "rules"
+    make_frontmatter_case(skills_dir, entry_count, body_kb)
+    # make_frontmatter_case 按千个分组，sync_skills 只扫描一层
+    for group in list(skills_dir.iterdir()):
+        for skill in group.iterdir():
+            skill.rename(skills_dir / skill.name)
+        group.rmdir()
+
+    rules_dir.mkdir()
+    body = ("正文内容，用于模拟规则文档的主体部分。\n" * (body_kb * 1024 // 60 + 1))[:body_kb * 1024]
+    for i in range(entry_count):
+        (rules_dir / f"rule-{i:05d}.mdr").write_text(
+            "---\n"
+            f"description: 规则 {i} 的说明\n"
+            f"globs: [\"src/mod{i}/**/*.go\"]\n"
+            "alwaysApply: false\n"
+            "---\n\n"
+            f"# Rule: rule-{i}\n\n## 触发条件\n\n相关关键词：规则{i}, 主题{i % 50}\n\n"
+            + body + "\n## 检查清单\n\n- [ ] 完成\n",
+            encoding="utf-8"
+        )
+    return skills_dir, rules_dir
+
+
+def bench_scan(args) -> int:
+    """scan 子命令"""
+    templates_dir = Path(__file__).resolve().parent.parent / "templates"
+    sys.path.insert(0, str(templates_dir / "lib"))
+    sys.path.insert(0, str(templates_dir / "skills" / "skill-creator" / "scripts"))
+    sys.path.insert(0, str(templates_dir / "skills" / "rules-creator" / "scripts"))
+    import sync_rules
+    import sync_skills
+
+    max_jobs = args.max_jobs or os.cpu_count() or 1
+    levels = []
+    jobs = 1
+    while jobs < max_jobs:
+        levels.append(jobs)
+        jobs *= 2
+    levels.append(max_jobs)
+
+    base = Path(tempfile.mkdtemp(prefix="specmode-bench-", dir=args.dir))
+    try:
+        skills_dir, rules_dir = make_scan_case(base, args.entries, args.body)
+        print(f"📊 合成 .comate: {args.entries} 个技能 + {args.entries} 个规则, 正文 {args.body} KB, 位于 {base}")
+        cases = [
+            ("sync_skills", lambda j, e: sync_skills.generate_index_content(sync_skills.scan_skills(skills_dir, None, j, e))),
+            ("sync_rules", lambda j, e: sync_rules.generate_index_content(sync_rules.scan_rules(rules_dir, None, j, e))),
+        ]
+        for name, scan in cases:
+            start = time.perf_counter()
+            expected = scan(1, "thread")
+            serial = time.perf_counter() - start
+            print(f"\n   {name}: 串行 {serial * 1000:8.1f} ms")
+            for executor in ("thread", "process"):
+                for jobs in levels[1:]:
+                    start = time.perf_counter()
+                    output = scan(jobs, executor)
+                    elapsed = time.perf_counter() - start
+                    print(f"     {executor:<7} x{jobs:<3} {elapsed * 1000:8.1f} ms  ({serial / elapsed:4.1f}x)")
+                    if output != expected:
+                        print(f"❌ {executor} x{jobs} 生成的索引与串行模式不一致")
+                        return 1
+    finally:
+        shutil.rmtree(str(base), ignore_errors=True)
+    return 0
+
+
+def bench_query(args) -> int:
+    """query 子命令"""
+    templates_dir = Path(__file__).resolve().parent.parent / "templates"
+    sys.path.insert(0, str(templates_dir / "lib"))
+    from specmode import daemon
+
+    base = Path(tempfile.mkdtemp(prefix="specmode-bench-"))
+    try:
+        make_scan_case(base, args.entries, 1)
+        for name in ("skill-creator", "rules-creator"):
+            shutil.copytree(str(templates_dir / "skills" / name), str(base / "skills" / name))
+        socket_path = daemon.default_socket(base)
+        ready = threading.Event()
+        threading.Thread(target=daemon.serve, args=(base, socket_path, False, ready), daemon=True).start()
+        ready.wait()
+
+        requests = [
+            {"op": "lookup", "name": f"skill-{args.entries // 2}"},
+            {"op": "match_path", "path": f"src/mod{args.entries // 3}/services/user.go"},
+            {"op": "match_prompt", "prompt": "请帮我新建skill并同步rules，涉及主题7"},
+        ]
+
+        def client(requests: list, count: int, latencies: list):
+            """单个连接上连续发送 count 个查询，记录每次往返耗时"""
+            lines = [(json.dumps(r, ensure_ascii=False) + "\n").encode("utf-8") for r in requests]
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.connect(str(socket_path))
+                reader = sock.makefile("rb")
+                for i in range(count):
+                    start = time.perf_counter()
+                    sock.sendall(lines[i % len(lines)])
+                    response = reader.readline()
+                    latencies.append(time.perf_counter() - start)
+                    if not json.loads(response.decode("utf-8"))["ok"]:
+                        raise ValueError(response)
+
+        print(f"📊 查询守护进程: {args.entries} 个技能 + {args.entries} 个规则, socket {socket_path}")
+        for request in requests:
+            latencies = []
+            client([request], args.queries, latencies)
+            latencies.sort()
+            p50 = latencies[len(latencies) // 2] * 1e6
+            p99 = latencies[int(len(latencies) * 0.99)] * 1e6
+            print(f"   {request['op']:<13} p50 {p50:7.0f} µs   p99 {p99:7.0f} µs")
+
+        latencies = []
+        threads = [
+            threading.Thread(target=client, args=(requests, args.queries, latencies))
+            for _ in range(args.clients)
+        ]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        total = args.queries * args.clients
+        print(f"   {args.clients} 个并发客户端: {total} 次查询 {elapsed:.2f} s（{total / elapsed:,.0f} 次/秒）")
+    finally:
+        shutil.rmtree(str(base), ignore_errors=True)
+    return 0
+
+
+def import_times(command: list, env: dict = None) -> tuple:
+    """以 -X importtime 运行命令，返回 (全部导入的自身耗时之和, {模块: 累计耗时})，单位毫秒"""
+    completed = subprocess.run(
+        [sys.executable, "-X", "importtime"] + command,
+        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, env=env, universal_newlines=True
+    )
+    total = 0
+    cumulative = {}
+    for line in completed.stderr.splitlines():
+        # import time: self [us] | cumulative | imported package
+        fields = line[len("import time:"):].split("|")
+        if not line.startswith("import time:") or len(fields) != 3 or not fields[0].strip().isdigit():
+            continue
+        total += int(fields[0])
+        cumulative[fields[2].strip()] = int(fields[1]) / 1000
+    return total / 1000, cumulative
+
+
+def make_comate_case(base: Path, entry_count: int, body_kb: int) -> Path:
+    """在 base 下构造合成的 .comate（含同步脚本与 lib/），返回 .comate 目录"""
+    templates_dir = Path(__file__).resolve().parent.parent / "templates"
+    comate_dir = base / ".comate"
+    comate_dir.mkdir()
+    make_scan_case(comate_dir, entry_count, body_kb)
+    for name in ("skill-creator", "rules-creator"):
+        shutil.copytree(str(templates_dir / "skills" / name), str(comate_dir / "skills" / name))
+    shutil.copytree(str(templates_dir / "lib"), str(comate_dir / "lib"),
+                    ignore=shutil.ignore_patterns("__pycache__"))
+    return comate_dir
+
+
+def bench_check(args) -> int:
+    """check 子命令"""
+    base = Path(tempfile.mkdtemp(prefix="specmode-bench-", dir=args.dir))
+    try:
+        comate_dir = make_comate_case(base, args.entries, 4)
+        scripts = [
+            ("sync_skills", comate_dir / "skills" / "skill-creator" / "scripts" / "sync_skills.py"),
+            ("sync_rules", comate_dir / "skills" / "rules-creator" / "scripts" / "sync_rules.py"),
+        ]
+        print(f"📊 --check: {args.entries} 个技能 + {args.entries} 个规则, 位于 {base}")
+
+        def run(script: Path, *options) -> tuple:
+            start = time.perf_counter()
+            completed = subprocess.run([sys.executable, str(script)] + list(options), stdout=subprocess.DEVNULL)
+            return time.perf_counter() - start, completed.returncode
+
+        for name, script in scripts:
+            run(script)  # 生成索引（含生成戳）与缓存
+            dry_run, _ = run(script, "--dry-run")
+            check, code = run(script, "--check")
+            print(f"\n   {name}: --dry-run {dry_run * 1000:8.1f} ms")
+            print(f"     --check（stat 命中缓存） {check * 1000:8.1f} ms  ({dry_run / check:5.1f}x)  退出码 {code}")
+            if code != 0:
+                print("❌ 刚生成的索引被判定为过期")
+                return 1
+            # 模拟 CI 重新检出：mtime 全部变化，内容不变，需要重新计算内容哈希
+            for path in (comate_dir / "skills").rglob("*"):
+                if path.is_file():
+                    os.utime(str(path))
+            for path in (comate_dir / "rules").iterdir():
+                os.utime(str(path))
+            check, code = run(script, "--check")
+            print(f"     --check（mtime 全部变化） {check * 1000:7.1f} ms  ({dry_run / check:5.1f}x)  退出码 {code}")
+            check, code = run(script, "--check", "--no-cache")
+            print(f"     --check --no-cache       {check * 1000:8.1f} ms  ({dry_run / check:5.1f}x)  退出码 {code}")
+    finally:
+        shutil.rmtree(str(base), ignore_errors=True)
+    return 0
+
+
+def bench_report(args) -> int:
+    """report 子命令"""
+    base = Path(tempfile.mkdtemp(prefix="specmode-bench-", dir=args.dir))
+    try:
+        comate_dir = make_comate_case(base, args.entries, 4)
+        script = comate_dir / "skills" / "skill-creator" / "scripts" / "sync_skills.py"
+        print(f"📊 sync_skills --no-cache --dry-run --jobs {args.jobs}: {args.entries} 个技能, 位于 {base}")
+        # 以计数的原始流替换 stdout（与输出到管道时相同的块缓冲），统计 write 调用次数
+        counter = (
+            "import io, os, runpy, sys\n"
+            "class Counting(io.RawIOBase):\n"
+            "    writes = 0\n"
+            "    def writable(self):\n        return True\n"
+            "    def write(self, data):\n        Counting.writes += 1\n        return os.write(1, data)\n"
+            "sys.stdout = io.TextIOWrapper(io.BufferedWriter(Counting()), encoding='utf-8')\n"
+            "sys.argv = sys.argv[1:]\n"
+            "try:\n    runpy.run_path(sys.argv[0], run_name='__main__')\n"
+            "finally:\n    sys.stdout.flush()\n    sys.stderr.write('writes=%d\\n' % Counting.writes)\n"
+        )
+        cases = [
+            ("text", []),
+            ("text --quiet", ["--quiet"]),
+            ("json", ["--format", "json"]),
+            ("ndjson", ["--format", "ndjson"]),
+            ("ndjson --quiet", ["--format", "ndjson", "--quiet"]),
+        ]
+        for label, options in cases:
+            command = [sys.executable, "-c", counter, str(script), "--no-cache", "--dry-run",
+                       "--jobs", str(args.jobs)] + options
+            start = time.perf_counter()
+            process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+            first = process.stdout.readline()
+            first_at = time.perf_counter() - start
+            output = first + process.stdout.read()
+            errors = process.stderr.read().decode("utf-8")
+            process.wait()
+            total = time.perf_counter() - start
+            writes = re.search(r"writes=(\d+)", errors)
+            if process.returncode != 0 or not writes:
+                print(f"❌ {label} 运行失败:\n{errors}")
+                return 1
+            records = ""
+            try:
+                if "json" in options:
+                    records = f"  {len(json.loads(output.decode('utf-8'))['entries'])} 条记录 + 汇总"
+                elif "ndjson" in options:
+                    records = f"  {len([json.loads(line) for line in output.decode('utf-8').splitlines()])} 行"
+            except ValueError as e:
+                print(f"❌ {label} 输出不是合法的 JSON: {e}")
+                return 1
+            print(f"   {label:<15} 总计 {total * 1000:8.1f} ms  首行 {first_at * 1000:8.1f} ms  "
+                  f"{len(output) / 1024:6.0f} KB  write {writes.group(1):>5}{records}")
+    finally:
+        shutil.rmtree(str(base), ignore_errors=True)
+    return 0
+
+
+def bench_triggers(args) -> int:
+    """triggers 子命令"""
+    import random
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "templates" / "lib"))
+    from specmode import triggers
+
+    rng = random.Random(0)
+    chars = "新建同步扫描索引规则技能模板接口服务用户登录注册订单支付缓存日志监控部署测试发布配置权限数据库"
+    ascii_words = ["api", "sync", "skill", "rule", "deploy", "cache", "grpc", "redis", "mysql", "auth"]
+
+    def term() -> str:
+        word = "".join(rng.choice(chars) for _ in range(rng.randint(2, 5)))
+        return word + rng.choice(ascii_words) if rng.random() < 0.3 else word
+
+    terms = [(term(), "skill", f"skill-{i}") for i in range(args.entries) for _ in range(args.terms)]
+    prompts = []
+    for _ in range(args.prompts):
+        picked = [rng.choice(terms)[0] for _ in range(3)]
+        filler = ["请帮我", "顺便", "然后看看", "，谢谢"]
+        prompts.append("".join(word + rng.choice(filler) for word in picked))
+
+    def naive(prompt: str) -> int:
+        """改造前的匹配：对每个词做一次子串查找"""
+        text = prompt.lower()
+        return len({name for word, _, name in lowered if word in text})
+
+    lowered = [(word.lower(), kind, name) for word, kind, name in terms]
+    print(f"📊 {args.entries} 个技能 × {args.terms} 个触发词 = {len(terms)} 个词, {args.prompts} 条请求")
+
+    start = time.perf_counter()
+    automaton = triggers.build(terms, "0")
+    built = time.perf_counter() - start
+    with tempfile.TemporaryDirectory(prefix="specmode-bench-") as tmp:
+        automaton_file = Path(tmp) / triggers.AUTOMATON_NAME
+        start = time.perf_counter()
+        triggers.save(automaton_file, automaton)
+        saved = time.perf_counter() - start
+        start = time.perf_counter()
+        loaded = triggers.load(automaton_file, "0")
+        load_time = time.perf_counter() - start
+        size = automaton_file.stat().st_size
+    print(f"   构建 {built * 1000:8.1f} ms  保存 {saved * 1000:8.1f} ms  加载 {load_time * 1000:8.1f} ms  "
+          f"({len(automaton['goto'])} 个状态, {size / 1024:.0f} KB)")
+
+    start = time.perf_counter()
+    naive_hits = [naive(prompt) for prompt in prompts]
+    naive_time = (time.perf_counter() - start) / len(prompts)
+    start = time.perf_counter()
+    hits = [len(triggers.match(loaded, prompt)) for prompt in prompts]
+    match_time = (time.perf_counter() - start) / len(prompts)
+    print(f"   逐词子串查找 {naive_time * 1e6:10.1f} µs/条")
+    print(f"   自动机匹配   {match_time * 1e6:10.1f} µs/条  ({naive_time / match_time:6.1f}x)")
+    # 请求全是 ASCII 小写 / 简体时两者的命中集合应一致（自动机另外处理全角、繁体等）
+    if hits != naive_hits:
+        print("❌ 自动机与逐词子串查找的命中条目数不一致")
+        return 1
+    return 0
+
+
+def bench_search(args) -> int:
+    """search 子命令"""
+    import random
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "templates" / "lib"))
+    from specmode import db
+
+    rng = random.Random(0)
+    chars = "新建同步扫描索引规则技能模板接口服务用户登录注册订单支付缓存日志监控部署测试发布配置权限数据库"
+    ascii_words = ["api", "sync", "skill", "rule", "deploy", "cache", "grpc", "redis", "mysql", "auth"]
+
+    def phrase(low: int, high: int) -> str:
+        word = "".join(rng.choice(chars) for _ in range(rng.randint(low, high)))
+        return word + " " + rng.choice(ascii_words) if rng.random() < 0.3 else word
+
+    def rule(i: int, revision: int = 0) -> tuple:
+        """合成的规则校验结果与缓存记录（update_entries 只用到这些字段）"""
+        result = {
+            "name": f"rule-{i:05d}", "status": "pass", "errors": [], "warnings": [],
+            "description": phrase(8, 20), "globs": [], "alwaysApply": False,
+            "keywords": [phrase(2, 4) for _ in range(5)],
+            "headings": [phrase(3, 6) for _ in range(4)] + ["触发条件", "检查清单"],
+            "frontmatter": None, "row": f"| rule-{i:05d} |",
+        }
+        return result, {"stat": [0, 0, 0], "sha256": f"{i}-{revision}"}
+
+    results, entries = [], {}
+    for i in range(args.entries):
+        result, record = rule(i)
+        results.append(result)
+        entries[f"{result['name']}.mdr"] = record
+    queries = ["改一下" + phrase(4, 8) + "的" + phrase(2, 4) for _ in range(args.queries)]
+    print(f"📊 {args.entries} 个规则, {args.queries} 条查询, top-{args.limit}")
+
+    with tempfile.TemporaryDirectory(prefix="specmode-bench-") as tmp:
+        db_file = Path(tmp) / db.DB_NAME
+        start = time.perf_counter()
+        db.update_entries(db_file, "rule", results, entries, 1)
+        full = time.perf_counter() - start
+        results[0], entries["rule-00000.mdr"] = rule(0, 1)
+        start = time.perf_counter()
+        db.update_entries(db_file, "rule", results, entries, 1)
+        incremental = time.perf_counter() - start
+        print(f"   全量写入 {full * 1000:8.1f} ms  单条增量更新 {incremental * 1000:8.1f} ms  "
+              f"(数据库 {db_file.stat().st_size / 1024 / 1024:.1f} MB)")
+
+        conn = db.connect(db_file, create=False)
+        try:
+            latencies = []
+            hits = 0
+            for query in queries:
+                start = time.perf_counter()
+                hits += bool(db.search_rules(conn, query, args.limit))
+                latencies.append(time.perf_counter() - start)
+        finally:
+            conn.close()
+    latencies.sort()
+    p50 = latencies[len(latencies) // 2]
+    p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+    print(f"   查询 p50 {p50 * 1000:8.2f} ms   p99 {p99 * 1000:8.2f} ms   ({hits}/{len(queries)} 条有结果)")
+    return 0
+
+
+def bench_startup(args) -> int:
+    """startup 子命令"""
+    templates_dir = Path(__file__).resolve().parent.parent / "templates"
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    from build_zipapp import build
+
+    base = Path(tempfile.mkdtemp(prefix="specmode-bench-"))
+    try:
+        comate_dir = make_comate_case(base, args.entries, 1)
+        pyz = base / "specmode.pyz"
+        build(templates_dir, pyz)
+
+        env = dict(os.environ, PYTHONPATH=str(comate_dir / "lib"))
+        legacy = str(comate_dir / "skills" / "skill-creator" / "scripts" / "sync_skills.py")
+        cases = [
+            ("sync_skills.py --dry-run", [legacy, "--dry-run"], None),
+            ("pyz sync-skills --dry-run", [str(pyz), "--root", str(base), "sync-skills", "--dry-run"], None),
+            ("-m specmode sync-skills", ["-m", "specmode", "--root", str(base), "sync-skills", "--dry-run"], env),
+            ("pyz --help", [str(pyz), "--help"], None),
+        ]
+
+        print(f"📊 冷启动: {args.entries} 个技能, 最佳 {args.repeat} 次（首次运行生成 __pycache__ / 校验缓存，不计入）")
+        print(f"   {'命令':<28} {'耗时':>10} {'导入':>10}")
+        baseline = min(import_times(["-c", "pass"])[0] for _ in range(args.repeat))
+        print(f"   {'python3 -c pass':<28} {'':>10} {baseline:7.1f} ms")
+        dispatch = float("inf")
+        for name, command, case_env in cases:
+            subprocess.run([sys.executable] + command, stdout=subprocess.DEVNULL, env=case_env, check=True)
+            best = float("inf")
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                subprocess.run([sys.executable] + command, stdout=subprocess.DEVNULL, env=case_env, check=True)
+                best = min(best, time.perf_counter() - start)
+            imports = float("inf")
+            for _ in range(args.repeat):
+                total, cumulative = import_times(command, case_env)
+                imports = min(imports, total)
+                if name == "pyz --help":
+                    dispatch = min(dispatch, cumulative["specmode.cli"])
+            print(f"   {name:<28} {best * 1000:7.1f} ms {imports:7.1f} ms")
+
+        # 预算只约束 specmode.cli 自身及其导入的模块：解释器与 runpy 的开销与本工具无关
+        if dispatch > args.budget_ms:
+            print(f"❌ specmode.cli 累计导入耗时 {dispatch:.2f} ms 超出预算 {args.budget_ms:.1f} ms")
+            return 1
+        print(f"✅ specmode.cli 累计导入耗时 {dispatch:.2f} ms，预算 {args.budget_ms:.1f} ms")
+    finally:
+        shutil.rmtree(str(base), ignore_errors=True)
+    return 0
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="Spec Mode 工具性能基准",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    render = subparsers.add_parser("render", help="模板渲染基准")
+    render.add_argument("--vars", type=int, default=50, help="变量个数（默认 50）")
+    render.add_argument("--size", type=int, default=256, help="模板大小 KB（默认 256）")
+    render.add_argument("--repeat", type=int, default=5, help="重复次数（默认 5）")
+    render.set_defaults(func=bench_render)
+
+    copy = subparsers.add_parser("copy", help="模板树复制基准")
+    copy.add_argument("--files", type=int, default=10000, help="文件个数（默认 10000）")
+    copy.add_argument("--size", type=int, default=2048, help="单个文件字节数（默认 2048）")
+    copy.add_argument("--threads", type=int, help="写入线程数（默认见 copy_engine）")
+    copy.add_argument("--dir", help="临时目录所在位置（用于测试特定文件系统）")
+    copy.set_defaults(func=bench_copy)
+
+    frontmatter = subparsers.add_parser("frontmatter", help="frontmatter 解析基准")
+    frontmatter.add_argument("--files", type=int, default=10000, help="文件个数（默认 10000）")
+    frontmatter.add_argument("--body", type=int, default=16, help="正文大小 KB（默认 16）")
+    frontmatter.add_argument("--dir", help="临时目录所在位置")
+    frontmatter.set_defaults(func=bench_frontmatter)
+
+    scan = subparsers.add_parser("scan", help="并行校验扩展性基准")
+    scan.add_argument("--entries", type=int, default=2000, help="技能与规则各自的个数（默认 2000）")
+    scan.add_argument("--body", type=int, default=16, help="正文大小 KB（默认 16）")
+    scan.add_argument("--max-jobs", type=int, help="最大工作线程 / 进程数（默认 CPU 核数）")
+    scan.add_argument("--dir", help="临时目录所在位置（用于测试特定文件系统）")
+    scan.set_defaults(func=bench_scan)
+
+    query = subparsers.add_parser("query", help="查询守护进程延迟基准")
+    query.add_argument("--entries", type=int, default=500, help="技能与规则各自的个数（默认 500）")
+    query.add_argument("--queries", type=int, default=2000, help="每个客户端的查询次数（默认 2000）")
+    query.add_argument("--clients", type=int, default=16, help="并发客户端数（默认 16）")
+    query.set_defaults(func=bench_query)
+
+    startup = subparsers.add_parser("startup", help="冷启动与导入耗时基准")
+    startup.add_argument("--entries", type=int, default=100, help="技能与规则各自的个数（默认 100）")
+    startup.add_argument("--repeat", type=int, default=10, help="重复次数（默认 10）")
+    startup.add_argument("--budget-ms", type=float, default=5.0,
+                         help="specmode.cli 累计导入耗时预算，毫秒（默认 5）")
+    startup.set_defaults(func=bench_startup)
+
+    check = subparsers.add_parser("check", help="索引生成戳检查基准")
+    check.add_argument("--entries", type=int, default=10000, help="技能与规则各自的个数（默认 10000）")
+    check.add_argument("--dir", help="临时目录所在位置（用于测试特定文件系统）")
+    check.set_defaults(func=bench_check)
+
+    report = subparsers.add_parser("report", help="机器可读输出基准")
+    report.add_argument("--entries", type=int, default=10000, help="技能个数（默认 10000）")
+    report.add_argument("--jobs", type=int, default=4, help="并行校验的工作线程数（默认 4）")
+    report.add_argument("--dir", help="临时目录所在位置（用于测试特定文件系统）")
+    report.set_defaults(func=bench_report)
+
+    trigger = subparsers.add_parser("triggers", help="触发词匹配基准")
+    trigger.add_argument("--entries", type=int, default=5000, help="技能个数（默认 5000）")
+    trigger.add_argument("--terms", type=int, default=10, help="每个技能的触发词个数（默认 10）")
+    trigger.add_argument("--prompts", type=int, default=200, help="请求条数（默认 200）")
+    trigger.set_defaults(func=bench_triggers)
+
+    retrieval = subparsers.add_parser("search", help="规则检索基准")
+    retrieval.add_argument("--entries", type=int, default=10000, help="规则个数（默认 10000）")
+    retrieval.add_argument("--queries", type=int, default=200, help="查询条数（默认 200）")
+    retrieval.add_argument("--limit", type=int, default=10, help="每次返回的规则数（默认 10）")
+    retrieval.set_defaults(func=bench_search)
+
+    args = parser.parse_args()
+    if not getattr(args, "func", None):
+        parser.print_help()
+        sys.exit(1)
+    sys.exit(args.func(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+打包 specmode 单文件命令行（zipapp）
+
+把 lib/specmode 与技能脚本（sync_skills / sync_rules / init_skill / init_rule）打包为一个
+可直接执行的 .pyz：一份安装即可通过 --root 服务任意多个项目，无需在每个项目中调用各自的脚本。
+
+用法:
+    python3 build_zipapp.py [--source DIR] [--output FILE] [--no-compile]
+
+参数:
+    --source       模板目录或已初始化的 .comate 目录（默认本工具的 templates/）
+    --output, -o   输出文件（默认 ./specmode.pyz）
+    --no-compile   不预编译字节码（预编译的 .pyc 仅对构建所用的 Python 版本生效，
+                   其他版本自动回退到源码）
+
+运行:
+    ./specmode.pyz --root /path/to/project sync-skills
+    python3 specmode.pyz query match_path src/services/user.go
+"""
+
+import argparse
+import compileall
+import shutil
+import sys
+import tempfile
+import zipapp
+from pathlib import Path
+
+# 打包的技能脚本（相对于 --source），放在归档根目录，可直接导入
+SCRIPTS = [
+    Path("skills") / "skill-creator" / "scripts" / "sync_skills.py",
+    Path("skills") / "skill-creator" / "scripts" / "init_skill.py",
+    Path("skills") / "rules-creator" / "scripts" / "sync_rules.py",
+    Path("skills") / "rules-creator" / "scripts" / "init_rule.py",
+]
+
+INTERPRETER = "/usr/bin/env python3"
+
+# 归档入口（zipapp 自带的 main= 模板会丢弃返回值，退出码需要自己传递）
+MAIN_SOURCE = """import sys
+
+from specmode.cli import main
+
+sys.exit(main())
+"""
+
+
+def stage(source: Path, staging: Path, output: Path, compile_bytecode: bool = True):
+    """把要打包的模块复制到 staging 目录"""
+    shutil.copytree(
+        str(source / "lib" / "specmode"), str(staging / "specmode"),
+        ignore=shutil.ignore_patterns("__pycache__", "*.pyc")
+    )
+    for script in SCRIPTS:
+        shutil.copy2(str(source / script), str(staging / script.name))
+    (staging / "__main__.py").write_text(MAIN_SOURCE, encoding="utf-8")
+    if compile_bytecode:
+        # zipimport 不会把编译结果写回归档，预先放入与源码同目录的 .pyc，避免每次启动都重新编译
+        # ddir 使回溯中显示归档内的路径而不是临时目录
+        compileall.compile_dir(str(staging), quiet=1, legacy=True, ddir=str(output.resolve()))
+
+
+def build(source: Path, output: Path, compile_bytecode: bool = True):
+    """构建 zipapp"""
+    for required in [Path("lib") / "specmode" / "cli.py"] + SCRIPTS:
+        if not (source / required).is_file():
+            raise ValueError(f"源目录缺少 {required}: {source}")
+
+    staging = Path(tempfile.mkdtemp(prefix="specmode-zipapp-"))
+    try:
+        stage(source, staging, output, compile_bytecode)
+        options = {"interpreter": INTERPRETER}
+        if sys.version_info >= (3, 7):
+            options["compressed"] = True
+        output.parent.mkdir(parents=True, exist_ok=True)
+        zipapp.create_archive(str(staging), str(output), **options)
+    finally:
+        shutil.rmtree(str(staging), ignore_errors=True)
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="打包 specmode 单文件命令行（zipapp）",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--source",
+        type=Path,
+        default=Path(__file__).resolve().parent.parent / "templates",
+        help="模板目录或已初始化的 .comate 目录（默认本工具的 templates/）"
+    )
+    parser.add_argument(
+        "--output", "-o",
+        type=Path,
+        default=Path("specmode.pyz"),
+        help="输出文件（默认 ./specmode.pyz）"
+    )
+    parser.add_argument(
+        "--no-compile",
+        action="store_true",
+        help="不预编译字节码"
+    )
+    args = parser.parse_args()
+
+    try:
+        build(args.source.resolve(), args.output, not args.no_compile)
+    except (OSError, ValueError) as e:
+        print(f"❌ 错误：{e}")
+        sys.exit(1)
+    size = args.output.stat().st_size
+    print(f"✅ 已生成 {args.output}（{size / 1024:.0f} KB）")
+
+
+if __name__ == "__main__":
+    main()
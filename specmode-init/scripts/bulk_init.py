@@ -0,0 +1,229 @@
+"""
+批量初始化
+
+一次遍历并编译模板树，再通过进程池把写入分发到多个目标项目，最后输出汇总报告。
+
+目标来源:
+    - 清单文件（.csv / .jsonl）
+        CSV:   表头必须包含 target，可选 name，其余列作为模板变量
+        JSONL: 每行一个对象 {"target": ..., "name": ..., "variables": {...}}，
+               其余顶层键同样作为模板变量
+      相对路径的 target 以清单文件所在目录为基准
+    - 自动发现：扫描根目录下含包标记文件（package.json、pyproject.toml 等）的子目录
+"""
+
+import csv
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from copy_engine import DEFAULT_STRATEGIES, STRATEGY_HARDLINK
+from install_manifest import build_install_manifest, save_install_manifest
+from template_tree import build_variables, infer_project_name, write_tree
+from upgrade import upgrade_tree, upgrade_variables
+
+# 包根目录标记文件
+PACKAGE_MARKERS = (
+    "package.json",
+    "pyproject.toml",
+    "setup.py",
+    "go.mod",
+    "Cargo.toml",
+    "pom.xml",
+    "build.gradle",
+)
+
+# 自动发现时跳过的目录
+SKIP_DIRS = {"node_modules", "vendor", "dist", "build", "target", "__pycache__"}
+
+# 默认批量选项
+DEFAULT_OPTIONS = {
+    "strategies": DEFAULT_STRATEGIES,   # 复制策略
+    "upgrade": False,                   # 已存在 .comate 时增量升级（否则跳过）
+    "force": False,                     # 升级时覆盖用户修改
+    "store": None,                      # 内容寻址共享存储目录
+    "dry_run": False,                   # 只报告将要进行的改动，不写入任何文件
+}
+
+# 工作进程内共享的模板树与批量选项（由进程池初始化函数设置）
+_worker_tree = None
+_worker_options = DEFAULT_OPTIONS
+
+
+def _make_job(base_dir: Path, target: str, name: str = "", variables: dict = None) -> dict:
+    """构造单个初始化任务"""
+    target_dir = Path(target)
+    if not target_dir.is_absolute():
+        target_dir = base_dir / target_dir
+    return {
+        "target": str(target_dir.resolve()),
+        "name": name or "",
+        "variables": {k: str(v) for k, v in (variables or {}).items()},
+    }
+
+
+def load_manifest(manifest_file: Path) -> list:
+    """读取清单文件（.csv / .jsonl），返回任务列表"""
+    base_dir = manifest_file.resolve().parent
+    jobs = []
+
+    if manifest_file.suffix.lower() == ".csv":
+        with manifest_file.open(encoding="utf-8", newline="") as f:
+            reader = csv.DictReader(f)
+            if not reader.fieldnames or "target" not in reader.fieldnames:
+                raise ValueError("CSV 清单缺少 target 列")
+            for row in reader:
+                target = (row.pop("target") or "").strip()
+                if not target:
+                    continue
+                name = (row.pop("name", "") or "").strip()
+                variables = {k: v for k, v in row.items() if k and v}
+                jobs.append(_make_job(base_dir, target, name, variables))
+    else:
+        with manifest_file.open(encoding="utf-8") as f:
+            for lineno, line in enumerate(f, 1):
+                line = line.strip()
+                if not line or line.startswith("#"):
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    raise ValueError(f"第 {lineno} 行不是合法 JSON: {e}")
+                if not isinstance(record, dict) or not record.get("target"):
+                    raise ValueError(f"第 {lineno} 行缺少 target")
+                variables = dict(record.get("variables") or {})
+                for key, value in record.items():
+                    if key not in ("target", "name", "variables"):
+                        variables[key] = value
+                jobs.append(_make_job(base_dir, record["target"], record.get("name", ""), variables))
+
+    return jobs
+
+
+def discover_targets(root: Path, markers: tuple = PACKAGE_MARKERS) -> list:
+    """扫描 root 下含包标记文件的子目录（不含 root 本身），返回任务列表"""
+    root = root.resolve()
+    jobs = []
+
+    for dirpath, dirnames, filenames in os.walk(str(root)):
+        dirnames[:] = sorted(
+            d for d in dirnames if not d.startswith(".") and d not in SKIP_DIRS
+        )
+        if dirpath != str(root) and any(m in filenames for m in markers):
+            jobs.append(_make_job(root, dirpath))
+
+    return jobs
+
+
+def _init_worker(tree: dict, options: dict):
+    """进程池初始化：每个工作进程只接收一次模板树"""
+    global _worker_tree, _worker_options
+    _worker_tree = tree
+    _worker_options = options
+
+
+def init_one(job: dict, tree: dict = None, options: dict = None, threads: int = 1) -> dict:
+    """
+    初始化（或增量升级）单个目标，返回结果（不抛异常）
+
+    进程池中由多进程并行，单个目标内默认串行写入（threads=1）。
+    """
+    tree = tree if tree is not None else _worker_tree
+    options = options or _worker_options
+    start = time.perf_counter()
+    target_dir = Path(job["target"])
+    result = {
+        "target": job["target"],
+        "status": "ok",   # ok/skipped/error
+        "message": "",
+        "files": 0,
+        "seconds": 0.0,
+    }
+
+    try:
+        comate_dir = target_dir / ".comate"
+        if not target_dir.is_dir():
+            result["status"] = "error"
+            result["message"] = "目标目录不存在"
+        elif comate_dir.exists() and options["upgrade"]:
+            variables = upgrade_variables(comate_dir, job["name"], job["variables"],
+                                          tree.get("variables"))
+            upgraded = upgrade_tree(tree, comate_dir, variables, force=options["force"],
+                                    dry_run=options["dry_run"], store=options["store"],
+                                    hardlink=STRATEGY_HARDLINK in options["strategies"])
+            actions = upgraded["actions"]
+            result["files"] = len(actions["added"]) + len(actions["updated"]) + len(actions["forced"])
+            if upgraded["errors"]:
+                result["status"] = "error"
+                result["message"] = "渲染模板失败: " + "; ".join(upgraded["errors"])
+            else:
+                result["message"] = ", ".join(
+                    f"{action} {len(paths)}" for action, paths in actions.items()
+                    if paths and action != "unchanged"
+                ) or "无变化"
+        elif comate_dir.exists():
+            result["status"] = "skipped"
+            result["message"] = ".comate 已存在"
+        elif options["dry_run"]:
+            result["files"] = len(tree["files"])
+            result["message"] = "预览：将新建 .comate"
+        else:
+            project_name = job["name"] or infer_project_name(target_dir)
+            variables = build_variables(project_name, job["variables"], tree.get("variables"))
+            stats = write_tree(tree, comate_dir, variables, options["strategies"], threads,
+                               options["store"])
+            save_install_manifest(comate_dir, build_install_manifest(comate_dir, variables, stats["hashes"]))
+            result["files"] = len(stats["rendered"]) + len(stats["copied"])
+            if stats["errors"]:
+                result["status"] = "error"
+                result["message"] = "渲染模板失败: " + "; ".join(stats["errors"])
+            elif stats["unbound"]:
+                result["message"] = "未绑定变量: " + "; ".join(stats["unbound"])
+    except Exception as e:
+        result["status"] = "error"
+        result["message"] = str(e)
+
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def run_bulk(tree: dict, jobs: list, workers: int = None, options: dict = None) -> list:
+    """通过进程池批量初始化，结果顺序与任务顺序一致"""
+    options = dict(DEFAULT_OPTIONS, **(options or {}))
+    if workers == 1 or len(jobs) <= 1:
+        return [init_one(job, tree, options, threads=None) for job in jobs]
+
+    if sys.version_info >= (3, 7):
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(tree, options)) as executor:
+            return list(executor.map(init_one, jobs, chunksize=8))
+
+    # Python 3.6 不支持 initializer，随任务传递模板树
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(init_one, jobs, [tree] * len(jobs),
+                                 [options] * len(jobs), chunksize=8))
+
+
+def print_bulk_report(results: list, elapsed: float, dry_run: bool = False):
+    """打印批量初始化汇总报告"""
+    icons = {"ok": "✅", "skipped": "⏭️ ", "error": "❌"}
+    counts = {"ok": 0, "skipped": 0, "error": 0}
+
+    print()
+    for r in results:
+        counts[r["status"]] += 1
+        line = f"{icons[r['status']]} {r['target']}  ({r['seconds'] * 1000:.1f} ms, {r['files']} 个文件)"
+        if r["message"]:
+            line += f" - {r['message']}"
+        print(line)
+
+    total_files = sum(r["files"] for r in results)
+    print()
+    print("=" * 60)
+    print(f"📊 批量初始化: {len(results)} 个目标, {counts['ok']} 成功, "
+          f"{counts['skipped']} 跳过, {counts['error']} 失败")
+    print(f"   {'将写入' if dry_run else '写入'}文件 {total_files} 个, 总耗时 {elapsed:.2f} s")
+    print("=" * 60)
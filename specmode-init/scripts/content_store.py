@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+内容寻址共享存储（可选）
+
+相同内容的模板文件在存储中只保存一份（按 SHA-256 寻址），
+各项目的 .comate 通过 reflink 或硬链接引用存储中的对象，
+磁盘占用与初始化耗时随「唯一内容」增长，而不是随项目数增长。
+
+存储布局:
+    STORE/objects/<sha256 前 2 位>/<sha256 其余部分>
+
+引用方式（按优先级）:
+    store-reflink   与存储对象共享数据块，本地编辑时由文件系统写时复制，互不影响
+    store-hardlink  仅在显式开启（--hardlink）时使用：硬链接到只读对象，编辑前需先 detach 断开链接；
+                    root 或修改权限后原地写入的编辑器会直接写穿共享对象（影响所有项目），只有 verify 能事后发现
+    copy            不支持 reflink（且未开启硬链接）时退化为普通复制，存储只用于去重读取
+
+用法:
+    python3 content_store.py verify --store DIR       # 校验对象内容未被写穿
+    python3 content_store.py gc --store DIR           # 删除不再被任何项目引用的对象
+    python3 content_store.py detach PATH [PATH ...]   # 将硬链接替换为可写的私有副本
+"""
+
+import argparse
+import hashlib
+import os
+import shutil
+import stat
+import sys
+import threading
+from pathlib import Path
+
+from copy_engine import STRATEGY_HARDLINK, STRATEGY_REFLINK, try_strategy
+
+STORE_REFLINK = "store-reflink"
+STORE_HARDLINK = "store-hardlink"
+STORE_COPY = "copy"
+
+
+def object_path(store_dir: Path, sha256: str) -> Path:
+    """返回对象在存储中的路径"""
+    return store_dir / "objects" / sha256[:2] / sha256[2:]
+
+
+def object_mode(mode: int) -> int:
+    """存储对象的权限位：只读，保留可执行位"""
+    return 0o444 | (mode & 0o111)
+
+
+def ensure_object(store_dir: Path, sha256: str, data: bytes, mode: int = 0o644) -> Path:
+    """确保对象存在于存储中（不存在时原子写入），返回对象路径"""
+    obj = object_path(store_dir, sha256)
+    if obj.exists():
+        return obj
+    obj.parent.mkdir(parents=True, exist_ok=True)
+    tmp = obj.with_name(f"{obj.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(str(tmp), "wb") as f:
+        f.write(data)
+    os.chmod(str(tmp), object_mode(mode))
+    os.replace(str(tmp), str(obj))
+    return obj
+
+
+def link_object(obj: Path, dst: Path, mode: int = 0o644, hardlink: bool = False) -> str:
+    """
+    让 dst 引用存储对象（先写临时名再原子替换），返回引用方式
+
+    reflink 得到的是独立 inode，恢复为正常可写权限；不支持 reflink 时复制，
+    hardlink=True 时才改用与对象共享只读权限的硬链接（本地编辑可能写穿对象）。
+    """
+    tmp = dst.with_name(f".{dst.name}.specmode-tmp")
+    if os.path.lexists(str(tmp)):
+        os.unlink(str(tmp))
+
+    if try_strategy(str(obj), str(tmp), STRATEGY_REFLINK):
+        os.chmod(str(tmp), mode)
+        method = STORE_REFLINK
+    elif hardlink and try_strategy(str(obj), str(tmp), STRATEGY_HARDLINK):
+        # 失败的 reflink 留下的空文件会被硬链接前删除
+        method = STORE_HARDLINK
+    else:
+        shutil.copyfile(str(obj), str(tmp))
+        os.chmod(str(tmp), mode)
+        method = STORE_COPY
+
+    os.replace(str(tmp), str(dst))
+    return method
+
+
+def store_file(store_dir: Path, data: bytes, dst: Path, mode: int = 0o644, sha256: str = None,
+               hardlink: bool = False) -> str:
+    """把内容放入存储并在 dst 处引用，返回引用方式（hardlink 见 link_object）"""
+    sha256 = sha256 or hashlib.sha256(data).hexdigest()
+    obj = ensure_object(store_dir, sha256, data, mode)
+    return link_object(obj, dst, mode, hardlink)
+
+
+def detach(path: Path) -> bool:
+    """将指向存储对象的硬链接替换为可写的私有副本，返回是否做了替换"""
+    st = os.lstat(str(path))
+    if not stat.S_ISREG(st.st_mode) or st.st_nlink <= 1:
+        return False
+    tmp = path.with_name(f".{path.name}.specmode-tmp")
+    shutil.copyfile(str(path), str(tmp))
+    os.chmod(str(tmp), (st.st_mode & 0o777) | 0o200)
+    os.replace(str(tmp), str(path))
+    return True
+
+
+def iter_objects(store_dir: Path):
+    """遍历存储中的所有对象，产出 (sha256, 路径)"""
+    objects_dir = store_dir / "objects"
+    if not objects_dir.is_dir():
+        return
+    for prefix in sorted(os.listdir(str(objects_dir))):
+        prefix_dir = objects_dir / prefix
+        if len(prefix) != 2 or not prefix_dir.is_dir():
+            continue
+        for name in sorted(os.listdir(str(prefix_dir))):
+            if not name.endswith(".tmp"):
+                yield prefix + name, prefix_dir / name
+
+
+def verify_store(store_dir: Path) -> list:
+    """校验所有对象内容与其哈希一致，返回损坏（被写穿）的对象"""
+    corrupted = []
+    for sha256, obj in iter_objects(store_dir):
+        digest = hashlib.sha256()
+        with open(str(obj), "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        if digest.hexdigest() != sha256:
+            corrupted.append(str(obj))
+    return corrupted
+
+
+def gc_store(store_dir: Path) -> list:
+    """删除没有任何硬链接引用的对象（reflink 引用不占用对象，可安全删除）"""
+    removed = []
+    for _, obj in iter_objects(store_dir):
+        if os.stat(str(obj)).st_nlink <= 1:
+            os.unlink(str(obj))
+            removed.append(str(obj))
+    return removed
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="内容寻址共享存储维护",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    for name, help_text in (("verify", "校验对象完整性"), ("gc", "清理未引用对象")):
+        sub = subparsers.add_parser(name, help=help_text)
+        sub.add_argument("--store", required=True, help="存储目录")
+    detach_parser = subparsers.add_parser("detach", help="断开硬链接，生成可写副本")
+    detach_parser.add_argument("paths", nargs="+", help="文件或目录")
+
+    args = parser.parse_args()
+
+    if args.command == "verify":
+        corrupted = verify_store(Path(args.store))
+        for obj in corrupted:
+            print(f"❌ 对象内容与哈希不一致: {obj}")
+        if corrupted:
+            sys.exit(1)
+        print("✅ 存储对象校验通过")
+    elif args.command == "gc":
+        removed = gc_store(Path(args.store))
+        print(f"🧹 已删除 {len(removed)} 个未引用对象")
+    elif args.command == "detach":
+        count = 0
+        for raw in args.paths:
+            path = Path(raw)
+            files = [p for p in path.rglob("*") if p.is_file()] if path.is_dir() else [path]
+            count += sum(1 for f in files if detach(f))
+        print(f"✅ 已断开 {count} 个硬链接")
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
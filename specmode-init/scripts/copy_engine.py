@@ -0,0 +1,209 @@
+"""
+文件复制引擎
+
+- 一次性计算并创建目标目录集合
+- 按策略优先级复制：reflink → copy_file_range → 普通复制（可选 hardlink）
+- 某策略在某对文件系统上不受支持时记住结果，后续文件直接跳过该策略
+- 通过有界线程池并发写入，返回每个文件实际使用的策略
+"""
+
+import errno
+import os
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Linux ioctl: FICLONE（btrfs / xfs / overlayfs 等支持 reflink 的文件系统）
+FICLONE = 0x40049409
+
+STRATEGY_HARDLINK = "hardlink"
+STRATEGY_REFLINK = "reflink"
+STRATEGY_COPY_FILE_RANGE = "copy_file_range"
+STRATEGY_COPY = "copy"
+
+# 默认策略优先级（hardlink 与模板共享 inode，需显式开启）
+DEFAULT_STRATEGIES = (STRATEGY_REFLINK, STRATEGY_COPY_FILE_RANGE, STRATEGY_COPY)
+
+# 默认写入线程数
+DEFAULT_WRITE_THREADS = min(8, (os.cpu_count() or 1) * 2)
+
+# 表示「该文件系统不支持此操作」的错误码
+_UNSUPPORTED_ERRNOS = {
+    errno.EOPNOTSUPP,
+    getattr(errno, "ENOTSUP", errno.EOPNOTSUPP),
+    errno.EXDEV,
+    errno.EINVAL,
+    errno.ENOSYS,
+    errno.ENOTTY,
+    errno.EMLINK,
+}
+
+# reflink / hardlink 的探测另外把 EPERM 视为不支持（如 vfat 不支持硬链接、
+# protected_hardlinks）；其余策略的 EPERM 是真正的权限错误，照常抛出
+_PROBE_ERRNOS = _UNSUPPORTED_ERRNOS | {errno.EPERM}
+
+# 不受支持的 (策略, 源设备, 目标设备)
+_unsupported = set()
+_unsupported_lock = threading.Lock()
+
+# 目录 -> 设备号（避免每个文件重复 stat 目录）
+_dir_devices = {}
+
+
+def _reflink(src: str, dst: str):
+    """通过 FICLONE 共享数据块（写时复制）"""
+    if fcntl is None:
+        raise OSError(errno.ENOSYS, "fcntl 不可用")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+
+
+def _copy_file_range(src: str, dst: str):
+    """通过 copy_file_range 在内核中复制（Python 3.8+ / Linux）"""
+    if not hasattr(os, "copy_file_range"):
+        raise OSError(errno.ENOSYS, "copy_file_range 不可用")
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        remaining = os.fstat(fsrc.fileno()).st_size
+        while remaining > 0:
+            copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+            if copied == 0:
+                # 部分文件系统（FUSE、procfs 类文件、某些内核的跨文件系统复制）返回 0 而不报错：
+                # 视为不支持，由下一个策略重新完整复制，避免目标被截断
+                raise OSError(errno.EINVAL, "copy_file_range 未复制任何数据")
+            remaining -= copied
+
+
+def _hardlink(src: str, dst: str):
+    """创建硬链接（目标已存在时先删除）"""
+    if os.path.lexists(dst):
+        os.unlink(dst)
+    os.link(src, dst)
+
+
+# 把 EPERM 视为不支持的探测型策略
+_PROBE_STRATEGIES = {STRATEGY_HARDLINK, STRATEGY_REFLINK}
+
+_STRATEGY_FUNCS = {
+    STRATEGY_HARDLINK: _hardlink,
+    STRATEGY_REFLINK: _reflink,
+    STRATEGY_COPY_FILE_RANGE: _copy_file_range,
+}
+
+
+def _device_of(path: str) -> int:
+    """返回文件所在目录的设备号（按目录缓存）"""
+    directory = os.path.dirname(path) or "."
+    device = _dir_devices.get(directory)
+    if device is None:
+        device = os.stat(directory).st_dev
+        _dir_devices[directory] = device
+    return device
+
+
+def try_strategy(src: str, dst: str, strategy: str) -> bool:
+    """
+    尝试用指定策略复制单个文件
+
+    成功返回 True；该文件系统不支持时记住结果并返回 False；其他错误照常抛出。
+    """
+    func = _STRATEGY_FUNCS[strategy]
+    key = (strategy, _device_of(src), _device_of(dst))
+    if key in _unsupported:
+        return False
+    try:
+        func(src, dst)
+    except OSError as e:
+        if e.errno not in (_PROBE_ERRNOS if strategy in _PROBE_STRATEGIES else _UNSUPPORTED_ERRNOS):
+            raise
+        with _unsupported_lock:
+            _unsupported.add(key)
+        return False
+    return True
+
+
+def copy_file(src: str, dst: str, strategies: tuple = DEFAULT_STRATEGIES) -> str:
+    """
+    按策略优先级复制单个文件，返回实际使用的策略
+
+    除 hardlink 外均会复制权限位和时间戳（与 shutil.copy2 一致）。
+    """
+    for strategy in strategies:
+        if strategy not in _STRATEGY_FUNCS:
+            break
+        if try_strategy(src, dst, strategy):
+            if strategy != STRATEGY_HARDLINK:
+                shutil.copystat(src, dst)
+            return strategy
+
+    shutil.copy2(src, dst)
+    return STRATEGY_COPY
+
+
+def plan_dirs(paths) -> list:
+    """计算一组目标文件所需的全部目录（父目录在前）"""
+    dirs = set()
+    for path in paths:
+        parent = os.path.dirname(str(path))
+        while parent and parent not in dirs:
+            dirs.add(parent)
+            parent = os.path.dirname(parent)
+    return sorted(dirs, key=lambda d: (d.count(os.sep), d))
+
+
+def make_dirs(dirs):
+    """按顺序创建目录（父目录须排在子目录之前）"""
+    for d in dirs:
+        try:
+            os.mkdir(str(d))
+        except FileExistsError:
+            pass
+        except FileNotFoundError:
+            os.makedirs(str(d), exist_ok=True)
+
+
+def run_writes(tasks: list, threads: int = None) -> list:
+    """
+    在有界线程池中执行写入任务（无参可调用对象），结果顺序与任务顺序一致
+
+    threads=1 时串行执行。
+    """
+    threads = threads or DEFAULT_WRITE_THREADS
+    if threads <= 1 or len(tasks) <= 1:
+        return [task() for task in tasks]
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        futures = [executor.submit(task) for task in tasks]
+        return [future.result() for future in futures]
+
+
+def copy_files(pairs: list, strategies: tuple = DEFAULT_STRATEGIES, threads: int = None) -> list:
+    """
+    批量复制 [(源, 目标), ...]：先一次性创建目录，再并发复制
+
+    返回每个文件使用的策略（与 pairs 顺序一致）
+    """
+    make_dirs(plan_dirs(dst for _, dst in pairs))
+    tasks = [
+        (lambda src=str(src), dst=str(dst): copy_file(src, dst, strategies))
+        for src, dst in pairs
+    ]
+    return run_writes(tasks, threads)
+
+
+def strategy_counts(strategies: dict) -> dict:
+    """统计各策略使用次数: {策略: 文件数}"""
+    counts = {}
+    for strategy in strategies.values():
+        counts[strategy] = counts.get(strategy, 0) + 1
+    return counts
+
+
+def reset_capabilities():
+    """清空已记录的不受支持策略（测试或文件系统变化时使用）"""
+    with _unsupported_lock:
+        _unsupported.clear()
+        _dir_devices.clear()
@@ -0,0 +1,185 @@
+"""
+git 模板源
+
+直接从本地 git 对象库读取指定提交中的模板目录，无需检出：
+
+- 解析提交（git rev-parse）并列出模板目录（git ls-tree）各一次
+- 文件内容通过常驻的 git cat-file --batch 管道读取，不为每个文件启动子进程
+- 构造与 load_template_tree 结构一致的模板树，init / upgrade / 归档输出均可直接使用
+
+模板树额外带有 "git" 字段 {"repo", "commit"}，文件条目额外带有 object / mode / size。
+"""
+
+import os
+import subprocess
+import threading
+from pathlib import Path
+
+from template_engine import compile_template
+from template_tree import STREAM_THRESHOLD, TEMPLATE_SUFFIX, VARS_FILE, parse_layer_variables
+
+# 模板目录在仓库中的默认路径
+DEFAULT_TEMPLATES_PATH = "specmode-init/templates"
+
+# git 文件模式 → 权限位
+_GIT_MODES = {"100644": 0o644, "100755": 0o755}
+
+# (进程号, 仓库) -> (cat-file 进程, 锁)；按进程号区分，fork 出的子进程不复用父进程的管道
+_batches = {}
+_batches_lock = threading.Lock()
+
+
+def _git(repo: str, *args) -> bytes:
+    """执行一次 git 命令，返回标准输出"""
+    result = subprocess.run(
+        ["git", "-C", repo] + list(args),
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+    )
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip()
+        raise ValueError(message or f"git {args[0]} 失败")
+    return result.stdout
+
+
+def find_repo(path: Path) -> str:
+    """返回 path 所在 git 仓库的根目录"""
+    return _git(str(path), "rev-parse", "--show-toplevel").decode("utf-8").strip()
+
+
+def resolve_commit(repo: str, rev: str) -> str:
+    """将任意 commit-ish 解析为完整提交哈希"""
+    try:
+        if rev.startswith("-"):
+            raise ValueError(rev)
+        return _git(repo, "rev-parse", "--verify", "--quiet", rev + "^{commit}").decode("ascii").strip()
+    except ValueError:
+        raise ValueError(f"无效的提交: {rev}")
+
+
+def _batch(repo: str) -> tuple:
+    """返回（必要时启动）当前进程的 git cat-file --batch 进程"""
+    key = (os.getpid(), repo)
+    with _batches_lock:
+        batch = _batches.get(key)
+        if batch is None or batch[0].poll() is not None:
+            proc = subprocess.Popen(
+                ["git", "-C", repo, "cat-file", "--batch"],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+            )
+            batch = (proc, threading.Lock())
+            _batches[key] = batch
+    return batch
+
+
+def _read_response(proc, name: str) -> bytes:
+    """读取 cat-file --batch 对单个对象的应答"""
+    header = proc.stdout.readline()
+    if not header:
+        raise ValueError("git cat-file 进程意外退出")
+    parts = header.split()
+    if len(parts) != 3:
+        raise ValueError(f"git 对象不存在: {name}")
+    size = int(parts[2])
+    data = proc.stdout.read(size)
+    proc.stdout.read(1)  # 结尾的换行符
+    if len(data) != size:
+        raise ValueError(f"git 对象读取不完整: {name}")
+    return data
+
+
+def read_blobs(repo: str, objects: list) -> list:
+    """通过常驻管道批量读取对象内容（请求由后台线程写入，避免管道缓冲区互相阻塞）"""
+    if not objects:
+        return []
+    proc, lock = _batch(repo)
+    with lock:
+        request = "".join(name + "\n" for name in objects).encode("ascii")
+
+        def feed():
+            proc.stdin.write(request)
+            proc.stdin.flush()
+
+        writer = threading.Thread(target=feed)
+        writer.start()
+        try:
+            return [_read_response(proc, name) for name in objects]
+        finally:
+            writer.join()
+
+
+def read_blob(repo: str, name: str) -> bytes:
+    """读取单个对象内容"""
+    proc, lock = _batch(repo)
+    with lock:
+        proc.stdin.write(name.encode("ascii") + b"\n")
+        proc.stdin.flush()
+        return _read_response(proc, name)
+
+
+def close_batches():
+    """关闭当前进程启动的所有 cat-file 进程"""
+    with _batches_lock:
+        for key in [key for key in _batches if key[0] == os.getpid()]:
+            proc, _ = _batches.pop(key)
+            proc.stdin.close()
+            proc.wait()
+
+
+def load_git_tree(repo: str, rev: str, templates_path: str = DEFAULT_TEMPLATES_PATH) -> dict:
+    """从 git 提交中的模板目录构造模板树（与 load_template_tree 结构一致）"""
+    repo = str(Path(repo).resolve())
+    commit = resolve_commit(repo, rev)
+    templates_path = templates_path.strip("/")
+    listing = _git(repo, "ls-tree", "-r", "-t", "-l", "-z", f"{commit}:{templates_path}")
+
+    tree = {
+        "root": f"{commit}:{templates_path}",
+        "git": {"repo": repo, "commit": commit},
+        "variables": {},
+        "dirs": [],
+        "files": [],
+    }
+    for record in listing.split(b"\0"):
+        if not record:
+            continue
+        meta, rel_path = record.split(b"\t", 1)
+        mode, kind, obj, size = meta.decode("ascii").split()
+        rel_path = rel_path.decode("utf-8")
+        if kind == "tree":
+            tree["dirs"].append(rel_path)
+            continue
+        if kind != "blob" or mode not in _GIT_MODES:
+            # 子模块、符号链接不属于模板内容
+            continue
+        if rel_path == VARS_FILE:
+            tree["variables"] = parse_layer_variables(read_blob(repo, obj), f"{commit}:{VARS_FILE}")
+            continue
+        tree["files"].append({
+            "path": rel_path,
+            "source": None,
+            "template": rel_path.endswith(TEMPLATE_SUFFIX),
+            "compiled": None,
+            "stream": False,
+            "error": None,
+            "object": obj,
+            "mode": _GIT_MODES[mode],
+            "size": int(size),
+        })
+
+    # 与目录遍历（os.walk，先文件后子目录）的顺序保持一致
+    tree["dirs"].sort(key=lambda d: d.split("/"))
+    tree["files"].sort(key=lambda entry: (entry["path"].split("/")[:-1], entry["path"]))
+
+    for entry in tree["files"]:
+        if entry["template"] and entry["size"] > STREAM_THRESHOLD:
+            entry["stream"] = True
+    templates = [entry for entry in tree["files"] if entry["template"] and not entry["stream"]]
+    for entry, data in zip(templates, read_blobs(repo, [entry["object"] for entry in templates])):
+        try:
+            entry["compiled"] = compile_template(data.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n"))
+        except Exception as e:
+            entry["error"] = str(e)
+
+    return tree
@@ -8,22 +8,50 @@ Spec Mode 框架初始化脚本
 
 用法:
     python3 init_specmode.py [--name PROJECT_NAME] [--target TARGET_DIR]
+    python3 init_specmode.py --manifest TARGETS.csv|TARGETS.jsonl [--jobs N]
+    python3 init_specmode.py --discover MONOREPO_ROOT [--jobs N]
 
 参数:
     --name      项目名称，用于填充模板（默认从目录名推断）
     --target    目标目录（默认当前目录）
+    --manifest  批量模式：目标清单（CSV 需含 target 列，可选 name 列，其余列为模板变量）
+    --discover  批量模式：自动发现根目录下的包目录（含 package.json、pyproject.toml 等）
+    --jobs      批量模式的工作进程数（默认 CPU 核数）
+    --pack      从模板包读取模板（python3 template_pack.py build 生成）
+    --git-rev   从 git 提交读取模板（任意 commit-ish，无需检出）
+    --git-repo  --git-rev 使用的 git 仓库（默认脚本所在仓库）
+    --overlay   模板覆盖层目录，可重复指定，按顺序叠加在基础模板之上（后者优先）
+    --var       模板变量 KEY=VALUE，可重复指定（覆盖各层 .specmode-vars.json 中的默认值）
+    --upgrade   增量升级已有的 .comate 目录（只写入内容变化的文件，保留用户修改）
+    --force     升级时覆盖用户修改过的文件
+    --dry-run   升级时只报告改动，不写入
+    --hardlink  非模板文件优先使用硬链接（默认依次尝试 reflink、copy_file_range、普通复制）
+    --store     内容寻址共享存储目录（相同内容只存一份，各项目通过 reflink/硬链接引用）
+    --output-archive
+                将 .comate 渲染为确定性 tar 归档（- 表示标准输出），不写入目标目录
 
 示例:
     python3 init_specmode.py
     python3 init_specmode.py --name "MyProject"
     python3 init_specmode.py --target /path/to/project
+    python3 init_specmode.py --manifest targets.jsonl --jobs 8
+    python3 init_specmode.py --discover /path/to/monorepo
+    python3 init_specmode.py --target /path/to/project --upgrade
+    python3 init_specmode.py --target /path/to/project --upgrade --git-rev v1.2.0
+    python3 init_specmode.py --overlay ~/org-templates --overlay ./team-templates --var owner=infra
+    python3 init_specmode.py --name "MyProject" --output-archive - | docker import - specmode
 """
 
 import argparse
 import os
-import shutil
 import sys
+import time
 from pathlib import Path
+from typing import Optional
+
+from copy_engine import STRATEGY_HARDLINK, DEFAULT_STRATEGIES, strategy_counts
+from install_manifest import build_install_manifest, save_install_manifest
+from template_tree import build_variables, infer_project_name, load_template_tree, write_tree
 
 
 def get_script_dir() -> Path:
@@ -36,14 +64,6 @@ def get_templates_dir() -> Path:
     return get_script_dir().parent / "templates"
 
 
-def render_template(content: str, variables: dict) -> str:
-    """渲染模板，替换 {{variable}} 占位符"""
-    result = content
-    for key, value in variables.items():
-        result = result.replace(f"{{{{{key}}}}}", value)
-    return result
-
-
 def copy_templates(templates_dir: Path, target_comate_dir: Path, variables: dict) -> dict:
     """
     递归复制模板目录到目标目录
@@ -53,53 +73,68 @@ def copy_templates(templates_dir: Path, target_comate_dir: Path, variables: dict
     
     返回复制统计信息
     """
-    stats = {
-        "rendered": [],   # 渲染的模板文件
-        "copied": [],     # 直接复制的文件
-        "dirs": []        # 创建的目录
-    }
+    return write_tree(load_template_tree(templates_dir), target_comate_dir, variables)
+
+
+def load_source_tree(source: dict = None) -> Optional[dict]:
+    """
+    加载模板树
     
-    for item in templates_dir.rglob("*"):
-        # 计算相对路径
-        rel_path = item.relative_to(templates_dir)
-        target_path = target_comate_dir / rel_path
-        
-        if item.is_dir():
-            target_path.mkdir(parents=True, exist_ok=True)
-            stats["dirs"].append(str(rel_path))
-        elif item.is_file():
-            # 确保父目录存在
-            target_path.parent.mkdir(parents=True, exist_ok=True)
-            
-            if item.suffix == ".tmpl":
-                # 渲染模板文件
-                try:
-                    content = item.read_text(encoding="utf-8")
-                    rendered_content = render_template(content, variables)
-                    # 去掉 .tmpl 后缀
-                    final_path = target_path.with_suffix("")
-                    final_path.write_text(rendered_content, encoding="utf-8")
-                    stats["rendered"].append(str(rel_path) + " → " + str(final_path.relative_to(target_comate_dir)))
-                except Exception as e:
-                    print(f"⚠️  渲染模板失败 {rel_path}: {e}")
-            else:
-                # 直接复制文件
-                shutil.copy2(item, target_path)
-                stats["copied"].append(str(rel_path))
+    source 为 {"pack": 模板包, "git_rev": 提交, "git_repo": 仓库, "overlays": [覆盖层目录, ...]}
+    （均可省略）：指定模板包时从模板包 mmap 读取，指定提交时从 git 对象库读取，否则遍历模板目录；
+    再按顺序叠加覆盖层
+    """
+    source = source or {}
+    tree = _load_base_tree(source)
+    if tree is None or not source.get("overlays"):
+        return tree
     
-    return stats
+    from template_layers import load_layered_tree
+    try:
+        return load_layered_tree(tree, source["overlays"])
+    except (OSError, ValueError) as e:
+        print(f"❌ 错误：无法加载模板覆盖层: {e}")
+        return None
 
 
-def init_specmode(target_dir: Path, project_name: str) -> bool:
-    """初始化 Spec Mode 框架"""
-    comate_dir = target_dir / ".comate"
-    templates_dir = get_templates_dir()
+def _load_base_tree(source: dict) -> Optional[dict]:
+    """加载基础模板树（模板包 / git 提交 / 模板目录）"""
+    if source.get("pack"):
+        from template_pack import load_pack_tree
+        pack_file = source["pack"]
+        try:
+            return load_pack_tree(pack_file)
+        except (OSError, ValueError) as e:
+            print(f"❌ 错误：无法读取模板包 {pack_file}: {e}")
+            return None
+    
+    if source.get("git_rev"):
+        from git_source import DEFAULT_TEMPLATES_PATH, find_repo, load_git_tree
+        rev = source["git_rev"]
+        try:
+            if source.get("git_repo"):
+                repo, templates_path = str(source["git_repo"]), DEFAULT_TEMPLATES_PATH
+            else:
+                repo = find_repo(get_script_dir())
+                templates_path = os.path.relpath(str(get_templates_dir().resolve()), repo)
+            return load_git_tree(repo, rev, templates_path.replace(os.sep, "/"))
+        except (OSError, ValueError) as e:
+            print(f"❌ 错误：无法从 git 读取模板 {rev}: {e}")
+            return None
     
-    # 检查模板目录是否存在
+    templates_dir = get_templates_dir()
     if not templates_dir.exists():
         print(f"❌ 错误：模板目录不存在: {templates_dir}")
         print("   请确保从完整的 specmode-init 技能目录运行此脚本")
-        return False
+        return None
+    return load_template_tree(templates_dir)
+
+
+def init_specmode(target_dir: Path, project_name: str, source: dict = None,
+                  strategies: tuple = DEFAULT_STRATEGIES, store: Path = None,
+                  extra: dict = None) -> bool:
+    """初始化 Spec Mode 框架"""
+    comate_dir = target_dir / ".comate"
     
     # 检查是否已存在 .comate 目录
     if comate_dir.exists():
@@ -109,6 +144,8 @@ def init_specmode(target_dir: Path, project_name: str) -> bool:
         print(f"   1. 备份: cp -r {comate_dir} {comate_dir}.backup")
         print(f"   2. 清空: rm -rf {comate_dir}")
         print(f"   3. 重新执行此脚本")
+        print()
+        print(f"或使用 --upgrade 按当前模板增量升级（不覆盖用户修改过的文件）")
         return False
     
     print(f"🚀 初始化 Spec Mode 框架...")
@@ -116,14 +153,15 @@ def init_specmode(target_dir: Path, project_name: str) -> bool:
     print(f"   项目名称: {project_name}")
     print()
     
-    # 准备模板变量
-    variables = {
-        "project_name": project_name,
-        "project_description": "（请填写项目描述）",
-    }
     # 复制模板
     print("📁 创建目录结构并复制文件...")
-    stats = copy_templates(templates_dir, comate_dir, variables)
+    tree = load_source_tree(source)
+    if tree is None:
+        return False
+    # 准备模板变量（模板层默认值 < 项目名称 < --var）
+    variables = build_variables(project_name, extra, tree.get("variables"))
+    stats = write_tree(tree, comate_dir, variables, strategies, store=store)
+    save_install_manifest(comate_dir, build_install_manifest(comate_dir, variables, stats["hashes"]))
     
     if stats["rendered"]:
         print(f"\n📄 渲染模板文件 ({len(stats['rendered'])} 个):")
@@ -133,9 +171,24 @@ def init_specmode(target_dir: Path, project_name: str) -> bool:
     if stats["copied"]:
         print(f"\n📋 复制文件 ({len(stats['copied'])} 个):")
         for f in stats["copied"][:10]:  # 最多显示10个
-            print(f"   ✅ {f}")
+            print(f"   ✅ {f} ({stats['strategies'][f]})")
         if len(stats["copied"]) > 10:
             print(f"   ... 及其他 {len(stats['copied']) - 10} 个文件")
+        counts = strategy_counts({f: stats["strategies"][f] for f in stats["copied"]})
+        print("   写入方式: " + ", ".join(f"{k} {v} 个" for k, v in sorted(counts.items())))
+    
+    if stats["unbound"]:
+        print(f"\n⚠️  未绑定的模板变量 ({len(stats['unbound'])} 个文件):")
+        for f in stats["unbound"]:
+            print(f"   ⚠️  {f}")
+    
+    if stats["errors"]:
+        print(f"\n❌ 渲染模板失败 ({len(stats['errors'])} 个，未写出对应文件):")
+        for f in stats["errors"]:
+            print(f"   ❌ {f}")
+        print()
+        print("修复上述模板后删除 .comate 重新初始化，或使用 --upgrade 补齐缺失文件")
+        return False
     
     print()
     print("=" * 60)
@@ -169,6 +222,86 @@ def init_specmode(target_dir: Path, project_name: str) -> bool:
     return True
 
 
+def upgrade_specmode(target_dir: Path, project_name: str = None, source: dict = None,
+                     force: bool = False, dry_run: bool = False, store: Path = None,
+                     extra: dict = None, hardlink: bool = False) -> bool:
+    """按当前模板增量升级已有的 .comate 目录"""
+    from upgrade import print_upgrade_report, upgrade_tree, upgrade_variables
+    
+    comate_dir = target_dir / ".comate"
+    if not comate_dir.is_dir():
+        print(f"❌ 错误：目录不存在: {comate_dir}")
+        print("   请先不带 --upgrade 运行此脚本完成初始化")
+        return False
+    
+    tree = load_source_tree(source)
+    if tree is None:
+        return False
+    
+    variables = upgrade_variables(comate_dir, project_name, extra, tree.get("variables"))
+    print(f"🔄 升级 Spec Mode 框架...")
+    print(f"   目标目录: {target_dir}")
+    print(f"   项目名称: {variables.get('project_name', '')}")
+    
+    result = upgrade_tree(tree, comate_dir, variables, force=force, dry_run=dry_run, store=store,
+                          hardlink=hardlink)
+    print_upgrade_report(result, dry_run)
+    return not result["errors"]
+
+
+def export_archive(target_dir: Path, project_name: str, output: str, source: dict = None,
+                   extra: dict = None) -> bool:
+    """将初始化结果渲染为确定性 tar 流（output 为 - 时写到标准输出），不写入目标目录"""
+    from contextlib import redirect_stdout
+
+    from archive_output import write_archive
+    
+    # 标准输出可能被归档占用：加载模板时的诊断信息同样写到标准错误
+    with redirect_stdout(sys.stderr):
+        tree = load_source_tree(source)
+    if tree is None:
+        return False
+    
+    variables = build_variables(project_name, extra, tree.get("variables"))
+    if output == "-":
+        stats = write_archive(tree, variables, sys.stdout.buffer)
+        sys.stdout.buffer.flush()
+    else:
+        try:
+            with open(output, "wb") as f:
+                stats = write_archive(tree, variables, f)
+        except OSError as e:
+            print(f"❌ 错误：无法写入归档 {output}: {e}", file=sys.stderr)
+            return False
+    
+    print(f"📦 已输出 tar 归档: {stats['files']} 个文件, {stats['dirs']} 个目录, "
+          f"{stats['bytes']} 字节", file=sys.stderr)
+    for f in stats["errors"]:
+        print(f"⚠️  渲染模板失败 {f}", file=sys.stderr)
+    for f in stats["unbound"]:
+        print(f"⚠️  未绑定的模板变量 {f}", file=sys.stderr)
+    return True
+
+
+def init_bulk(jobs: list, workers: int = None, source: dict = None, options: dict = None) -> bool:
+    """批量初始化多个目标：模板树只遍历编译一次，写入分发到进程池"""
+    from bulk_init import print_bulk_report, run_bulk
+
+    if not jobs:
+        print("⚠️  未找到任何初始化目标")
+        return True
+
+    print(f"🚀 批量初始化 Spec Mode 框架: {len(jobs)} 个目标, {workers or os.cpu_count()} 个工作进程")
+    start = time.perf_counter()
+    tree = load_source_tree(source)
+    if tree is None:
+        return False
+    results = run_bulk(tree, jobs, workers, options)
+    print_bulk_report(results, time.perf_counter() - start, bool((options or {}).get("dry_run")))
+
+    return all(r["status"] != "error" for r in results)
+
+
 def main():
     """主函数"""
     parser = argparse.ArgumentParser(
@@ -185,24 +318,151 @@ def main():
         default=".",
         help="目标目录（默认当前目录）"
     )
+    bulk_group = parser.add_mutually_exclusive_group()
+    bulk_group.add_argument(
+        "--manifest", "-m",
+        help="批量模式：目标清单文件（.csv / .jsonl）"
+    )
+    bulk_group.add_argument(
+        "--discover",
+        help="批量模式：自动发现该目录下的包目录"
+    )
+    parser.add_argument(
+        "--pack",
+        type=Path,
+        help="从模板包（template_pack.py build 生成）读取模板，代替遍历 templates/ 目录"
+    )
+    parser.add_argument(
+        "--git-rev",
+        help="从 git 提交（任意 commit-ish）读取模板，无需检出"
+    )
+    parser.add_argument(
+        "--git-repo",
+        type=Path,
+        help="--git-rev 使用的 git 仓库（默认脚本所在仓库）"
+    )
+    parser.add_argument(
+        "--overlay",
+        action="append",
+        default=[],
+        metavar="DIR",
+        help="模板覆盖层目录，可重复指定，按顺序叠加（后者优先）"
+    )
+    parser.add_argument(
+        "--var",
+        action="append",
+        default=[],
+        metavar="KEY=VALUE",
+        help="模板变量，可重复指定（覆盖各模板层 .specmode-vars.json 中的默认值）"
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        help="批量模式的工作进程数（默认 CPU 核数）"
+    )
+    
+    parser.add_argument(
+        "--upgrade",
+        action="store_true",
+        help="增量升级已有的 .comate 目录，只写入内容变化的文件"
+    )
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="升级时覆盖用户修改过的文件"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="升级或批量模式下只报告将要进行的改动，不写入文件"
+    )
+    parser.add_argument(
+        "--hardlink",
+        action="store_true",
+        help="非模板文件优先使用硬链接（与模板目录或 --store 对象共享 inode，编辑会影响模板 / 所有项目）"
+    )
+    
+    parser.add_argument(
+        "--output-archive",
+        metavar="FILE",
+        help="将 .comate 渲染为确定性 tar 归档（- 表示标准输出），不写入目标目录"
+    )
+    parser.add_argument(
+        "--store",
+        type=Path,
+        help="内容寻址共享存储目录：相同的模板文件只存一份，各项目通过 reflink/硬链接引用"
+    )
     
     args = parser.parse_args()
+    if args.pack and args.git_rev:
+        parser.error("--pack 与 --git-rev 不能同时使用")
+    if args.output_archive and (args.manifest or args.discover):
+        parser.error("--output-archive 不能与 --manifest / --discover 同时使用")
+    if args.output_archive and (args.upgrade or args.store or args.hardlink):
+        parser.error("--output-archive 不能与 --upgrade / --store / --hardlink 同时使用")
+    source = {
+        "pack": args.pack,
+        "git_rev": args.git_rev,
+        "git_repo": args.git_repo,
+        "overlays": args.overlay,
+    }
+    extra = {}
+    for item in args.var:
+        key, sep, value = item.partition("=")
+        if not sep or not key:
+            parser.error(f"--var 格式应为 KEY=VALUE: {item}")
+        extra[key] = value
+    store = args.store.resolve() if args.store else None
+    strategies = DEFAULT_STRATEGIES
+    if args.hardlink:
+        strategies = (STRATEGY_HARDLINK,) + DEFAULT_STRATEGIES
+    
+    # 批量模式
+    if args.manifest or args.discover:
+        from bulk_init import discover_targets, load_manifest
+        try:
+            if args.manifest:
+                jobs = load_manifest(Path(args.manifest))
+            else:
+                jobs = discover_targets(Path(args.discover))
+        except (OSError, ValueError) as e:
+            print(f"❌ 读取初始化目标失败: {e}")
+            sys.exit(1)
+        for job in jobs:
+            job["variables"] = dict(extra, **job["variables"])
+        options = {
+            "strategies": strategies,
+            "upgrade": args.upgrade,
+            "force": args.force,
+            "store": store,
+            "dry_run": args.dry_run,
+        }
+        sys.exit(0 if init_bulk(jobs, args.jobs, source, options) else 1)
     
     # 解析目标目录
     target_dir = Path(args.target).resolve()
+    
+    # 输出 tar 归档（不访问目标文件系统）
+    if args.output_archive:
+        project_name = args.name or infer_project_name(target_dir)
+        success = export_archive(target_dir, project_name, args.output_archive, source, extra)
+        sys.exit(0 if success else 1)
+    
     if not target_dir.exists():
         print(f"❌ 目标目录不存在: {target_dir}")
         sys.exit(1)
     
+    # 增量升级
+    if args.upgrade:
+        success = upgrade_specmode(target_dir, args.name, source, args.force, args.dry_run, store, extra,
+                                   args.hardlink)
+        sys.exit(0 if success else 1)
+    
     # 推断项目名称
-    project_name = args.name
-    if not project_name:
-        project_name = target_dir.name
-        # 将连字符和下划线转换为空格，首字母大写
-        project_name = project_name.replace("-", " ").replace("_", " ").title()
+    project_name = args.name or infer_project_name(target_dir)
     
     # 执行初始化
-    success = init_specmode(target_dir, project_name)
+    success = init_specmode(target_dir, project_name, source, strategies, store, extra)
     sys.exit(0 if success else 1)
 
 
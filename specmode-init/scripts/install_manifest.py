@@ -0,0 +1,97 @@
+"""
+安装清单
+
+初始化 / 升级时在 .comate 下记录每个输出文件的内容哈希与 stat 签名，
+供增量升级判断「模板是否变化」「用户是否修改过文件」。
+
+清单文件: .comate/.specmode-manifest.json
+    {
+        "format": 格式版本,
+        "variables": 渲染时使用的模板变量,
+        "files": {
+            输出相对路径: {"sha256": 写入时的内容哈希, "size": 字节数, "mtime_ns": 修改时间}
+        }
+    }
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+MANIFEST_NAME = ".specmode-manifest.json"
+MANIFEST_FORMAT = 1
+
+
+def sha256_bytes(data: bytes) -> str:
+    """计算内容哈希"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def sha256_chunks(chunks) -> str:
+    """计算分块内容的哈希"""
+    digest = hashlib.sha256()
+    for chunk in chunks:
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_sha256(path: Path) -> str:
+    """分块计算文件内容哈希"""
+    digest = hashlib.sha256()
+    with open(str(path), "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def file_record(path: Path, sha256: str) -> dict:
+    """生成单个文件的清单记录"""
+    st = os.stat(str(path))
+    return {"sha256": sha256, "size": st.st_size, "mtime_ns": st.st_mtime_ns}
+
+
+def current_sha256(path: Path, record: dict = None) -> str:
+    """返回文件当前内容哈希：stat 签名与清单记录一致时直接复用记录，不读取文件"""
+    if record:
+        st = os.stat(str(path))
+        if st.st_size == record.get("size") and st.st_mtime_ns == record.get("mtime_ns"):
+            return record["sha256"]
+    return file_sha256(path)
+
+
+def build_install_manifest(comate_dir: Path, variables: dict, hashes: dict) -> dict:
+    """
+    生成安装清单
+
+    hashes 为 {输出相对路径: 写入内容的 sha256}（见 template_tree.write_tree 的 stats["hashes"]），
+    只对已写出的文件做 stat，不重新读取或渲染。
+    """
+    manifest = {"format": MANIFEST_FORMAT, "variables": dict(variables), "files": {}}
+    for rel_path, sha256 in sorted(hashes.items()):
+        manifest["files"][rel_path] = file_record(comate_dir / rel_path, sha256)
+    return manifest
+
+
+def load_install_manifest(comate_dir: Path) -> Optional[dict]:
+    """读取安装清单，不存在或无法解析时返回 None"""
+    manifest_file = comate_dir / MANIFEST_NAME
+    try:
+        manifest = json.loads(manifest_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(manifest, dict) or manifest.get("format") != MANIFEST_FORMAT:
+        return None
+    return manifest
+
+
+def save_install_manifest(comate_dir: Path, manifest: dict):
+    """原子写入安装清单"""
+    manifest_file = comate_dir / MANIFEST_NAME
+    tmp_file = manifest_file.with_name(manifest_file.name + ".tmp")
+    tmp_file.write_text(
+        json.dumps(manifest, ensure_ascii=False, indent=2, sort_keys=True) + "\n",
+        encoding="utf-8"
+    )
+    os.replace(str(tmp_file), str(manifest_file))
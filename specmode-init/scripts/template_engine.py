@@ -0,0 +1,166 @@
+"""
+模板渲染引擎
+
+将 .tmpl 模板一次性解析为「字面量 / 占位符」交替的片段表，
+按模板内容哈希缓存编译结果（最近使用的 COMPILE_CACHE_SIZE 个），渲染时单次拼接输出。
+
+- 占位符语法: {{variable}}（变量名为字母、数字、下划线，最长 128 个字符）
+- 未绑定的占位符原样保留，并可通过 find_unbound 报告
+- 超大模板可用 render_stream 分块流式渲染，内存占用与文件大小无关，输出与整体渲染一致
+"""
+
+import hashlib
+import re
+import threading
+from collections import OrderedDict
+
+# 变量名最大长度（限定占位符长度，流式渲染时跨块保留的尾部因此有界）
+MAX_NAME_LENGTH = 128
+
+# 占位符: {{variable}}
+PLACEHOLDER_PATTERN = re.compile(r"\{\{(\w{1,%d})\}\}" % MAX_NAME_LENGTH)
+
+# 占位符最大长度: "{{" + 变量名 + "}}"
+MAX_PLACEHOLDER_LENGTH = MAX_NAME_LENGTH + 4
+
+# 流式渲染的默认块大小（字符）
+STREAM_CHUNK_SIZE = 64 * 1024
+
+# 编译缓存容量（按最近使用淘汰；长期运行的进程会编译任意多份不同内容）
+COMPILE_CACHE_SIZE = 256
+
+# 编译缓存: 模板内容哈希 -> 编译结果（按最近使用排序）
+_compiled_cache = OrderedDict()
+_compiled_cache_lock = threading.Lock()
+
+
+def template_hash(content: str) -> str:
+    """计算模板内容哈希（用作编译缓存键）"""
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+def compile_template(content: str) -> dict:
+    """
+    编译模板为片段表（结果按内容哈希缓存）
+
+    返回:
+        {
+            "hash": 模板内容哈希,
+            "literals": 字面量片段（长度 = len(names) + 1）,
+            "names": 占位符变量名（与字面量交替出现）
+        }
+    """
+    key = template_hash(content)
+    with _compiled_cache_lock:
+        compiled = _compiled_cache.get(key)
+        if compiled is not None:
+            _compiled_cache.move_to_end(key)
+            return compiled
+
+    literals = []
+    names = []
+    pos = 0
+    for match in PLACEHOLDER_PATTERN.finditer(content):
+        literals.append(content[pos:match.start()])
+        names.append(match.group(1))
+        pos = match.end()
+    literals.append(content[pos:])
+
+    compiled = {"hash": key, "literals": literals, "names": names}
+    with _compiled_cache_lock:
+        _compiled_cache[key] = compiled
+        while len(_compiled_cache) > COMPILE_CACHE_SIZE:
+            _compiled_cache.popitem(last=False)
+    return compiled
+
+
+def render_compiled(compiled: dict, variables: dict) -> str:
+    """单次拼接渲染已编译的模板，未绑定的占位符原样保留"""
+    literals = compiled["literals"]
+    parts = [literals[0]]
+    for name, literal in zip(compiled["names"], literals[1:]):
+        value = variables.get(name)
+        parts.append(value if value is not None else "{{" + name + "}}")
+        parts.append(literal)
+    return "".join(parts)
+
+
+def find_unbound(compiled: dict, variables: dict) -> list:
+    """返回模板中未绑定的变量名（去重，按首次出现顺序）"""
+    unbound = []
+    for name in compiled["names"]:
+        if name not in variables and name not in unbound:
+            unbound.append(name)
+    return unbound
+
+
+def render_template(content: str, variables: dict) -> str:
+    """渲染模板，替换 {{variable}} 占位符"""
+    return render_compiled(compile_template(content), variables)
+
+
+def clear_template_cache():
+    """清空编译缓存"""
+    with _compiled_cache_lock:
+        _compiled_cache.clear()
+
+
+def _safe_prefix_length(buffer: str) -> int:
+    """
+    返回 buffer 中可以立即渲染的前缀长度
+
+    其后的部分可能是被块边界截断的占位符（"{"、"{{name"、"{{name}" 等），需等待下一块。
+    """
+    start = buffer.rfind("{{")
+    if (start != -1 and buffer.find("}}", start + 2) == -1
+            and len(buffer) - start < MAX_PLACEHOLDER_LENGTH):
+        return start
+    if buffer.endswith("{"):
+        return len(buffer) - 1
+    return len(buffer)
+
+
+def _render_text(text: str, variables: dict, unbound: list) -> str:
+    """渲染一段完整文本（不含被截断的占位符），记录未绑定变量"""
+    def replace(match):
+        name = match.group(1)
+        value = variables.get(name)
+        if value is None:
+            if name not in unbound:
+                unbound.append(name)
+            return match.group(0)
+        return value
+
+    return PLACEHOLDER_PATTERN.sub(replace, text)
+
+
+def render_chunks(chunks, variables: dict, unbound: list = None):
+    """
+    流式渲染：逐块接收模板文本，逐块产出渲染结果
+
+    跨块边界的占位符会被保留到下一块再渲染；unbound 列表用于收集未绑定变量。
+    """
+    if unbound is None:
+        unbound = []
+    pending = ""
+    for chunk in chunks:
+        buffer = pending + chunk
+        cut = _safe_prefix_length(buffer)
+        if cut:
+            yield _render_text(buffer[:cut], variables, unbound)
+        pending = buffer[cut:]
+    if pending:
+        yield _render_text(pending, variables, unbound)
+
+
+def render_stream(src, dst, variables: dict, chunk_size: int = STREAM_CHUNK_SIZE) -> list:
+    """
+    从文本流 src 分块读取模板，渲染后写入文本流 dst，返回未绑定的变量名
+
+    内存占用只与 chunk_size 有关。
+    """
+    unbound = []
+    chunks = iter(lambda: src.read(chunk_size), "")
+    for rendered in render_chunks(chunks, variables, unbound):
+        dst.write(rendered)
+    return unbound
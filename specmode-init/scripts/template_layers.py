@@ -0,0 +1,55 @@
+"""
+模板分层
+
+按顺序叠加多个模板根（基础模板 → 组织层 → 团队层 → 项目层），一次解析出每个输出文件的最终来源：
+
+- 后面的层覆盖前面的层，按输出路径比较（overlay 中的 spec.md 会覆盖基础层的 spec.md.tmpl）
+- 合并结果仍是普通模板树，每个输出文件只写一次
+- 各层根目录下的 .specmode-vars.json 按相同顺序合并为模板变量默认值
+
+覆盖层只能是模板目录；基础层可以是模板目录、模板包或 git 提交。
+"""
+
+from pathlib import Path
+
+from template_tree import load_template_tree, output_path
+
+
+def merge_trees(trees: list) -> dict:
+    """按顺序合并多个模板树（后者优先），返回合并后的模板树"""
+    base = trees[0]
+    merged = {key: value for key, value in base.items() if key not in ("variables", "dirs", "files")}
+    merged["layers"] = [tree["root"] for tree in trees]
+    merged["variables"] = {}
+    for tree in trees:
+        merged["variables"].update(tree.get("variables", {}))
+
+    # 输出路径 -> 最终来源：从最上层往下解析，先占位者胜出
+    winners = {}
+    for tree in reversed(trees):
+        for entry in tree["files"]:
+            winners.setdefault(output_path(entry["path"]), entry)
+
+    dirs = set()
+    for tree in trees:
+        dirs.update(tree["dirs"])
+    for rel_path in winners:
+        if rel_path in dirs:
+            raise ValueError(f"模板层之间路径冲突（文件与目录同名）: {rel_path}")
+
+    merged["dirs"] = sorted(dirs, key=lambda d: d.split("/"))
+    merged["files"] = sorted(
+        winners.values(), key=lambda entry: (entry["path"].split("/")[:-1], entry["path"])
+    )
+    return merged
+
+
+def load_layered_tree(base_tree: dict, overlay_dirs: list) -> dict:
+    """在基础模板树之上依次叠加覆盖层目录"""
+    trees = [base_tree]
+    for overlay_dir in overlay_dirs:
+        overlay_dir = Path(overlay_dir)
+        if not overlay_dir.is_dir():
+            raise ValueError(f"模板覆盖层不存在: {overlay_dir}")
+        trees.append(load_template_tree(overlay_dir.resolve()))
+    return merge_trees(trees)
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+模板包（template pack）
+
+把 templates/ 目录冻结为单个文件，初始化时 mmap 该文件直接写出目录树，
+避免每次初始化都遍历模板目录并逐个 stat / 读取文件。
+
+文件格式:
+    MAGIC (8 字节) | 清单长度 (8 字节, 大端) | 清单 JSON (UTF-8) | 文件内容（顺序拼接）
+
+清单 JSON:
+    {
+        "format": 格式版本,
+        "variables": 模板变量默认值（.specmode-vars.json）,
+        "dirs": [相对路径, ...],
+        "files": [
+            {
+                "path": 相对路径,
+                "mode": 权限位,
+                "sha256": 内容哈希,
+                "size": 字节数,
+                "offset": 在内容区中的偏移,
+                "template": 是否为 .tmpl 模板,
+                "stream": 是否为超大模板（不预编译，写出时流式渲染）,
+                "segments": 编译后的片段表 {"hash", "literals", "names"}（仅非超大模板）
+            },
+            ...
+        ]
+    }
+
+用法:
+    python3 template_pack.py build [--templates DIR] [--output FILE]
+    python3 template_pack.py info PACK_FILE
+"""
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from pathlib import Path
+
+from template_tree import load_template_tree
+
+PACK_MAGIC = b"SPECPACK"
+PACK_FORMAT = 1
+_HEADER = struct.Struct(">8sQ")
+
+# 已打开的模板包: 路径 -> (文件对象, mmap, 内容区起始偏移)
+_open_packs = {}
+
+
+def build_pack(templates_dir: Path, pack_file: Path) -> dict:
+    """将模板目录冻结为模板包，返回清单"""
+    tree = load_template_tree(templates_dir)
+    manifest = {"format": PACK_FORMAT, "variables": tree["variables"], "dirs": tree["dirs"], "files": []}
+    payloads = []
+    offset = 0
+
+    for entry in tree["files"]:
+        if entry["error"]:
+            raise ValueError(f"无法编译模板 {entry['path']}: {entry['error']}")
+        with open(entry["source"], "rb") as f:
+            data = f.read()
+        record = {
+            "path": entry["path"],
+            "mode": os.stat(entry["source"]).st_mode & 0o777,
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "size": len(data),
+            "offset": offset,
+            "template": entry["template"],
+        }
+        if entry["stream"]:
+            record["stream"] = True
+        elif entry["template"]:
+            compiled = entry["compiled"]
+            record["segments"] = {
+                "hash": compiled["hash"],
+                "literals": compiled["literals"],
+                "names": compiled["names"],
+            }
+        manifest["files"].append(record)
+        payloads.append(data)
+        offset += len(data)
+
+    manifest_bytes = json.dumps(manifest, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    tmp_file = pack_file.with_name(pack_file.name + ".tmp")
+    with open(str(tmp_file), "wb") as f:
+        f.write(_HEADER.pack(PACK_MAGIC, len(manifest_bytes)))
+        f.write(manifest_bytes)
+        for data in payloads:
+            f.write(data)
+    os.replace(str(tmp_file), str(pack_file))
+
+    return manifest
+
+
+def _open_pack(pack_file: str) -> tuple:
+    """打开并 mmap 模板包（同一进程内复用）"""
+    opened = _open_packs.get(pack_file)
+    if opened is None:
+        f = open(pack_file, "rb")
+        try:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # 空文件无法 mmap
+            f.close()
+            raise ValueError(f"不是有效的模板包: {pack_file}")
+        magic, manifest_len = b"", 0
+        if len(mapped) >= _HEADER.size:
+            magic, manifest_len = _HEADER.unpack_from(mapped, 0)
+        if magic != PACK_MAGIC:
+            mapped.close()
+            f.close()
+            raise ValueError(f"不是有效的模板包: {pack_file}")
+        opened = (f, mapped, _HEADER.size + manifest_len)
+        _open_packs[pack_file] = opened
+    return opened
+
+
+def read_manifest(pack_file: Path) -> dict:
+    """读取模板包清单"""
+    _, mapped, payload_start = _open_pack(str(pack_file))
+    manifest = json.loads(mapped[_HEADER.size:payload_start].decode("utf-8"))
+    if manifest.get("format") != PACK_FORMAT:
+        raise ValueError(f"不支持的模板包格式版本: {manifest.get('format')}")
+    return manifest
+
+
+def read_payload(pack_file: str, offset: int, size: int) -> memoryview:
+    """返回模板包中某个文件内容的只读视图（不复制）"""
+    _, mapped, payload_start = _open_pack(pack_file)
+    start = payload_start + offset
+    return memoryview(mapped)[start:start + size]
+
+
+def load_pack_tree(pack_file: Path) -> dict:
+    """从模板包构造模板树（与 load_template_tree 结构一致，文件内容来自 mmap）"""
+    pack_file = Path(pack_file).resolve()
+    manifest = read_manifest(pack_file)
+    tree = {
+        "root": str(pack_file),
+        "pack": str(pack_file),
+        "variables": manifest.get("variables", {}),
+        "dirs": manifest["dirs"],
+        "files": [],
+    }
+
+    for record in manifest["files"]:
+        entry = {
+            "path": record["path"],
+            "source": None,
+            "template": record["template"],
+            "compiled": None,
+            "stream": record.get("stream", False),
+            "error": None,
+            "mode": record["mode"],
+            "sha256": record["sha256"],
+            "size": record["size"],
+            "offset": record["offset"],
+        }
+        if record["template"] and not entry["stream"]:
+            entry["compiled"] = record["segments"]
+        tree["files"].append(entry)
+
+    return tree
+
+
+def main():
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="构建 / 查看模板包",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    build = subparsers.add_parser("build", help="将模板目录冻结为模板包")
+    build.add_argument(
+        "--templates",
+        default=str(Path(__file__).parent.parent / "templates"),
+        help="模板目录（默认 ../templates）"
+    )
+    build.add_argument(
+        "--output", "-o",
+        default=str(Path(__file__).parent.parent / "templates.pack"),
+        help="输出文件（默认 ../templates.pack）"
+    )
+
+    info = subparsers.add_parser("info", help="查看模板包清单")
+    info.add_argument("pack", help="模板包文件")
+
+    args = parser.parse_args()
+
+    if args.command == "build":
+        templates_dir = Path(args.templates)
+        if not templates_dir.is_dir():
+            print(f"❌ 错误：模板目录不存在: {templates_dir}")
+            sys.exit(1)
+        manifest = build_pack(templates_dir, Path(args.output))
+        total = sum(f["size"] for f in manifest["files"])
+        templates = sum(1 for f in manifest["files"] if f["template"])
+        print(f"✅ 模板包已生成: {args.output}")
+        print(f"   {len(manifest['files'])} 个文件（{templates} 个模板）, "
+              f"{len(manifest['dirs'])} 个目录, 内容 {total} 字节")
+    elif args.command == "info":
+        try:
+            manifest = read_manifest(Path(args.pack))
+        except (OSError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        for record in manifest["files"]:
+            flag = "T" if record["template"] else "-"
+            print(f"{flag} {record['mode']:o} {record['size']:>10} {record['sha256'][:12]} {record['path']}")
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+"""
+模板树
+
+一次遍历 templates/ 目录并预编译所有 .tmpl 文件，得到可复用（可 pickle）的模板树，
+再按需写入任意多个目标 .comate 目录。
+
+模板树结构:
+    {
+        "root": 模板目录,
+        "variables": 模板根目录 .specmode-vars.json 中的变量默认值,
+        "dirs": [相对路径, ...],
+        "files": [
+            {
+                "path": 相对路径（POSIX 风格）,
+                "source": 源文件绝对路径（来自模板包时为 None）,
+                "template": 是否为 .tmpl 模板,
+                "compiled": 编译结果（仅模板；超大模板为 None）,
+                "stream": 是否为超大模板（写出时流式渲染，不整体载入内存）,
+                "error": 读取/编译错误信息
+            },
+            ...
+        ]
+    }
+
+来自模板包（template_pack.load_pack_tree）的模板树额外带有 "pack" 字段，
+文件条目额外带有 mode / sha256 / size / offset，内容从 mmap 读取。
+来自 git 提交（git_source.load_git_tree）的模板树额外带有 "git" 字段，
+文件条目额外带有 object / mode / size，内容通过 git cat-file --batch 读取。
+目录来源的非模板文件在首次写出时计算 sha256 并缓存到条目中（见 source_sha256）。
+"""
+
+import hashlib
+import io
+import json
+import os
+from pathlib import Path
+
+from copy_engine import DEFAULT_STRATEGIES, STRATEGY_HARDLINK, copy_file, make_dirs, run_writes
+from template_engine import (
+    STREAM_CHUNK_SIZE,
+    compile_template,
+    find_unbound,
+    render_chunks,
+    render_compiled,
+    render_stream,
+)
+
+TEMPLATE_SUFFIX = ".tmpl"
+
+# 模板根目录下的变量默认值文件（不输出到 .comate）
+VARS_FILE = ".specmode-vars.json"
+
+# 超过此大小的模板不预编译，写出时流式渲染
+STREAM_THRESHOLD = 4 * 1024 * 1024
+
+# 非复制类的写入方式（复制类见 copy_engine 中的策略名）
+WRITE_RENDER = "render"
+WRITE_PACK = "pack"
+WRITE_GIT = "git"
+
+
+def infer_project_name(target_dir: Path) -> str:
+    """从目录名推断项目名称：连字符和下划线转换为空格，首字母大写"""
+    return target_dir.name.replace("-", " ").replace("_", " ").title()
+
+
+def build_variables(project_name: str, extra: dict = None, defaults: dict = None) -> dict:
+    """
+    准备模板变量
+
+    优先级（低 → 高）：内置默认值、defaults（模板层变量）、project_name、extra
+    """
+    variables = {"project_description": "（请填写项目描述）"}
+    if defaults:
+        variables.update(defaults)
+    variables["project_name"] = project_name
+    if extra:
+        variables.update(extra)
+    return variables
+
+
+def parse_layer_variables(data: bytes, origin: str) -> dict:
+    """解析模板层的变量默认值文件（JSON 对象，值须为字符串或数字）"""
+    try:
+        variables = json.loads(data.decode("utf-8"))
+    except ValueError as e:
+        raise ValueError(f"{origin} 不是合法 JSON: {e}")
+    if not isinstance(variables, dict):
+        raise ValueError(f"{origin} 必须是 JSON 对象")
+    result = {}
+    for key, value in variables.items():
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            raise ValueError(f"{origin} 中变量 {key} 的值必须是字符串或数字")
+        result[str(key)] = str(value)
+    return result
+
+
+def output_path(rel_path: str) -> str:
+    """模板相对路径 → 输出相对路径（.tmpl 去掉后缀）"""
+    if rel_path.endswith(TEMPLATE_SUFFIX):
+        return rel_path[:-len(TEMPLATE_SUFFIX)]
+    return rel_path
+
+
+class _MemoryReader(io.RawIOBase):
+    """只读内存视图的原始流（用于对模板包内容做流式文本解码）"""
+
+    def __init__(self, view: memoryview):
+        self._view = view
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        size = min(len(buffer), len(self._view) - self._pos)
+        buffer[:size] = self._view[self._pos:self._pos + size]
+        self._pos += size
+        return size
+
+
+def _read_payload(tree: dict, entry: dict):
+    """读取非目录来源（模板包 / git 提交）的文件内容"""
+    if "git" in tree:
+        from git_source import read_blob
+        return read_blob(tree["git"]["repo"], entry["object"])
+    from template_pack import read_payload
+    return read_payload(tree["pack"], entry["offset"], entry["size"])
+
+
+def read_entry_bytes(tree: dict, entry: dict) -> bytes:
+    """读取模板树中单个文件的原始内容"""
+    if entry["source"] is None:
+        return bytes(_read_payload(tree, entry))
+    with open(entry["source"], "rb") as f:
+        return f.read()
+
+
+def open_entry_text(tree: dict, entry: dict):
+    """以文本流打开模板（UTF-8，通用换行符，与 read_text 的解码结果一致）"""
+    if entry["source"] is None:
+        view = memoryview(_read_payload(tree, entry))
+        return io.TextIOWrapper(io.BufferedReader(_MemoryReader(view)), encoding="utf-8")
+    return open(entry["source"], encoding="utf-8")
+
+
+def iter_entry_output(tree: dict, entry: dict, variables: dict):
+    """分块产出单个文件的输出内容（bytes）：超大模板流式渲染，其余整体产出"""
+    if not entry["template"]:
+        yield read_entry_bytes(tree, entry)
+    elif entry["error"]:
+        raise ValueError(entry["error"])
+    elif entry.get("stream"):
+        with open_entry_text(tree, entry) as src:
+            chunks = iter(lambda: src.read(STREAM_CHUNK_SIZE), "")
+            for rendered in render_chunks(chunks, variables):
+                yield rendered.encode("utf-8")
+    else:
+        yield render_compiled(entry["compiled"], variables).encode("utf-8")
+
+
+def render_entry(tree: dict, entry: dict, variables: dict) -> bytes:
+    """返回单个文件的输出内容（模板渲染后 / 非模板原样）"""
+    return b"".join(iter_entry_output(tree, entry, variables))
+
+
+def entry_mode(entry: dict) -> int:
+    """返回单个文件的权限位"""
+    if entry["source"] is None:
+        return entry["mode"]
+    return os.stat(entry["source"]).st_mode & 0o777
+
+
+def load_template_tree(templates_dir: Path) -> dict:
+    """遍历模板目录一次，返回模板树（目录与文件均按路径排序）"""
+    root = str(templates_dir)
+    tree = {"root": root, "variables": {}, "dirs": [], "files": []}
+
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        rel_dir = os.path.relpath(dirpath, root)
+        rel_dir = "" if rel_dir == "." else rel_dir.replace(os.sep, "/")
+        if rel_dir:
+            tree["dirs"].append(rel_dir)
+
+        for filename in sorted(filenames):
+            source = os.path.join(dirpath, filename)
+            if not rel_dir and filename == VARS_FILE:
+                with open(source, "rb") as f:
+                    tree["variables"] = parse_layer_variables(f.read(), source)
+                continue
+            rel_path = rel_dir + "/" + filename if rel_dir else filename
+            entry = {
+                "path": rel_path,
+                "source": source,
+                "template": filename.endswith(TEMPLATE_SUFFIX),
+                "compiled": None,
+                "stream": False,
+                "error": None,
+            }
+            if entry["template"] and os.path.getsize(source) > STREAM_THRESHOLD:
+                entry["stream"] = True
+            elif entry["template"]:
+                try:
+                    with open(source, encoding="utf-8") as f:
+                        entry["compiled"] = compile_template(f.read())
+                except Exception as e:
+                    entry["error"] = str(e)
+            tree["files"].append(entry)
+
+    return tree
+
+
+class _HashingWriter:
+    """文本写入适配器：编码为 UTF-8 写入二进制文件，同时计算内容哈希"""
+
+    def __init__(self, raw):
+        self._raw = raw
+        self.digest = hashlib.sha256()
+
+    def write(self, text: str):
+        data = text.encode("utf-8")
+        self.digest.update(data)
+        self._raw.write(data)
+
+
+def source_sha256(entry: dict) -> str:
+    """目录来源文件的内容哈希（每个模板树只读取一次，缓存在条目的 sha256 字段）"""
+    sha256 = entry.get("sha256")
+    if sha256 is None:
+        digest = hashlib.sha256()
+        with open(entry["source"], "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        sha256 = entry["sha256"] = digest.hexdigest()
+    return sha256
+
+
+def write_pack_entry(tree: dict, entry: dict, target_path: Path) -> str:
+    """将模板包（或 git 提交）中的单个文件写到目标路径并恢复权限位，返回内容哈希"""
+    payload = _read_payload(tree, entry)
+    with open(str(target_path), "wb") as f:
+        f.write(payload)
+    os.chmod(str(target_path), entry["mode"])
+    return entry.get("sha256") or hashlib.sha256(payload).hexdigest()
+
+
+def _write_entry(tree: dict, entry: dict, target_comate_dir: Path, variables: dict,
+                 strategies: tuple, store: Path = None) -> tuple:
+    """写出单个文件，返回 (写入方式, 未绑定变量, 错误信息, 写入内容的 sha256)"""
+    rel_path = entry["path"]
+    if entry["template"]:
+        # 渲染模板文件
+        try:
+            if entry["error"]:
+                raise ValueError(entry["error"])
+            target_path = target_comate_dir / output_path(rel_path)
+            if entry["stream"]:
+                # 先写临时文件再原子替换：中途解码 / 渲染失败不会留下半截的目标文件
+                tmp_path = target_path.with_name(f".{target_path.name}.specmode-tmp")
+                try:
+                    with open_entry_text(tree, entry) as src, open(str(tmp_path), "wb") as raw:
+                        dst = _HashingWriter(raw)
+                        unbound = render_stream(src, dst, variables)
+                    os.replace(str(tmp_path), str(target_path))
+                except BaseException:
+                    if os.path.lexists(str(tmp_path)):
+                        os.unlink(str(tmp_path))
+                    raise
+                return WRITE_RENDER, unbound, None, dst.digest.hexdigest()
+            compiled = entry["compiled"]
+            data = render_compiled(compiled, variables).encode("utf-8")
+            with open(str(target_path), "wb") as f:
+                f.write(data)
+            return WRITE_RENDER, find_unbound(compiled, variables), None, hashlib.sha256(data).hexdigest()
+        except Exception as e:
+            return WRITE_RENDER, [], str(e), None
+    if store is not None:
+        # 引用共享存储中的对象
+        from content_store import store_file
+        data = read_entry_bytes(tree, entry)
+        sha256 = entry.get("sha256") or hashlib.sha256(data).hexdigest()
+        method = store_file(store, data, target_comate_dir / rel_path,
+                            entry_mode(entry), sha256, STRATEGY_HARDLINK in strategies)
+        return method, [], None, sha256
+    if entry["source"] is None:
+        # 从模板包 / git 提交写出文件
+        sha256 = write_pack_entry(tree, entry, target_comate_dir / rel_path)
+        return (WRITE_GIT if "git" in tree else WRITE_PACK), [], None, sha256
+    # 直接复制文件（reflink / copy_file_range 不经过用户态，哈希取自模板源文件）
+    method = copy_file(entry["source"], str(target_comate_dir / rel_path), strategies)
+    return method, [], None, source_sha256(entry)
+
+
+def write_tree(tree: dict, target_comate_dir: Path, variables: dict,
+               strategies: tuple = DEFAULT_STRATEGIES, threads: int = None,
+               store: Path = None) -> dict:
+    """
+    将模板树写入目标目录
+
+    - .tmpl 文件：渲染变量后去掉 .tmpl 后缀
+    - 其他文件：按 strategies 优先级复制（reflink / copy_file_range / 普通复制）；
+      指定 store 时改为引用内容寻址共享存储中的对象
+
+    目录集合一次性创建，文件写入通过有界线程池并发执行。
+    渲染失败的模板不写出目标文件，记录在 stats["errors"] 中由调用方报告。
+    返回复制统计信息
+    """
+    stats = {
+        "rendered": [],    # 渲染的模板文件
+        "copied": [],      # 直接复制的文件
+        "dirs": [],        # 创建的目录
+        "unbound": [],     # 含未绑定占位符的模板
+        "errors": [],      # 渲染失败的模板（未写出目标文件）
+        "strategies": {},  # 每个输出文件的写入方式
+        "hashes": {}       # 每个输出文件写入内容的 sha256（供安装清单使用）
+    }
+
+    target_comate_dir.mkdir(parents=True, exist_ok=True)
+    make_dirs(target_comate_dir / rel_dir for rel_dir in tree["dirs"])
+    stats["dirs"] = list(tree["dirs"])
+
+    tasks = [
+        (lambda entry=entry: _write_entry(tree, entry, target_comate_dir, variables, strategies, store))
+        for entry in tree["files"]
+    ]
+    results = run_writes(tasks, threads)
+
+    for entry, (strategy, unbound, error, sha256) in zip(tree["files"], results):
+        rel_path = entry["path"]
+        if error:
+            stats["errors"].append(f"{rel_path}: {error}")
+            continue
+        stats["hashes"][output_path(rel_path)] = sha256
+        if entry["template"]:
+            final_rel = output_path(rel_path)
+            stats["rendered"].append(rel_path + " → " + final_rel)
+            stats["strategies"][final_rel] = strategy
+            if unbound:
+                stats["unbound"].append(rel_path + ": " + ", ".join(unbound))
+        else:
+            stats["copied"].append(rel_path)
+            stats["strategies"][rel_path] = strategy
+
+    return stats
@@ -0,0 +1,211 @@
+"""
+增量升级
+
+对已有的 .comate 目录按新模板原地升级，只写入内容确实变化的文件：
+
+- 目标文件内容与新模板输出一致          → unchanged（不写入，mtime 不变）
+- 目标文件缺失                          → added
+- 目标文件未被用户修改（与安装清单一致） → updated
+- 目标文件被用户修改                    → conflict（保留；--force 时覆盖为 forced）
+- 新模板已删除、且用户未修改的文件      → removed（用户修改过则保留为 kept）
+
+写入采用「临时文件 + 原子替换」，不会写穿硬链接。
+没有安装清单的旧目录：内容不一致的文件一律视为用户修改。
+"""
+
+import os
+from pathlib import Path
+
+from content_store import store_file
+from install_manifest import (
+    MANIFEST_FORMAT,
+    current_sha256,
+    file_record,
+    load_install_manifest,
+    save_install_manifest,
+    sha256_bytes,
+    sha256_chunks,
+)
+from template_tree import (
+    build_variables,
+    entry_mode,
+    infer_project_name,
+    iter_entry_output,
+    output_path,
+    render_entry,
+)
+
+UPGRADE_ACTIONS = ("added", "updated", "forced", "removed", "unchanged", "conflict", "kept")
+
+
+def atomic_write(path: Path, data, mode: int = None) -> int:
+    """
+    写入临时文件后原子替换目标（替换而非覆盖，硬链接会被断开）
+
+    data 可以是 bytes 或 bytes 块的可迭代对象，返回写入字节数。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f".{path.name}.specmode-tmp")
+    chunks = [data] if isinstance(data, bytes) else data
+    written = 0
+    try:
+        with open(str(tmp_path), "wb") as f:
+            for chunk in chunks:
+                f.write(chunk)
+                written += len(chunk)
+        if mode is not None:
+            os.chmod(str(tmp_path), mode)
+        os.replace(str(tmp_path), str(path))
+    except BaseException:
+        # 分块产出中途失败（如流式模板解码错误）：删除临时文件，目标保持原样
+        if os.path.lexists(str(tmp_path)):
+            os.unlink(str(tmp_path))
+        raise
+    return written
+
+
+def upgrade_variables(comate_dir: Path, project_name: str = None, extra: dict = None,
+                      defaults: dict = None) -> dict:
+    """
+    升级使用的模板变量
+
+    沿用安装清单中记录的变量（旧目录没有清单时从目录名推断），
+    模板层新增的变量（defaults）补齐缺失项，再以 project_name / extra 覆盖。
+    """
+    manifest = load_install_manifest(comate_dir) or {}
+    if manifest.get("variables"):
+        variables = dict(defaults or {})
+        variables.update(manifest["variables"])
+    else:
+        variables = build_variables(
+            project_name or infer_project_name(comate_dir.resolve().parent), defaults=defaults
+        )
+    if project_name:
+        variables["project_name"] = project_name
+    if extra:
+        variables.update(extra)
+    return variables
+
+
+def upgrade_tree(tree: dict, comate_dir: Path, variables: dict,
+                 force: bool = False, dry_run: bool = False, store: Path = None,
+                 hardlink: bool = False) -> dict:
+    """
+    按模板树增量升级 .comate 目录
+
+    指定 store 时非模板文件改为引用内容寻址共享存储中的对象（hardlink 见 content_store.link_object）。
+
+    渲染失败的模板（编译错误、解码失败）跳过且不改动目标文件，记录在 "errors" 中。
+
+    返回 {"actions": {动作: [相对路径, ...]}, "bytes_written": 写入字节数, "errors": [错误信息, ...]}
+    """
+    old_manifest = load_install_manifest(comate_dir) or {}
+    old_files = old_manifest.get("files", {})
+
+    result = {"actions": {action: [] for action in UPGRADE_ACTIONS}, "bytes_written": 0, "errors": []}
+    actions = result["actions"]
+    new_manifest = {"format": MANIFEST_FORMAT, "variables": dict(variables), "files": {}}
+
+    for entry in tree["files"]:
+        rel_path = output_path(entry["path"])
+        target = comate_dir / rel_path
+        record = old_files.get(rel_path)
+
+        try:
+            if not entry["template"] and entry.get("sha256"):
+                new_hash = entry["sha256"]
+                data = None
+            elif entry.get("stream"):
+                # 超大模板：流式计算哈希，需要写入时再流式渲染一次
+                new_hash = sha256_chunks(iter_entry_output(tree, entry, variables))
+                data = None
+            else:
+                data = render_entry(tree, entry, variables)
+                new_hash = sha256_bytes(data)
+        except (OSError, ValueError) as e:
+            result["errors"].append(f"{entry['path']}: {e}")
+            if record and target.exists():
+                new_manifest["files"][rel_path] = record
+            continue
+
+        if not target.exists():
+            action = "added"
+        else:
+            current = current_sha256(target, record)
+            if current == new_hash:
+                action = "unchanged"
+            elif record and current == record["sha256"]:
+                action = "updated"
+            elif force:
+                action = "forced"
+            else:
+                action = "conflict"
+        actions[action].append(rel_path)
+
+        if action in ("added", "updated", "forced") and not dry_run:
+            if store is not None and not entry["template"]:
+                if data is None:
+                    data = render_entry(tree, entry, variables)
+                target.parent.mkdir(parents=True, exist_ok=True)
+                store_file(store, data, target, entry_mode(entry), new_hash, hardlink)
+                result["bytes_written"] += len(data)
+            else:
+                if data is None:
+                    data = iter_entry_output(tree, entry, variables)
+                result["bytes_written"] += atomic_write(target, data, entry_mode(entry))
+
+        if dry_run or not target.exists():
+            continue
+        if action == "conflict":
+            # 保留用户修改，但记录新模板输出，下次升级仍视为用户修改
+            new_manifest["files"][rel_path] = dict(record or {}, sha256=new_hash)
+        else:
+            new_manifest["files"][rel_path] = file_record(target, new_hash)
+
+    # 新模板中已删除的文件
+    new_paths = {output_path(entry["path"]) for entry in tree["files"]}
+    for rel_path, record in sorted(old_files.items()):
+        if rel_path in new_paths:
+            continue
+        target = comate_dir / rel_path
+        if not target.is_file():
+            continue
+        if current_sha256(target, record) == record["sha256"]:
+            actions["removed"].append(rel_path)
+            if not dry_run:
+                target.unlink()
+        else:
+            actions["kept"].append(rel_path)
+
+    if not dry_run:
+        save_install_manifest(comate_dir, new_manifest)
+
+    return result
+
+
+def print_upgrade_report(result: dict, dry_run: bool = False):
+    """打印升级报告"""
+    labels = {
+        "added": ("➕", "新增"),
+        "updated": ("🔄", "更新"),
+        "forced": ("⚠️ ", "强制覆盖（用户修改已丢弃）"),
+        "removed": ("➖", "删除"),
+        "conflict": ("✋", "跳过（用户已修改，使用 --force 覆盖）"),
+        "kept": ("✋", "保留（模板已删除，但用户已修改）"),
+    }
+    actions = result["actions"]
+    for action, (icon, label) in labels.items():
+        if actions[action]:
+            print(f"\n{icon} {label} ({len(actions[action])} 个):")
+            for rel_path in actions[action]:
+                print(f"   {rel_path}")
+
+    if result["errors"]:
+        print(f"\n❌ 渲染模板失败 ({len(result['errors'])} 个，目标文件保持原样):")
+        for error in result["errors"]:
+            print(f"   ❌ {error}")
+
+    print()
+    summary = ", ".join(f"{action} {len(paths)}" for action, paths in actions.items() if paths)
+    prefix = "📝 --dry-run 模式，未写入任何文件" if dry_run else f"📊 写入 {result['bytes_written']} 字节"
+    print(f"{prefix}（{summary or '无文件'}）")
@@ -0,0 +1,10 @@
+"""
+Spec Mode 共享库
+
+供 .comate/skills/*/scripts 下的脚本共用，脚本通过以下方式导入:
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "lib"))
+    from specmode.frontmatter import read_frontmatter
+
+也可作为统一命令行运行（python3 -m specmode，或打包为 zipapp），见 specmode.cli。
+"""
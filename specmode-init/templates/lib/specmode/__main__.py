@@ -0,0 +1,12 @@
+"""python3 -m specmode / python3 .comate/lib/specmode / zipapp 入口（见 specmode.cli）"""
+
+import sys
+
+if not __package__:
+    # 以目录方式运行（python3 .comate/lib/specmode）：把 .comate/lib/ 加入导入路径
+    from pathlib import Path
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from specmode.cli import main
+
+sys.exit(main())
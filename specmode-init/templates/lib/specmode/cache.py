@@ -0,0 +1,174 @@
+"""
+解析 / 校验结果缓存
+
+缓存文件位于 .comate/.cache/ 下，每个同步脚本一个 JSON 文件：
+
+    {"format": 1, "validator": 校验器版本, "entries": {键: 记录}}
+    记录: {"stat": [大小, mtime_ns, inode], "sha256": 内容哈希, "result": 校验结果}
+
+- stat 签名一致时直接复用结果，不打开文件
+- stat 变化（如 CI 重新检出后 mtime 改变）但内容哈希一致时，只重新计算哈希，不重新解析
+- 校验器版本变化时整个缓存失效；缓存损坏或不可写时退化为不使用缓存
+
+缓存目录中写入内容为 * 的 .gitignore：缓存含机器相关的 inode 签名、二进制的目录数据库与
+守护进程 socket，不随 .comate 提交。
+
+每个缓存文件旁另存一份只含签名与哈希的小文件（<名称>.stat.json，{"format": 1, "files": {键: 记录}}），
+--check 只需要判断文件是否变化，读取它而不必解析完整的校验结果。
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional
+
+CACHE_FORMAT = 1
+
+# 缓存目录（相对于 .comate/）
+CACHE_DIR_NAME = ".cache"
+
+
+def cache_path(comate_dir: Path, name: str) -> Path:
+    """返回指定名称的缓存文件路径"""
+    return comate_dir / CACHE_DIR_NAME / f"{name}.json"
+
+
+def make_cache_dir(directory: Path):
+    """创建缓存目录，并写入忽略其全部内容的 .gitignore"""
+    directory.mkdir(parents=True, exist_ok=True)
+    ignore_file = directory / ".gitignore"
+    if not ignore_file.exists():
+        try:
+            ignore_file.write_text("*\n", encoding="utf-8")
+        except OSError:
+            pass  # 只影响 git 状态，不影响缓存本身
+
+
+def _file_sha256(path: Path) -> str:
+    """计算文件内容哈希"""
+    # hashlib 导入较慢，只在 stat 签名不一致、需要比对内容时导入
+    import hashlib
+
+    digest = hashlib.sha256()
+    with open(str(path), "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 16), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def signatures_path(cache_file: Path) -> Path:
+    """缓存文件对应的签名文件路径"""
+    return cache_file.with_name(f"{cache_file.stem}.stat.json")
+
+
+def load_cache(cache_file: Path, validator: int) -> dict:
+    """读取缓存条目；格式或校验器版本不一致时返回空缓存"""
+    try:
+        data = json.loads(cache_file.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT or data.get("validator") != validator:
+        return {}
+    entries = data.get("entries")
+    return entries if isinstance(entries, dict) else {}
+
+
+def load_signatures(cache_file: Path) -> dict:
+    """读取签名文件，返回 {键: {"stat", "sha256"}}（可直接传给 current_sha256）；不可用时返回空字典"""
+    try:
+        data = json.loads(signatures_path(cache_file).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(data, dict) or data.get("format") != CACHE_FORMAT or not isinstance(data.get("files"), dict):
+        return {}
+    return {
+        key: {"stat": record[:3], "sha256": record[3]}
+        for key, record in data["files"].items()
+        if isinstance(record, list) and len(record) == 4
+    }
+
+
+def _write_json(path: Path, data: dict):
+    """原子写入 JSON 文件"""
+    tmp_file = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    try:
+        tmp_file.write_text(
+            json.dumps(data, ensure_ascii=False, separators=(",", ":"), sort_keys=True),
+            encoding="utf-8"
+        )
+        os.replace(str(tmp_file), str(path))
+    except OSError:
+        try:
+            tmp_file.unlink()
+        except OSError:
+            pass
+        raise
+
+
+def save_cache(cache_file: Path, validator: int, entries: dict) -> bool:
+    """原子写入缓存与签名文件，写入失败时返回 False（缓存只是加速，不影响结果）"""
+    signatures = {
+        key: record["stat"] + [record["sha256"]]
+        for key, record in entries.items()
+        if isinstance(record, dict) and "stat" in record and "sha256" in record
+    }
+    try:
+        make_cache_dir(cache_file.parent)
+        _write_json(cache_file, {"format": CACHE_FORMAT, "validator": validator, "entries": entries})
+        _write_json(signatures_path(cache_file), {"format": CACHE_FORMAT, "files": signatures})
+    except OSError:
+        return False
+    return True
+
+
+def lookup(entries: dict, key: str, path: Path) -> tuple:
+    """
+    按 stat 签名（其次内容哈希）查找缓存结果
+
+    返回 (结果或 None, 记录)；未命中时记录只含签名与哈希，校验后用 store 写回。
+    文件不存在时抛出 OSError。
+    """
+    st = os.stat(str(path))
+    signature = [st.st_size, st.st_mtime_ns, st.st_ino]
+    entry = entries.get(key)
+    if isinstance(entry, dict) and "result" in entry:
+        if entry.get("stat") == signature:
+            return entry["result"], entry
+        sha256 = _file_sha256(path)
+        if entry.get("sha256") == sha256:
+            entry["stat"] = signature
+            return entry["result"], entry
+    else:
+        sha256 = _file_sha256(path)
+    return None, {"stat": signature, "sha256": sha256}
+
+
+def cached(entries: dict, key: str) -> tuple:
+    """
+    不检查文件，直接返回缓存的 (结果, 记录)；没有缓存结果时返回 (None, None)
+
+    供 --since / --staged 使用：git 报告未变化的条目不再 stat。
+    """
+    entry = entries.get(key)
+    if isinstance(entry, dict) and entry.get("result") is not None:
+        return entry["result"], entry
+    return None, None
+
+
+def current_sha256(entries: dict, key: str, path: Path) -> str:
+    """
+    返回文件当前的内容哈希：stat 签名与缓存一致时直接使用缓存的哈希，否则读取文件计算
+
+    只读，不更新缓存；文件不存在时抛出 OSError。
+    """
+    st = os.stat(str(path))
+    entry = entries.get(key)
+    if isinstance(entry, dict) and entry.get("sha256") and entry.get("stat") == [st.st_size, st.st_mtime_ns, st.st_ino]:
+        return entry["sha256"]
+    return _file_sha256(path)
+
+
+def store(entries: dict, key: str, record: dict, result: Optional[dict]):
+    """记录校验结果"""
+    record["result"] = result
+    entries[key] = record
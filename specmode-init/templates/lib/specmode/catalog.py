@@ -0,0 +1,197 @@
+"""
+技能 / 规则目录
+
+把 sync_skills / sync_rules 的校验结果整理为可查询的内存目录：
+
+    {
+        "skills": {名称: 条目}, "rules": {名称: 条目},
+        "globs": [(正则, 规则名)], "always": [始终生效的规则名],
+        "automaton": 触发词 / 关键词自动机（见 specmode.triggers）,
+    }
+    技能条目: {"kind": "skill", "name", "description", "triggers", "path", "status", "warnings"}
+    规则条目: {"kind": "rule", "name", "description", "globs", "alwaysApply", "keywords", "path", "status", "warnings"}
+
+校验出错的条目不进入目录（与索引一致）。校验逻辑复用同步脚本本身，
+目录与 SKILLS_INDEX.md / RULES_INDEX.md 的内容始终一致。
+"""
+
+import re
+from pathlib import Path
+
+from specmode import cache, paths, triggers
+
+# description 中的触发词段落：**触发词**：a、b、c
+_TRIGGERS_RE = re.compile(r'\*\*触发词\*\*\s*[：:]\s*(.+?)(?=\*\*|\n|$)')
+_SPLIT_RE = re.compile(r'[,，、]')
+
+
+def _relative(path: str) -> str:
+    """统一为 / 分隔、不带前导 ./ 的相对路径"""
+    path = path.strip().replace("\\", "/")
+    while path.startswith("./"):
+        path = path[2:]
+    return path
+
+
+def load_sync_modules(comate_dir: Path) -> tuple:
+    """导入 sync_skills / sync_rules 模块（见 paths.import_script）"""
+    return paths.import_script("sync_skills", comate_dir), paths.import_script("sync_rules", comate_dir)
+
+
+def extract_triggers(description: str) -> list:
+    """从 description 的 **触发词** 段落提取触发词"""
+    match = _TRIGGERS_RE.search(description)
+    if not match:
+        return []
+    return [word.strip() for word in _SPLIT_RE.split(match.group(1)) if word.strip()]
+
+
+def glob_to_regex(pattern: str) -> str:
+    """
+    将 glob 转换为正则（整串匹配）
+
+    支持 ** / * / ? 与 {a,b}；不含 / 的模式匹配任意层级下的文件名。
+    """
+    pattern = _relative(pattern)
+    parts = []
+    i = 0
+    depth = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "{":
+            parts.append("(?:")
+            depth += 1
+        elif char == "}" and depth:
+            parts.append(")")
+            depth -= 1
+        elif char == "," and depth:
+            parts.append("|")
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    parts.append(")" * depth)
+    regex = "".join(parts)
+    if "/" not in pattern:
+        regex = "(?:.*/)?" + regex
+    return regex
+
+
+def _skill_entry(result: dict) -> dict:
+    """技能校验结果 → 目录条目"""
+    return {
+        "kind": "skill",
+        "name": result["yaml_name"] or result["name"],
+        "description": result["description"],
+        "triggers": extract_triggers(result["description"]),
+        "path": f"skills/{result['name']}/SKILL.md",
+        "status": result["status"],
+        "warnings": result["warnings"],
+    }
+
+
+def _rule_entry(result: dict) -> dict:
+    """规则校验结果 → 目录条目"""
+    return {
+        "kind": "rule",
+        "name": result["name"],
+        "description": result["description"],
+        "globs": result["globs"],
+        "alwaysApply": result["alwaysApply"],
+        "keywords": result["keywords"],
+        "path": f"rules/{result['name']}.mdr",
+        "status": result["status"],
+        "warnings": result["warnings"],
+    }
+
+
+def build_catalog(skill_results: list, rule_results: list) -> dict:
+    """由校验结果构造目录与查询用的预计算结构"""
+    catalog = {"skills": {}, "rules": {}, "globs": [], "always": []}
+    terms = []
+    for result in skill_results:
+        if result["status"] == "error":
+            continue
+        entry = _skill_entry(result)
+        catalog["skills"][entry["name"]] = entry
+        terms += [(word, "skill", entry["name"]) for word in entry["triggers"]]
+    for result in rule_results:
+        if result["status"] == "error":
+            continue
+        entry = _rule_entry(result)
+        catalog["rules"][entry["name"]] = entry
+        if entry["alwaysApply"]:
+            catalog["always"].append(entry["name"])
+        for pattern in entry["globs"]:
+            try:
+                catalog["globs"].append((re.compile(glob_to_regex(pattern)), entry["name"]))
+            except re.error:
+                continue
+        terms += [(word, "rule", entry["name"]) for word in entry["keywords"]]
+    catalog["automaton"] = triggers.build(terms)
+    return catalog
+
+
+def load_catalog(comate_dir: Path, entries: dict = None) -> dict:
+    """
+    扫描 .comate 并构造目录
+
+    entries 为 {"sync_skills": 缓存条目, "sync_rules": 缓存条目}，多次调用时传入同一个字典，
+    未变化的条目不重新读取（见 specmode.cache）；为 None 时从 .comate/.cache/ 读取同步脚本的缓存。
+    """
+    sync_skills, sync_rules = load_sync_modules(comate_dir)
+    if entries is None:
+        entries = {}
+    for module in (sync_skills, sync_rules):
+        if module.__name__ not in entries:
+            cache_file = cache.cache_path(comate_dir, module.__name__)
+            entries[module.__name__] = cache.load_cache(cache_file, module.VALIDATOR_VERSION)
+
+    skills_dir = comate_dir / "skills"
+    rules_dir = comate_dir / "rules"
+    skill_results = sync_skills.scan_skills(skills_dir, entries["sync_skills"]) if skills_dir.is_dir() else []
+    rule_results = sync_rules.scan_rules(rules_dir, entries["sync_rules"]) if rules_dir.is_dir() else []
+    return build_catalog(skill_results, rule_results)
+
+
+def list_entries(catalog: dict, kind: str = None) -> list:
+    """列出条目摘要（名称、类型、描述）"""
+    kinds = ("skills", "rules") if kind is None else (kind + "s",)
+    return [
+        {"kind": entry["kind"], "name": entry["name"], "description": entry["description"]}
+        for key in kinds for entry in catalog[key].values()
+    ]
+
+
+def lookup(catalog: dict, name: str, kind: str = None) -> list:
+    """按名称查找条目（技能与规则可能同名）"""
+    kinds = ("skills", "rules") if kind is None else (kind + "s",)
+    return [catalog[key][name] for key in kinds if name in catalog[key]]
+
+
+def match_path(catalog: dict, path: str) -> list:
+    """返回编辑 path 时应加载的规则名：始终生效的规则 + globs 匹配的规则"""
+    path = _relative(path)
+    names = list(catalog["always"])
+    seen = set(names)
+    for regex, name in catalog["globs"]:
+        if name not in seen and regex.fullmatch(path):
+            names.append(name)
+            seen.add(name)
+    return names
+
+
+def match_prompt(catalog: dict, prompt: str, kind: str = None, limit: int = None) -> list:
+    """返回用户请求中出现触发词 / 关键词的条目，按得分排序 [{"kind", "name", "score", "matched": [命中的词]}]"""
+    return triggers.match(catalog["automaton"], prompt, kind, limit)
@@ -0,0 +1,70 @@
+"""
+git 变化检测
+
+同步脚本的 --since / --staged 使用：向本地 git 查询技能 / 规则目录下变化的路径，
+只重新校验这些条目，其余条目直接复用缓存中的校验结果（不 stat、不读取）。
+
+- --since REV: 相对 REV 的全部变化（已提交、已暂存、未暂存），外加未跟踪的文件
+- --staged:    已暂存的变化（git diff --cached），适用于 pre-commit；校验仍读取工作区中的文件
+- 重命名按删除 + 新增处理（--no-renames），两个路径都视为变化
+
+增量结果只有在缓存与 REV 时的文件一致时才等于全量重建；--self-check 用 diff_results
+比对增量结果与不使用缓存的全量重建。
+"""
+
+import json
+import subprocess
+from pathlib import Path
+
+
+def _git(directory: Path, *args) -> bytes:
+    """在 directory 中执行一次 git 命令，返回标准输出"""
+    try:
+        result = subprocess.run(
+            ["git", "-C", str(directory)] + list(args),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError as e:
+        raise ValueError(f"无法执行 git: {e}")
+    if result.returncode != 0:
+        message = result.stderr.decode("utf-8", "replace").strip()
+        raise ValueError(message or f"git {args[0]} 失败")
+    return result.stdout
+
+
+def _split(output: bytes) -> set:
+    """解析 -z 输出的路径列表"""
+    return {path for path in output.decode("utf-8", "surrogateescape").split("\0") if path}
+
+
+def changed_paths(directory: Path, since: str = None, staged: bool = False) -> set:
+    """
+    返回 directory 下相对 since（或已暂存）变化的文件，路径相对于 directory（以 / 分隔）
+
+    不在 git 仓库中、git 不可用或 since 无效时抛出 ValueError。
+    """
+    if staged == (since is not None):
+        raise ValueError("必须且只能指定 since 或 staged 之一")
+    if staged:
+        return _split(_git(directory, "diff", "--cached", "--name-only", "-z", "--no-renames", "--relative"))
+
+    if since.startswith("-"):
+        raise ValueError(f"无效的提交: {since}")
+    try:
+        commit = _git(directory, "rev-parse", "--verify", "--quiet", since + "^{commit}").decode("ascii").strip()
+    except ValueError:
+        raise ValueError(f"无效的提交: {since}")
+    paths = _split(_git(directory, "diff", "--name-only", "-z", "--no-renames", "--relative", commit, "--"))
+    paths |= _split(_git(directory, "ls-files", "-z", "--others", "--exclude-standard"))
+    return paths
+
+
+def diff_results(results: list, expected: list) -> list:
+    """按名称比对两组校验结果，返回不一致（或只出现在一侧）的名称，已排序"""
+    def by_name(items: list) -> dict:
+        return {r["name"]: json.dumps(r, ensure_ascii=False, sort_keys=True) for r in items}
+
+    actual = by_name(results)
+    wanted = by_name(expected)
+    return sorted(name for name in set(actual) | set(wanted) if actual.get(name) != wanted.get(name))
@@ -0,0 +1,113 @@
+"""
+specmode 统一命令行
+
+用法:
+    python3 -m specmode [--root DIR] <命令> [参数...]
+    python3 specmode.pyz [--root DIR] <命令> [参数...]
+
+命令:
+    sync-skills    校验技能并更新 SKILLS_INDEX.md（参数同 sync_skills.py）
+    sync-rules     校验规则并更新 RULES_INDEX.md（参数同 sync_rules.py）
+    new-skill      创建技能（参数同 init_skill.py）
+    new-rule       创建规则（参数同 init_rule.py）
+    serve          启动查询守护进程（参数同 daemon.py serve）
+    query          向查询守护进程发送查询（参数同 daemon.py query）
+    catalog        直接查询 SQLite 目录，无需守护进程、不扫描目录树（参数同 db.py）
+    match          按触发词 / 关键词匹配用户请求，返回排序后的技能与规则（参数同 triggers.py）
+    search         按 BM25 检索与请求相关的规则，适用于不含完整关键词的模糊请求（参数同 search.py）
+
+选项:
+    --root DIR     项目目录或 .comate 目录；未指定时使用本工具所在的 .comate，
+                   不在 .comate 中（如 zipapp）时从当前目录向上查找
+
+示例:
+    python3 -m specmode sync-skills --dry-run
+    python3 specmode.pyz --root ~/work/project-a sync-rules --jobs 0
+    python3 specmode.pyz query match_path src/services/user.go
+    python3 specmode.pyz match --limit 3 "新建一個技能模板"
+    python3 specmode.pyz search "改一下用户登录接口"
+
+每个命令只导入自己用到的模块：--help 与参数错误不加载任何校验 / 监听代码。
+"""
+
+import sys
+
+# 命令 → (模块, 传给模块 main() 的前置参数)
+COMMANDS = {
+    "sync-skills": ("sync_skills", []),
+    "sync-rules": ("sync_rules", []),
+    "new-skill": ("init_skill", []),
+    "new-rule": ("init_rule", []),
+    "serve": ("specmode.daemon", ["serve"]),
+    "query": ("specmode.daemon", ["query"]),
+    "catalog": ("specmode.db", []),
+    "match": ("specmode.triggers", []),
+    "search": ("specmode.search", []),
+}
+
+
+def default_comate():
+    """未指定 --root 时的 .comate 目录（Path）"""
+    from pathlib import Path
+
+    from specmode import paths
+
+    # 本文件位于 .comate/lib/specmode/ 时服务该 .comate
+    installed = Path(__file__).resolve().parent.parent.parent
+    if installed.name == paths.COMATE_DIR_NAME:
+        return installed
+    return paths.find_comate()
+
+
+def split_args(argv: list) -> tuple:
+    """拆分全局选项与命令：返回 (root, 命令, 命令参数)"""
+    root = None
+    args = list(argv)
+    while args and args[0].startswith("-"):
+        option = args.pop(0)
+        if option == "--root" and args:
+            root = args.pop(0)
+        elif option.startswith("--root="):
+            root = option[len("--root="):]
+        elif option in ("-h", "--help"):
+            return root, "help", []
+        else:
+            raise ValueError(f"未知的选项: {option}")
+    if not args:
+        return root, None, []
+    return root, args[0], args[1:]
+
+
+def main(argv: list = None) -> int:
+    """主函数"""
+    try:
+        root, command, args = split_args(sys.argv[1:] if argv is None else argv)
+    except ValueError as e:
+        print(f"❌ 错误：{e}")
+        return 1
+    if command in (None, "help"):
+        print(__doc__)
+        return 0 if command == "help" else 1
+    if command not in COMMANDS:
+        print(f"❌ 错误：未知的命令: {command}")
+        print(__doc__)
+        return 1
+
+    # pathlib 等模块的导入在 --help / 参数错误时不需要
+    from specmode import paths
+
+    try:
+        comate_dir = paths.find_comate(root) if root else default_comate()
+    except ValueError as e:
+        print(f"❌ 错误：{e}")
+        return 1
+
+    module_name, prefix = COMMANDS[command]
+    if module_name.startswith("specmode."):
+        import importlib
+        module = importlib.import_module(module_name)
+        module.main(["--root", str(comate_dir)] + prefix + args)
+    else:
+        module = paths.import_script(module_name, comate_dir)
+        module.main(prefix + args + ["--root", str(comate_dir)])
+    return 0
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+技能 / 规则查询守护进程
+
+一次性加载 .comate 中的技能与规则目录（见 specmode.catalog），通过文件事件保持最新，
+在本地 Unix socket 上应答查询，避免每次查询都启动 Python 并全量扫描。
+
+协议：每行一个 JSON 请求，每行一个 JSON 应答，同一连接可连续查询
+
+    {"op": "list", "kind": "skill"|"rule"|null}       列出条目
+    {"op": "lookup", "name": "...", "kind": ...}       按名称查找
+    {"op": "match_path", "path": "src/a.go"}           编辑该路径时应加载的规则
+    {"op": "match_prompt", "prompt": "...", "kind": ..., "limit": N}
+                                                       请求中命中触发词 / 关键词的条目（按得分排序）
+    {"op": "stats"}                                    目录版本与条目数
+
+    应答: {"ok": true, "result": ...} 或 {"ok": false, "error": "..."}
+
+用法:
+    python3 .comate/lib/specmode/daemon.py serve [--root DIR] [--socket PATH]
+    python3 .comate/lib/specmode/daemon.py query match_path src/services/user.go
+    python3 .comate/lib/specmode/daemon.py query match_prompt "开始 spec mode"
+
+默认 socket 为 .comate/.cache/specmode.sock。
+"""
+
+import argparse
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+
+if __name__ == "__main__" and not __package__:
+    # 作为脚本运行：把 .comate/lib/ 加入导入路径
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from specmode import cache, catalog, paths, watch
+
+# 默认 .comate 目录（本文件位于 .comate/lib/specmode/）
+DEFAULT_COMATE_DIR = Path(__file__).resolve().parents[2]
+
+# 单个请求行的长度上限
+MAX_REQUEST_BYTES = 64 * 1024
+
+
+def default_socket(comate_dir: Path) -> Path:
+    """默认 socket 路径"""
+    return comate_dir / cache.CACHE_DIR_NAME / "specmode.sock"
+
+
+def handle_request(state: dict, request: dict):
+    """执行单个查询，返回结果（参数错误时抛出 ValueError）"""
+    current = state["catalog"]
+    op = request.get("op")
+    kind = request.get("kind")
+    if kind not in (None, "skill", "rule"):
+        raise ValueError(f"未知的 kind: {kind}")
+
+    if op == "list":
+        return catalog.list_entries(current, kind)
+    if op == "lookup":
+        return catalog.lookup(current, str(request.get("name", "")), kind)
+    if op == "match_path":
+        return catalog.match_path(current, str(request.get("path", "")))
+    if op == "match_prompt":
+        limit = request.get("limit")
+        if limit is not None and (not isinstance(limit, int) or limit < 0):
+            raise ValueError(f"无效的 limit: {limit}")
+        return catalog.match_prompt(current, str(request.get("prompt", "")), kind, limit)
+    if op == "stats":
+        return {
+            "generation": state["generation"],
+            "loaded_at": state["loaded_at"],
+            "skills": len(current["skills"]),
+            "rules": len(current["rules"]),
+        }
+    raise ValueError(f"未知的 op: {op}")
+
+
+def respond(state: dict, line: bytes) -> bytes:
+    """处理一行请求，返回一行应答"""
+    try:
+        request = json.loads(line.decode("utf-8"))
+        if not isinstance(request, dict):
+            raise ValueError("请求必须是 JSON 对象")
+        response = {"ok": True, "result": handle_request(state, request)}
+    except (ValueError, UnicodeDecodeError) as e:
+        response = {"ok": False, "error": str(e)}
+    return (json.dumps(response, ensure_ascii=False, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """每个连接一个线程，按行应答"""
+
+    def handle(self):
+        state = self.server.state
+        while True:
+            line = self.rfile.readline(MAX_REQUEST_BYTES + 1)
+            if not line:
+                return
+            if len(line) > MAX_REQUEST_BYTES:
+                self.wfile.write(b'{"ok":false,"error":"request too large"}\n')
+                return
+            if line.strip():
+                self.wfile.write(respond(state, line))
+                self.wfile.flush()
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def reload_state(state: dict, comate_dir: Path, entries: dict):
+    """重新扫描并整体替换目录（查询线程始终看到完整的一版目录）"""
+    state["catalog"] = catalog.load_catalog(comate_dir, entries)
+    state["generation"] += 1
+    state["loaded_at"] = time.time()
+
+
+def _refresh_loop(state: dict, comate_dir: Path, entries: dict, force_poll: bool):
+    """后台线程：.comate 中技能 / 规则变化时重新加载目录"""
+    watched = watch.open_watch(comate_dir, force_poll=force_poll)
+    sources = (str(comate_dir / "skills") + os.sep, str(comate_dir / "rules") + os.sep)
+    try:
+        while True:
+            changed = watch.wait_changes(watched)
+            if changed is None or any(path.startswith(sources) for path in changed):
+                reload_state(state, comate_dir, entries)
+    finally:
+        watch.close_watch(watched)
+
+
+def _bind(socket_path: Path) -> _Server:
+    """绑定 socket；已有文件但无进程监听时视为残留并删除"""
+    cache.make_cache_dir(socket_path.parent)
+    if socket_path.exists():
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(str(socket_path))
+            raise OSError(f"守护进程已在运行: {socket_path}")
+        except (ConnectionRefusedError, FileNotFoundError):
+            socket_path.unlink()
+        finally:
+            probe.close()
+    return _Server(str(socket_path), _Handler)
+
+
+def serve(comate_dir: Path, socket_path: Path, force_poll: bool = False, ready: threading.Event = None):
+    """加载目录并在 socket_path 上应答查询，直到被中断"""
+    entries = {}
+    state = {"catalog": None, "generation": 0, "loaded_at": 0.0}
+    reload_state(state, comate_dir, entries)
+
+    server = _bind(socket_path)
+    server.state = state
+    refresher = threading.Thread(
+        target=_refresh_loop, args=(state, comate_dir, entries, force_poll), daemon=True
+    )
+    refresher.start()
+    print(f"🚀 查询守护进程: {len(state['catalog']['skills'])} 个技能, "
+          f"{len(state['catalog']['rules'])} 个规则, socket {socket_path}")
+    if ready is not None:
+        ready.set()
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        try:
+            socket_path.unlink()
+        except OSError:
+            pass
+
+
+def query(socket_path: Path, request: dict, timeout: float = 5.0):
+    """客户端：发送单个请求并返回结果（守护进程返回错误时抛出 ValueError）"""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(timeout)
+        sock.connect(str(socket_path))
+        sock.sendall((json.dumps(request, ensure_ascii=False) + "\n").encode("utf-8"))
+        with sock.makefile("rb") as reader:
+            response = json.loads(reader.readline().decode("utf-8"))
+    if not response.get("ok"):
+        raise ValueError(response.get("error", "查询失败"))
+    return response["result"]
+
+
+def main(argv: list = None):
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="技能 / 规则查询守护进程",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        help="项目目录或 .comate 目录（默认本文件所在的 .comate）"
+    )
+    parser.add_argument(
+        "--socket",
+        type=Path,
+        help="Unix socket 路径（默认 .comate/.cache/specmode.sock）"
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    serve_parser = subparsers.add_parser("serve", help="启动守护进程")
+    serve_parser.add_argument("--poll", action="store_true", help="强制使用轮询监听文件变化")
+
+    query_parser = subparsers.add_parser("query", help="向守护进程发送查询")
+    query_parser.add_argument("op", choices=["list", "lookup", "match_path", "match_prompt", "stats"])
+    query_parser.add_argument("arg", nargs="?", help="lookup 的名称 / match_path 的路径 / match_prompt 的文本")
+    query_parser.add_argument("--kind", choices=["skill", "rule"], help="只查询技能或规则")
+
+    args = parser.parse_args(argv)
+    if args.root:
+        try:
+            comate_dir = paths.find_comate(args.root)
+        except ValueError as e:
+            print(f"❌ 错误：{e}")
+            sys.exit(1)
+    else:
+        comate_dir = DEFAULT_COMATE_DIR
+    socket_path = args.socket or default_socket(comate_dir)
+
+    if args.command == "serve":
+        # kill / systemd stop 时同样清理 socket 文件
+        signal.signal(signal.SIGTERM, signal.default_int_handler)
+        try:
+            serve(comate_dir, socket_path, force_poll=args.poll)
+        except OSError as e:
+            print(f"❌ 错误：{e}")
+            sys.exit(1)
+    elif args.command == "query":
+        request = {"op": args.op, "kind": args.kind}
+        if args.op in ("lookup", "match_path", "match_prompt"):
+            if args.arg is None:
+                parser.error(f"{args.op} 需要参数")
+            request[{"lookup": "name", "match_path": "path", "match_prompt": "prompt"}[args.op]] = args.arg
+        try:
+            result = query(socket_path, request)
+        except (OSError, ValueError) as e:
+            print(f"❌ 错误：{e}")
+            sys.exit(1)
+        print(json.dumps(result, ensure_ascii=False, indent=2))
+    else:
+        parser.print_help()
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+SQLite 技能 / 规则目录
+
+同步脚本每次扫描后在一个事务中更新 .comate/.cache/catalog.db，SKILLS_INDEX.md / RULES_INDEX.md
+的表格行由其中的数据渲染；查询直接读取数据库，不扫描 .comate 目录树。
+
+表结构:
+
+    entries   每个技能目录 / 规则文件一行（含校验出错的条目）
+              kind, source（目录名 / 文件名）, name, path, description, status, errors, warnings,
+              always_apply, frontmatter（完整 frontmatter，含嵌套 metadata，JSON）, row（索引行）,
+              sha256, size, mtime_ns
+    keywords  技能触发词 / 规则关键词（小写），按 word 建索引
+    globs     规则的 globs 及其字面目录前缀（按前缀建索引，match_path 只编译可能匹配的 glob）
+    postings  规则检索的倒排表：词 → (规则, 加权词频, 文档长度)（见 specmode.search；
+              文档长度随倒排项冗余保存，查询时不必再关联 documents）
+    documents 规则检索的文档长度（加权词频之和）
+    meta      格式、各类条目的校验器版本与触发词自动机的代数（generation）
+
+- 条目内容哈希与校验器版本都未变化时不重写该行
+- update_entries(commit=False) 在同一事务中更新后回滚；同步脚本的 --dry-run 不打开数据库
+- 数据库损坏时删除重建（内容总能由 .comate 重新生成）
+- 条目有变化的同步提交后重建触发词自动机（见 specmode.triggers），写入同目录的 triggers.json
+
+用法:
+    python3 .comate/lib/specmode/db.py [--root DIR] list [--kind skill|rule] [--status error]
+    python3 .comate/lib/specmode/db.py lookup spec-mode
+    python3 .comate/lib/specmode/db.py keyword 同步
+    python3 .comate/lib/specmode/db.py match_path src/services/user.go
+    python3 .comate/lib/specmode/db.py match_prompt "开始 spec mode"
+    python3 .comate/lib/specmode/db.py search 改一下用户登录接口
+    python3 .comate/lib/specmode/db.py stats
+"""
+
+import argparse
+import json
+import re
+import sys
+from pathlib import Path
+
+if __name__ == "__main__" and not __package__:
+    # 作为脚本运行：把 .comate/lib/ 加入导入路径
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from specmode import cache, catalog, paths, search, triggers
+
+DB_FORMAT = 1
+
+DB_NAME = "catalog.db"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entries (
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    name TEXT NOT NULL,
+    path TEXT NOT NULL,
+    description TEXT NOT NULL,
+    status TEXT NOT NULL,
+    errors TEXT NOT NULL,
+    warnings TEXT NOT NULL,
+    always_apply INTEGER,
+    frontmatter TEXT,
+    row TEXT,
+    sha256 TEXT,
+    size INTEGER,
+    mtime_ns INTEGER,
+    PRIMARY KEY (kind, source)
+);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+CREATE TABLE IF NOT EXISTS keywords (
+    kind TEXT NOT NULL,
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    word TEXT NOT NULL,
+    PRIMARY KEY (kind, source, position)
+);
+CREATE INDEX IF NOT EXISTS keywords_word ON keywords (word);
+CREATE TABLE IF NOT EXISTS globs (
+    source TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    pattern TEXT NOT NULL,
+    prefix TEXT NOT NULL,
+    PRIMARY KEY (source, position)
+);
+CREATE INDEX IF NOT EXISTS globs_prefix ON globs (prefix);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    source TEXT NOT NULL,
+    tf INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    PRIMARY KEY (term, source)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_source ON postings (source);
+CREATE TABLE IF NOT EXISTS documents (
+    source TEXT PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+"""
+
+
+class CatalogError(Exception):
+    """目录数据库不可用（sqlite3 缺失、无法写入等）"""
+
+
+def db_path(comate_dir: Path) -> Path:
+    """目录数据库路径"""
+    return comate_dir / cache.CACHE_DIR_NAME / DB_NAME
+
+
+def connect(db_file: Path, create: bool = True):
+    """打开目录数据库；文件损坏或格式不一致时删除重建"""
+    try:
+        import sqlite3
+    except ImportError as e:
+        raise CatalogError(f"sqlite3 不可用: {e}")
+
+    if not create and not db_file.exists():
+        raise CatalogError(f"目录数据库不存在，请先运行同步脚本: {db_file}")
+    for attempt in range(2):
+        conn = None
+        try:
+            cache.make_cache_dir(db_file.parent)
+            conn = sqlite3.connect(str(db_file), timeout=10, isolation_level=None)
+            conn.executescript(_SCHEMA)
+            found = conn.execute("SELECT value FROM meta WHERE key = 'format'").fetchone()
+            if found is None:
+                conn.execute("INSERT INTO meta (key, value) VALUES ('format', ?)", (str(DB_FORMAT),))
+            elif found[0] != str(DB_FORMAT):
+                raise sqlite3.DatabaseError(f"格式版本 {found[0]}")
+            return conn
+        except sqlite3.DatabaseError as e:
+            if conn is not None:
+                conn.close()
+            if attempt or not create:
+                raise CatalogError(f"{db_file}: {e}")
+            # 目录总能由 .comate 重新生成：删除后重建
+            try:
+                db_file.unlink()
+            except OSError:
+                raise CatalogError(f"{db_file}: {e}")
+        except (sqlite3.Error, OSError) as e:
+            raise CatalogError(f"{db_file}: {e}")
+
+
+def triggers_path(db_file: Path) -> Path:
+    """触发词自动机文件路径（与数据库同目录）"""
+    return db_file.with_name(triggers.AUTOMATON_NAME)
+
+
+def _generation(conn) -> str:
+    """触发词自动机的当前代数"""
+    found = conn.execute("SELECT value FROM meta WHERE key = 'triggers'").fetchone()
+    return found[0] if found else "0"
+
+
+def build_triggers(conn) -> dict:
+    """由数据库中的触发词 / 关键词构造自动机（不含校验出错的条目）"""
+    # 在同一个读事务中读取代数与词表，避免与并发的同步交错
+    conn.execute("BEGIN")
+    try:
+        return triggers.build(
+            conn.execute(
+                "SELECT k.word, e.kind, e.name FROM keywords k JOIN entries e USING (kind, source) "
+                "WHERE e.status != 'error' ORDER BY e.kind DESC, e.source, k.position"
+            ).fetchall(),
+            _generation(conn)
+        )
+    finally:
+        conn.execute("COMMIT")
+
+
+def glob_prefix(pattern: str) -> str:
+    """
+    glob 开头不含通配符的目录部分（如 src/api/**/*.go → "src/api/"）
+
+    能匹配 path 的 glob，其前缀必然是 path 的某个上级目录（或空串：不含 / 的模式匹配任意层级）。
+    """
+    parts = catalog._relative(pattern).split("/")[:-1]
+    prefix = []
+    for part in parts:
+        if any(char in part for char in "*?{}[]"):
+            break
+        prefix.append(part)
+    return "".join(part + "/" for part in prefix)
+
+
+def _path_prefixes(path: str) -> list:
+    """path 的全部上级目录前缀（含空串）"""
+    parts = path.split("/")[:-1]
+    return [""] + ["/".join(parts[:i]) + "/" for i in range(1, len(parts) + 1)]
+
+
+def _source(kind: str, result: dict) -> str:
+    """条目的目录名 / 文件名（同时是排序键，与扫描顺序一致）"""
+    return result["name"] if kind == "skill" else f"{result['name']}.mdr"
+
+
+def _cache_key(kind: str, source: str) -> str:
+    """条目对应的缓存键（见 sync_skills / sync_rules 的 scan_*）"""
+    return f"{source}/SKILL.md" if kind == "skill" else source
+
+
+def _rows(kind: str, source: str, result: dict, record: dict, batch: dict):
+    """把单个条目及其关键词 / globs / 检索词的待插入行加入 batch（见 _insert）"""
+    if kind == "skill":
+        name = result["yaml_name"] or result["name"]
+        path = f"skills/{source}/SKILL.md"
+        words = catalog.extract_triggers(result["description"])
+        always_apply = None
+    else:
+        name = result["name"]
+        path = f"rules/{source}"
+        words = result["keywords"]
+        always_apply = int(bool(result["alwaysApply"]))
+    stat = (record or {}).get("stat") or [None, None, None]
+    batch["entries"].append((
+        kind, source, name, path, result["description"], result["status"],
+        json.dumps(result["errors"], ensure_ascii=False),
+        json.dumps(result["warnings"], ensure_ascii=False),
+        always_apply,
+        json.dumps(result.get("frontmatter"), ensure_ascii=False),
+        result.get("row"),
+        (record or {}).get("sha256"), stat[0], stat[1],
+    ))
+    batch["keywords"] += [(kind, source, i, word.lower()) for i, word in enumerate(words)]
+    if kind == "rule":
+        batch["globs"] += [(source, i, pattern, glob_prefix(pattern)) for i, pattern in enumerate(result["globs"])]
+        if result["status"] != "error":
+            terms = search.document_terms(words, result["headings"], result["description"])
+            length = sum(terms.values())
+            batch["postings"] += [(term, source, tf, length) for term, tf in terms.items()]
+            batch["documents"].append((source, length))
+
+
+def _insert(conn, batch: dict):
+    """批量写入条目及其关键词 / globs / 检索词"""
+    conn.executemany("INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)", batch["entries"])
+    conn.executemany("INSERT INTO keywords VALUES (?, ?, ?, ?)", batch["keywords"])
+    conn.executemany("INSERT INTO globs VALUES (?, ?, ?, ?)", batch["globs"])
+    conn.executemany("INSERT INTO postings VALUES (?, ?, ?, ?)", batch["postings"])
+    conn.executemany("INSERT INTO documents VALUES (?, ?)", batch["documents"])
+
+
+def _delete(conn, kind: str, sources: list):
+    """删除条目及其关键词 / globs / 检索词"""
+    for source in sources:
+        conn.execute("DELETE FROM entries WHERE kind = ? AND source = ?", (kind, source))
+        conn.execute("DELETE FROM keywords WHERE kind = ? AND source = ?", (kind, source))
+        if kind == "rule":
+            conn.execute("DELETE FROM globs WHERE source = ?", (source,))
+            conn.execute("DELETE FROM postings WHERE source = ?", (source,))
+            conn.execute("DELETE FROM documents WHERE source = ?", (source,))
+
+
+def index_rows(conn, kind: str) -> list:
+    """索引表格行 [(条目名, 表格行)]，按扫描顺序，不含校验出错的条目"""
+    return [tuple(row) for row in conn.execute(
+        "SELECT name, row FROM entries WHERE kind = ? AND status != 'error' ORDER BY source", (kind,)
+    )]
+
+
+def _unchanged(stored: tuple, sha256: str, result: dict) -> bool:
+    """
+    已有的行是否无需重写：内容哈希一致；没有内容哈希（如缺少 SKILL.md 的技能目录）时
+    比较校验状态与错误，避免每次同步都重写该行并使触发词自动机的代数递增
+    """
+    stored_sha256, status, errors = stored
+    if sha256 is not None:
+        return stored_sha256 == sha256
+    return (stored_sha256 is None and status == result["status"]
+            and errors == json.dumps(result["errors"], ensure_ascii=False))
+
+
+def update_entries(db_file: Path, kind: str, results: list, entries: dict, validator: int,
+                   commit: bool = True) -> list:
+    """
+    在一个事务中把扫描结果写入目录，返回由目录渲染的索引表格行（见 index_rows）
+
+    entries 为扫描后的缓存条目（提供内容哈希与 stat）；内容哈希与校验器版本都未变化的条目不重写。
+    commit=False 时读取表格行后回滚（预览用，不提交）。
+    """
+    import sqlite3
+
+    conn = connect(db_file)
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            version_key = f"validator:{kind}"
+            found = conn.execute("SELECT value FROM meta WHERE key = ?", (version_key,)).fetchone()
+            reset = found is None or found[0] != str(validator)
+            if reset:
+                # 校验器变化：该类条目全部重写
+                _delete(conn, kind, [s for (s,) in conn.execute("SELECT source FROM entries WHERE kind = ?", (kind,))])
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (version_key, str(validator)))
+            existing = {
+                source: (sha256, status, errors)
+                for source, sha256, status, errors in conn.execute(
+                    "SELECT source, sha256, status, errors FROM entries WHERE kind = ?", (kind,)
+                )
+            }
+
+            seen = set()
+            batch = {"entries": [], "keywords": [], "globs": [], "postings": [], "documents": []}
+            for result in results:
+                source = _source(kind, result)
+                record = entries.get(_cache_key(kind, source))
+                sha256 = (record or {}).get("sha256")
+                seen.add(source)
+                if source in existing:
+                    if _unchanged(existing[source], sha256, result):
+                        continue
+                    _delete(conn, kind, [source])
+                _rows(kind, source, result, record, batch)
+            removed = [source for source in existing if source not in seen]
+            _delete(conn, kind, removed)
+            _insert(conn, batch)
+            # 自动机格式（含归一化规则）变化时同样需要重建
+            found = conn.execute("SELECT value FROM meta WHERE key = 'triggers_format'").fetchone()
+            changed = bool(reset or batch["entries"] or removed or found is None
+                           or found[0] != str(triggers.AUTOMATON_FORMAT))
+            if changed:
+                conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('triggers_format', ?)",
+                    (str(triggers.AUTOMATON_FORMAT),)
+                )
+                generation = str(int(_generation(conn)) + 1)
+                conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('triggers', ?)", (generation,))
+
+            rows = index_rows(conn, kind)
+            conn.execute("COMMIT" if commit else "ROLLBACK")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        if commit and (changed or not triggers_path(db_file).exists()):
+            try:
+                triggers.save(triggers_path(db_file), build_triggers(conn))
+            except OSError:
+                pass  # 查询时发现代数不一致会由数据库重新构建
+    except sqlite3.Error as e:
+        raise CatalogError(f"{db_file}: {e}")
+    finally:
+        conn.close()
+    return rows
+
+
+def _entry(row) -> dict:
+    """entries 表的一行 → 条目字典"""
+    (kind, source, name, path, description, status, errors, warnings,
+     always_apply, frontmatter, _, sha256, size, mtime_ns) = row
+    entry = {
+        "kind": kind, "name": name, "source": source, "path": path, "description": description,
+        "status": status, "errors": json.loads(errors), "warnings": json.loads(warnings),
+        "frontmatter": json.loads(frontmatter) if frontmatter else None,
+        "sha256": sha256, "size": size, "mtime_ns": mtime_ns,
+    }
+    if kind == "rule":
+        entry["alwaysApply"] = bool(always_apply)
+    return entry
+
+
+def _kind_filter(kind: str, column: str = "kind") -> tuple:
+    """kind 条件子句"""
+    return (f"AND {column} = ?", (kind,)) if kind else ("", ())
+
+
+def list_entries(conn, kind: str = None, status: str = None) -> list:
+    """列出条目摘要（含校验状态）"""
+    where, params = _kind_filter(kind)
+    if status:
+        where += " AND status = ?"
+        params += (status,)
+    return [
+        {"kind": k, "name": name, "description": description, "status": s}
+        for k, name, description, s in conn.execute(
+            f"SELECT kind, name, description, status FROM entries WHERE 1 {where} ORDER BY kind DESC, source",
+            params
+        )
+    ]
+
+
+def _words(conn, kind: str, source: str) -> list:
+    """条目的触发词 / 关键词"""
+    return [word for (word,) in conn.execute(
+        "SELECT word FROM keywords WHERE kind = ? AND source = ? ORDER BY position", (kind, source)
+    )]
+
+
+def lookup(conn, name: str, kind: str = None) -> list:
+    """按名称查找条目（完整字段）"""
+    where, params = _kind_filter(kind)
+    found = []
+    for row in conn.execute(f"SELECT * FROM entries WHERE name = ? {where} ORDER BY kind DESC", (name,) + params):
+        entry = _entry(row)
+        words = _words(conn, entry["kind"], entry["source"])
+        if entry["kind"] == "skill":
+            entry["triggers"] = words
+        else:
+            entry["keywords"] = words
+            entry["globs"] = [pattern for (pattern,) in conn.execute(
+                "SELECT pattern FROM globs WHERE source = ? ORDER BY position", (entry["source"],)
+            )]
+        found.append(entry)
+    return found
+
+
+def by_keyword(conn, word: str, kind: str = None) -> list:
+    """精确匹配触发词 / 关键词的条目（使用 word 索引）"""
+    where, params = _kind_filter(kind, "e.kind")
+    return [
+        {"kind": k, "name": name}
+        for k, name in conn.execute(
+            f"SELECT DISTINCT e.kind, e.name FROM keywords k JOIN entries e USING (kind, source) "
+            f"WHERE k.word = ? AND e.status != 'error' {where} ORDER BY e.kind DESC, e.source",
+            (word.strip().lower(),) + params
+        )
+    ]
+
+
+def match_path(conn, path: str) -> list:
+    """返回编辑 path 时应加载的规则名：始终生效的规则 + globs 匹配的规则（同 catalog.match_path）"""
+    names = [name for (name,) in conn.execute(
+        "SELECT name FROM entries WHERE kind = 'rule' AND status != 'error' AND always_apply = 1 ORDER BY source"
+    )]
+    seen = set(names)
+    path = catalog._relative(path)
+    prefixes = _path_prefixes(path)
+    for name, pattern in conn.execute(
+        "SELECT e.name, g.pattern FROM globs g JOIN entries e ON e.kind = 'rule' AND e.source = g.source "
+        f"WHERE e.status != 'error' AND g.prefix IN ({', '.join('?' * len(prefixes))}) "
+        "ORDER BY g.source, g.position",
+        prefixes
+    ):
+        if name in seen:
+            continue
+        try:
+            if re.fullmatch(catalog.glob_to_regex(pattern), path):
+                names.append(name)
+                seen.add(name)
+        except re.error:
+            continue
+    return names
+
+
+def match_prompt(conn, prompt: str, kind: str = None, limit: int = None) -> list:
+    """
+    返回用户请求中出现触发词 / 关键词的条目，按得分排序（见 specmode.triggers.match）
+
+    使用同步时写入的自动机文件；文件缺失或已过期时由数据库重新构建。
+    """
+    db_file = Path(conn.execute("PRAGMA database_list").fetchone()[2])
+    automaton = triggers.load(triggers_path(db_file), _generation(conn)) or build_triggers(conn)
+    return triggers.match(automaton, prompt, kind, limit)
+
+
+def search_rules(conn, query: str, limit: int = search.DEFAULT_LIMIT) -> list:
+    """按 BM25 检索与请求相关的规则 [{"name", "description", "score"}]（见 specmode.search）"""
+    terms = search.query_terms(query)
+    if not terms:
+        return []
+    # 在同一个读事务中读取文档统计与倒排表，避免与并发的同步交错
+    conn.execute("BEGIN")
+    try:
+        count, total_length = conn.execute("SELECT COUNT(*), COALESCE(SUM(length), 0) FROM documents").fetchone()
+        postings = {
+            term: conn.execute("SELECT source, tf, length FROM postings WHERE term = ?", (term,)).fetchall()
+            for term in terms
+        }
+        ranked = search.rank(postings, count, total_length, limit)
+        if not ranked:
+            return []
+        described = {source: (name, description) for source, name, description in conn.execute(
+            f"SELECT source, name, description FROM entries WHERE kind = 'rule' "
+            f"AND source IN ({', '.join('?' * len(ranked))})",
+            [source for source, _ in ranked]
+        )}
+    finally:
+        conn.execute("COMMIT")
+    return [
+        {"name": described[source][0], "description": described[source][1], "score": round(score, 4)}
+        for source, score in ranked
+    ]
+
+
+def stats(conn) -> dict:
+    """各类条目按校验状态计数"""
+    counts = {}
+    for kind, status, count in conn.execute("SELECT kind, status, COUNT(*) FROM entries GROUP BY kind, status"):
+        counts.setdefault(kind, {})[status] = count
+    return counts
+
+
+def main(argv: list = None):
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="查询 SQLite 技能 / 规则目录",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        help="项目目录或 .comate 目录（默认本文件所在的 .comate）"
+    )
+    parser.add_argument("op", choices=["list", "lookup", "keyword", "match_path", "match_prompt", "search", "stats"])
+    parser.add_argument(
+        "arg", nargs="?", help="lookup 的名称 / keyword 的词 / match_path 的路径 / match_prompt 与 search 的文本"
+    )
+    parser.add_argument("--kind", choices=["skill", "rule"], help="只查询技能或规则")
+    parser.add_argument("--status", choices=["pass", "warn", "error"], help="list 时只列出该校验状态的条目")
+    args = parser.parse_args(argv)
+    if args.op in ("lookup", "keyword", "match_path", "match_prompt", "search") and args.arg is None:
+        parser.error(f"{args.op} 需要参数")
+
+    try:
+        comate_dir = paths.find_comate(args.root) if args.root else Path(__file__).resolve().parents[2]
+        conn = connect(db_path(comate_dir), create=False)
+    except (ValueError, CatalogError) as e:
+        print(f"❌ 错误：{e}")
+        sys.exit(1)
+    try:
+        if args.op == "list":
+            result = list_entries(conn, args.kind, args.status)
+        elif args.op == "lookup":
+            result = lookup(conn, args.arg, args.kind)
+        elif args.op == "keyword":
+            result = by_keyword(conn, args.arg, args.kind)
+        elif args.op == "match_path":
+            result = match_path(conn, args.arg)
+        elif args.op == "match_prompt":
+            result = match_prompt(conn, args.arg, args.kind)
+        elif args.op == "search":
+            result = search_rules(conn, args.arg)
+        else:
+            result = stats(conn)
+    finally:
+        conn.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
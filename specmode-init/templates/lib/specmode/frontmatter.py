@@ -0,0 +1,314 @@
+"""
+YAML frontmatter 解析
+
+只读取文件开头的 frontmatter 区域：按块增量读取，遇到结束分隔符 --- 即停止，
+不读取正文；frontmatter 超过 MAX_FRONTMATTER_BYTES 时视为无效。
+
+支持的 YAML 子集（不依赖 pyyaml）:
+    - 嵌套映射（按空格缩进）          metadata:\n  audience: developers
+    - 块标量 | / >（含 - / + 截断标记）  description: |
+    - 流式列表与块列表               globs: ["**/*.go", conf/**/*.toml]
+    - 布尔值与空值                   alwaysApply: true / globs:（空值为 None）
+    - 单引号 / 双引号字符串、# 注释、多行普通标量
+其余标量（包括数字）一律作为字符串返回。格式错误时抛出 ValueError。
+
+flow_keys 限定哪些键的 [...] 值按流式列表解析，其余键保留原文：规则模板中
+description: [规则描述] 这类占位写法仍是字符串。
+"""
+
+import re
+from pathlib import Path
+from typing import Optional
+
+# frontmatter 大小上限
+MAX_FRONTMATTER_BYTES = 64 * 1024
+
+# 增量读取的块大小
+READ_CHUNK_SIZE = 4096
+
+_DELIMITER = b"---"
+# 结束分隔符：独占一行的 ---（允许行尾空白），文件末尾可以没有换行
+_CLOSING_RE = re.compile(rb"\n---[ \t\r\f\v]*(?:\n|\Z)")
+_CLOSING_TEXT_RE = re.compile(r"\n---[ \t\r\f\v]*(?:\n|\Z)")
+# 映射键：引号键或普通键，冒号后须为空白或行尾
+_KEY_RE = re.compile(r"""(?:"([^"]*)"|'([^']*)'|([^\s"'#\-\[\]{}][^:#]*?|-[^\s:#][^:#]*?))[ \t]*:(?=[ \t]|$)""")
+# 块标量头：| 或 >，可带截断标记与缩进数字
+_BLOCK_RE = re.compile(r"([|>])([+-]?)[1-9]?[+-]?[ \t]*(?:#.*)?$")
+# 普通标量中的行内注释
+_COMMENT_RE = re.compile(r"[ \t]+#.*$")
+# 双引号字符串中的转义
+_ESCAPE_RE = re.compile(r'\\(.)')
+_ESCAPES = {"n": "\n", "t": "\t", "r": "\r", "0": "\0", '"': '"', "\\": "\\", "/": "/", " ": " "}
+
+# 行：缩进 + 内容
+_LINE_RE = re.compile(r"^( *)([^\n]*)", re.M)
+
+_BOOLEANS = {"true": True, "True": True, "TRUE": True, "false": False, "False": False, "FALSE": False}
+_NULLS = {"", "~", "null", "Null", "NULL"}
+# 需要特殊处理的标量开头字符
+_SPECIAL_STARTS = frozenset("\"'[|>#")
+
+
+def read_frontmatter_text(path: Path, max_bytes: int = MAX_FRONTMATTER_BYTES) -> Optional[str]:
+    """
+    读取文件的 frontmatter 原文（不含分隔符），没有 frontmatter 时返回 None
+
+    超过 max_bytes 仍未找到结束分隔符时抛出 ValueError。
+    """
+    with open(str(path), "rb") as f:
+        buffer = f.read(len(_DELIMITER))
+        if buffer != _DELIMITER:
+            return None
+        searched = len(_DELIMITER)
+        while True:
+            chunk = f.read(READ_CHUNK_SIZE)
+            buffer += chunk
+            # 从上次搜索位置回退若干字节再找，避免漏掉跨块的分隔符
+            match = _CLOSING_RE.search(buffer, max(len(_DELIMITER), searched - 16))
+            if match and (match.group().endswith(b"\n") or not chunk):
+                text = buffer[len(_DELIMITER):match.start()].decode("utf-8")
+                # 与文本模式读取一致：通用换行符
+                return text.replace("\r\n", "\n").replace("\r", "\n")
+            if not chunk:
+                return None
+            if len(buffer) > max_bytes:
+                raise ValueError(f"frontmatter 超过 {max_bytes} 字节")
+            searched = len(buffer)
+
+
+def split_frontmatter(content: str) -> Optional[str]:
+    """从已读入的文本中取出 frontmatter 原文（不含分隔符）"""
+    if not content.startswith("---"):
+        return None
+    match = _CLOSING_TEXT_RE.search(content, 3)
+    if not match:
+        return None
+    return content[3:match.start()]
+
+
+def _lines(text: str) -> list:
+    """一次正则扫描得到每行的 (行首偏移, 行尾偏移, 缩进)，空白行的缩进为 None"""
+    lines = []
+    length = len(text)
+    for match in _LINE_RE.finditer(text):
+        if match.start() == length and length:
+            # 结尾换行符之后不再有行
+            break
+        content = match.group(2)
+        if content[:1] == "\t":
+            raise ValueError(f"第 {len(lines) + 1} 行使用了制表符缩进")
+        start, content_start = match.span(1)
+        lines.append((start, match.end(), content_start - start if content.strip() else None))
+    return lines
+
+
+def _scalar(token: str, lineno: int):
+    """解析单行标量：引号字符串、布尔值、空值，其余为字符串"""
+    if token[:1] == '"':
+        if len(token) < 2 or not token.endswith('"'):
+            raise ValueError(f"第 {lineno} 行双引号未闭合")
+        return _ESCAPE_RE.sub(lambda m: _ESCAPES.get(m.group(1), m.group()), token[1:-1])
+    if token[:1] == "'":
+        if len(token) < 2 or not token.endswith("'"):
+            raise ValueError(f"第 {lineno} 行单引号未闭合")
+        return token[1:-1].replace("''", "'")
+    token = _COMMENT_RE.sub("", token)
+    if token in _NULLS:
+        return None
+    if token in _BOOLEANS:
+        return _BOOLEANS[token]
+    return token
+
+
+def _flow_list(token: str, lineno: int) -> list:
+    """解析单行流式列表 [a, "b", c]"""
+    token = _COMMENT_RE.sub("", token) if not token.endswith("]") else token
+    if not token.endswith("]"):
+        raise ValueError(f"第 {lineno} 行流式列表未闭合")
+    items = []
+    start = 1
+    quote = None
+    for i in range(1, len(token) - 1):
+        char = token[i]
+        if quote:
+            if char == quote:
+                quote = None
+        elif char in "\"'" and not token[start:i].strip():
+            quote = char
+        elif char == ",":
+            items.append(token[start:i].strip())
+            start = i + 1
+    last = token[start:-1].strip()
+    if last or items:
+        items.append(last)
+    return [_scalar(item, lineno) for item in items]
+
+
+def _block_scalar(text: str, lines: list, index: int, parent_indent: int, style: str, chomp: str) -> tuple:
+    """解析块标量（| 保留换行，> 折叠换行），返回 (值, 下一行下标)"""
+    block_indent = None
+    parts = []
+    while index < len(lines):
+        start, end, indent = lines[index]
+        if indent is not None and indent <= parent_indent:
+            break
+        if indent is not None and block_indent is None:
+            block_indent = indent
+        if block_indent is not None and end - start > block_indent:
+            parts.append(text[start + block_indent:end])
+        else:
+            parts.append("")
+        index += 1
+
+    body_end = len(parts)
+    while body_end and not parts[body_end - 1]:
+        body_end -= 1
+    trailing = len(parts) - body_end
+    body = parts[:body_end]
+
+    if style == "|":
+        value = "\n".join(body)
+    else:
+        # 折叠：相邻的普通行以空格连接，空行变为换行，缩进更深的行保留换行
+        leading = 0
+        while leading < len(body) and not body[leading]:
+            leading += 1
+        body = body[leading:]
+        value = "\n" * leading + body[0] if body else ""
+        for prev, part in zip(body, body[1:]):
+            if not part:
+                value += "\n"
+            elif not prev:
+                value += part
+            elif prev.startswith(" ") or part.startswith(" "):
+                value += "\n" + part
+            else:
+                value += " " + part
+
+    if body and chomp != "-":
+        value += "\n" * (trailing + 1 if chomp == "+" else 1)
+    return value, index
+
+
+def _plain_continuation(text: str, lines: list, index: int, parent_indent: int, value: str) -> tuple:
+    """多行普通标量：缩进更深的后续行折叠为空格，空行折叠为换行"""
+    while index < len(lines):
+        start, end, indent = lines[index]
+        if indent is not None and indent <= parent_indent:
+            break
+        index += 1
+        if indent is None:
+            value += "\n"
+            continue
+        line = _COMMENT_RE.sub("", text[start + indent:end]).rstrip()
+        if line.startswith("#"):
+            continue
+        value += line if value.endswith("\n") else " " + line
+    return value.rstrip("\n"), index
+
+
+def parse_yaml(yaml_content: str, flow_keys: Optional[frozenset] = None) -> Optional[dict]:
+    """
+    单遍解析 frontmatter（YAML 子集），返回带类型的嵌套字典；为空时返回 None
+
+    按行偏移在同一个字符串上切片，不重建行列表。
+    flow_keys 不为 None 时只有其中的键把 [...] 解析为流式列表，其余键的 [...] 保留原文。
+    """
+    text = yaml_content
+    lines = _lines(text)
+    line_count = len(lines)
+    root = {}
+    # 容器栈: (条目缩进, 容器)；根容器的缩进由第一个有效行确定
+    stack = None
+    # 值为空、等待下一行决定是嵌套容器还是 None 的键: (缩进, 所属映射, 键)
+    pending = None
+    index = 0
+
+    while index < line_count:
+        start, end, indent = lines[index]
+        lineno = index + 1
+        index += 1
+        if indent is None:
+            continue
+        content_start = start + indent
+        first = text[content_start]
+        if first == "#":
+            continue
+        is_item = first == "-" and (content_start + 1 == end or text[content_start + 1] == " ")
+
+        if stack is None:
+            stack = [(indent, root)]
+        if pending is not None:
+            pending_indent, owner, key = pending
+            pending = None
+            if indent > pending_indent or is_item and indent == pending_indent:
+                container = [] if is_item else {}
+                owner[key] = container
+                stack.append((indent, container))
+
+        while stack[-1][0] > indent and len(stack) > 1:
+            stack.pop()
+        container_indent, container = stack[-1]
+        is_list = container.__class__ is list
+        if is_list and not is_item and len(stack) > 1 and stack[-2][0] == indent:
+            # 与父映射同缩进的列表（key:\n- a）在下一个键处结束
+            stack.pop()
+            container_indent, container = stack[-1]
+            is_list = False
+        if indent != container_indent:
+            raise ValueError(f"第 {lineno} 行缩进不一致")
+
+        if is_list:
+            if not is_item:
+                raise ValueError(f"第 {lineno} 行应为列表项（- ）")
+            token = text[content_start + 1:end].strip()
+            container.append(_flow_list(token, lineno) if token[:1] == "[" else _scalar(token, lineno))
+            continue
+
+        match = _KEY_RE.match(text, content_start, end)
+        if not match:
+            raise ValueError(f"第 {lineno} 行无法解析: {text[content_start:end].strip()}")
+        key = match.group(match.lastindex)
+        token = text[match.end():end].strip()
+
+        if not token or token[0] == "#":
+            container[key] = None
+            pending = (indent, container, key)
+            continue
+
+        first = token[0]
+        if first in _SPECIAL_STARTS:
+            block = _BLOCK_RE.match(token) if first in "|>" else None
+            if block:
+                container[key], index = _block_scalar(text, lines, index, indent, block.group(1), block.group(2))
+            elif first == "[":
+                container[key] = _flow_list(token, lineno) if flow_keys is None or key in flow_keys else token
+            else:
+                container[key] = _scalar(token, lineno)
+            continue
+
+        value = _scalar(token, lineno) if "#" in token or token in _NULLS or token in _BOOLEANS else token
+        if value.__class__ is str and index < line_count:
+            next_indent = lines[index][2]
+            if next_indent is None or next_indent > indent:
+                value, index = _plain_continuation(text, lines, index, indent, value)
+        container[key] = value
+
+    return root if root else None
+
+
+def parse_frontmatter(content: str, flow_keys: Optional[frozenset] = None) -> Optional[dict]:
+    """解析文本开头的 YAML frontmatter（flow_keys 见 parse_yaml）"""
+    yaml_content = split_frontmatter(content)
+    if yaml_content is None:
+        return None
+    return parse_yaml(yaml_content, flow_keys)
+
+
+def read_frontmatter(path: Path, max_bytes: int = MAX_FRONTMATTER_BYTES,
+                     flow_keys: Optional[frozenset] = None) -> Optional[dict]:
+    """只读取文件头部并解析 YAML frontmatter（不读取正文；flow_keys 见 parse_yaml）"""
+    yaml_content = read_frontmatter_text(path, max_bytes)
+    if yaml_content is None:
+        return None
+    return parse_yaml(yaml_content, flow_keys)
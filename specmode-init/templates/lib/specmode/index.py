@@ -0,0 +1,145 @@
+"""
+索引表格增量更新
+
+SKILLS_INDEX.md / RULES_INDEX.md 中的条目表格按表头定位，只替换表格行，
+表格之外的内容（标题、说明、用户追加的章节）保持原样：
+
+- 按条目名比较新旧表格行，报告新增 / 移除 / 修改
+- 输出与现有文件逐字节相同时不写入，避免无谓地唤醒文件监听
+- 文件末尾嵌入生成戳（生成器版本 + 全部输入文件的路径与内容哈希），
+  --check 只凭 stat 与缓存即可判断索引是否过期，无需扫描校验
+"""
+
+import os
+import re
+from pathlib import Path
+from typing import Callable, Optional
+
+# 表格行的首列（条目名）
+_ROW_NAME_RE = re.compile(r'^\| (.+?) \|')
+
+# 生成戳所在行
+_STAMP_RE = re.compile(r'^<!-- specmode-stamp: ([0-9a-f]{64}) -->$', re.M)
+
+
+def compute_stamp(version: int, inputs: list) -> str:
+    """生成戳：生成器版本与排序后的 [(输入路径, 内容哈希)] 的 sha256"""
+    import hashlib
+
+    digest = hashlib.sha256(f"specmode-index v{version}\n".encode("utf-8"))
+    for key, sha256 in sorted(inputs):
+        digest.update(f"{key}\0{sha256}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def entries_stamp(version: int, entries: dict) -> str:
+    """由扫描后的缓存条目（每个输入文件一条，含内容哈希）计算生成戳"""
+    return compute_stamp(version, [(key, record["sha256"]) for key, record in entries.items()])
+
+
+def read_stamp(content: str) -> Optional[str]:
+    """读取索引内容中的生成戳，没有时返回 None"""
+    match = _STAMP_RE.search(content)
+    return match.group(1) if match else None
+
+
+def set_stamp(content: str, stamp: str) -> str:
+    """替换（没有时在文件末尾追加）生成戳"""
+    line = f"<!-- specmode-stamp: {stamp} -->"
+    if _STAMP_RE.search(content):
+        return _STAMP_RE.sub(line, content, count=1)
+    return content.rstrip("\n") + "\n\n" + line + "\n"
+
+
+def check_stamp(index_file: Path, version: int, inputs: list, entries: dict) -> tuple:
+    """
+    判断索引是否过期
+
+    inputs 为 [(缓存键, 文件路径)]，内容哈希取自缓存（stat 签名一致时，见 cache.current_sha256）。
+    返回 (是否最新, 索引中的生成戳或 None)。
+    """
+    from specmode import cache
+
+    try:
+        found = read_stamp(index_file.read_text(encoding="utf-8"))
+    except FileNotFoundError:
+        return False, None
+    if found is None:
+        return False, None
+    hashes = []
+    for key, path in inputs:
+        try:
+            hashes.append((key, cache.current_sha256(entries, key, path)))
+        except OSError:
+            continue  # 与扫描一致：读取不到的文件不进入生成戳
+    return compute_stamp(version, hashes) == found, found
+
+
+def split_table(content: str, header: str) -> Optional[tuple]:
+    """
+    按表头定位条目表格
+
+    返回 (表格前的行（含表头与分隔行）, [(条目名, 表格行)], 表格后的行)，找不到表头时返回 None。
+    """
+    lines = content.split("\n")
+    try:
+        start = lines.index(header)
+    except ValueError:
+        return None
+    if start + 1 >= len(lines) or not lines[start + 1].startswith("|-"):
+        return None
+    end = start + 2
+    rows = []
+    while end < len(lines) and lines[end].startswith("|"):
+        match = _ROW_NAME_RE.match(lines[end])
+        rows.append((match.group(1) if match else None, lines[end]))
+        end += 1
+    return lines[:start + 2], rows, lines[end:]
+
+
+def diff_rows(old_rows: list, new_rows: list) -> dict:
+    """比较新旧表格行，返回 {"added", "removed", "modified"}（均为排序后的条目名）"""
+    old = {name: row for name, row in old_rows if name is not None}
+    new = {name: row for name, row in new_rows}
+    return {
+        "added": sorted(new.keys() - old.keys()),
+        "removed": sorted(old.keys() - new.keys()),
+        "modified": sorted(name for name in new.keys() & old.keys() if new[name] != old[name]),
+    }
+
+
+def patch_index(index_file: Path, header: str, rows: list, generate: Callable[[], str],
+                stamp: str = None) -> tuple:
+    """
+    计算索引文件的新内容
+
+    rows 为 [(条目名, 表格行)]；现有文件中找不到表头时调用 generate() 生成完整内容。
+    stamp 不为 None 时写入生成戳（见 compute_stamp）。
+    返回 (差异, 新内容)，新内容与现有文件相同时为 None。
+    """
+    try:
+        content = index_file.read_text(encoding="utf-8")
+    except FileNotFoundError:
+        content = None
+
+    parts = split_table(content, header) if content is not None else None
+    if parts is None:
+        diff = diff_rows([], rows)
+        new_content = generate()
+    else:
+        before, old_rows, after = parts
+        diff = diff_rows(old_rows, rows)
+        new_content = "\n".join(before + [row for _, row in rows] + after)
+    if stamp is not None:
+        new_content = set_stamp(new_content, stamp)
+
+    if new_content == content:
+        return diff, None
+    return diff, new_content
+
+
+def write_index(index_file: Path, content: str):
+    """原子写入索引文件"""
+    tmp_file = index_file.with_name(f".{index_file.name}.{os.getpid()}.tmp")
+    tmp_file.write_text(content, encoding="utf-8")
+    os.replace(str(tmp_file), str(index_file))
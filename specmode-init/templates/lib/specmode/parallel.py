@@ -0,0 +1,58 @@
+"""
+并行校验
+
+同步脚本的 --jobs / --executor 使用：结果顺序与输入顺序一致，
+生成的索引与串行模式逐字节相同。
+
+- thread: 线程池，适合网络文件系统等 I/O 受限的场景
+- process: 进程池，适合校验以正则 / 解析为主、受 GIL 限制的场景
+"""
+
+import os
+from typing import Callable, Iterator
+
+EXECUTORS = ("thread", "process")
+
+
+def default_jobs() -> int:
+    """默认工作线程 / 进程数（CPU 核数）"""
+    return os.cpu_count() or 1
+
+
+def map_ordered(func: Callable, items: list, jobs: int = 1, executor: str = "thread") -> list:
+    """
+    对 items 逐个调用 func，按输入顺序返回结果
+
+    jobs <= 1 或只有一个条目时串行执行；process 模式下 func 必须是模块级函数。
+    """
+    return list(imap_ordered(func, items, jobs, executor))
+
+
+def imap_ordered(func: Callable, items: list, jobs: int = 1, executor: str = "thread") -> Iterator:
+    """
+    同 map_ordered，但逐个产出结果：每个结果（及其之前的全部结果）完成后立即产出，供流式输出使用
+
+    提前关闭迭代器时等待已提交的任务结束后再关闭线程 / 进程池。
+    """
+    items = list(items)
+    if jobs is None:
+        jobs = default_jobs()
+    if jobs <= 1 or len(items) <= 1:
+        for item in items:
+            yield func(item)
+        return
+    if executor not in EXECUTORS:
+        raise ValueError(f"未知的执行器: {executor}")
+
+    # concurrent.futures 导入较慢，只在真正并行时导入
+    from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+    jobs = min(jobs, len(items))
+    if executor == "thread":
+        with ThreadPoolExecutor(max_workers=jobs) as pool:
+            yield from pool.map(func, items)
+        return
+    # 进程间传递有开销，按块分发
+    chunksize = max(1, len(items) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        yield from pool.map(func, items, chunksize=chunksize)
@@ -0,0 +1,57 @@
+"""
+.comate 目录定位
+
+一份安装的工具（zipapp 或任意位置的 lib/）可以服务多个项目：
+各命令通过 --root 指定项目目录（或 .comate 目录本身），未指定时从当前目录向上查找。
+"""
+
+import importlib
+import importlib.util
+import sys
+from pathlib import Path
+
+COMATE_DIR_NAME = ".comate"
+
+# 技能脚本模块所在目录（相对于 .comate/）；打包为 zipapp 时这些模块位于归档根目录
+SCRIPT_DIRS = {
+    "sync_skills": Path("skills") / "skill-creator" / "scripts",
+    "init_skill": Path("skills") / "skill-creator" / "scripts",
+    "sync_rules": Path("skills") / "rules-creator" / "scripts",
+    "init_rule": Path("skills") / "rules-creator" / "scripts",
+}
+
+
+def find_comate(root: Path = None) -> Path:
+    """
+    返回 .comate 目录
+
+    root 可以是项目目录或 .comate 目录本身；为 None 时从当前目录向上查找。找不到时抛出 ValueError。
+    """
+    if root is not None:
+        root = Path(root).resolve()
+        if root.name == COMATE_DIR_NAME and root.is_dir():
+            return root
+        if (root / COMATE_DIR_NAME).is_dir():
+            return root / COMATE_DIR_NAME
+        raise ValueError(f"未找到 .comate 目录: {root}")
+
+    current = Path.cwd().resolve()
+    for directory in [current] + list(current.parents):
+        if directory.name == COMATE_DIR_NAME:
+            return directory
+        if (directory / COMATE_DIR_NAME).is_dir():
+            return directory / COMATE_DIR_NAME
+    raise ValueError(f"当前目录及其上级目录中没有 .comate: {current}")
+
+
+def import_script(name: str, comate_dir: Path):
+    """
+    导入技能脚本模块（sync_skills / sync_rules / init_skill / init_rule）
+
+    已可直接导入（随 zipapp 打包）时使用打包的版本，否则从 .comate 中的技能目录导入。
+    """
+    if name not in sys.modules and importlib.util.find_spec(name) is None:
+        scripts_dir = str(comate_dir / SCRIPT_DIRS[name])
+        if scripts_dir not in sys.path:
+            sys.path.insert(0, scripts_dir)
+    return importlib.import_module(name)
@@ -0,0 +1,110 @@
+"""
+同步脚本的机器可读输出（--format json / ndjson）
+
+- ndjson: 每个条目校验完成后输出一行 {"type": "entry", ...}，最后一行 {"type": "summary", ...}
+- json:   单个 JSON 文档 {"entries": [...], "summary": {...}}，同样边校验边输出
+- quiet:  不输出条目，只输出汇总
+- --check: 输出单个 {"type": "check", ...} 记录
+
+输出先写入内存缓冲，累计到 FLUSH_BYTES 再一次写出（大量条目时减少系统调用）；
+输出到终端时逐条刷新，便于观察进度。
+"""
+
+import json
+import sys
+
+FORMATS = ("text", "json", "ndjson")
+
+# 缓冲区达到该大小时写出
+FLUSH_BYTES = 64 * 1024
+
+
+def _dumps(record: dict) -> str:
+    """紧凑 JSON（保留中文）"""
+    return json.dumps(record, ensure_ascii=False, separators=(",", ":"))
+
+
+def write_buffered(state: dict, text: str, force: bool = False):
+    """写入缓冲区，达到阈值、输出到终端或 force 时写出"""
+    state["buffer"].append(text)
+    state["size"] += len(text)
+    if force or state["tty"] or state["size"] >= FLUSH_BYTES:
+        state["stream"].write("".join(state["buffer"]))
+        state["stream"].flush()
+        state["buffer"] = []
+        state["size"] = 0
+
+
+def open_report(fmt: str, quiet: bool = False, stream=None) -> dict:
+    """开始一份 json / ndjson 报告"""
+    if fmt not in ("json", "ndjson"):
+        raise ValueError(f"未知的输出格式: {fmt}")
+    stream = stream or sys.stdout
+    state = {
+        "format": fmt, "quiet": quiet, "stream": stream, "buffer": [], "size": 0, "count": 0,
+        "tty": hasattr(stream, "isatty") and stream.isatty(),
+    }
+    if fmt == "json":
+        write_buffered(state, '{"entries":[')
+    return state
+
+
+def write_entry(state: dict, record: dict):
+    """输出一个条目（quiet 时忽略）"""
+    if state["quiet"]:
+        return
+    if state["format"] == "ndjson":
+        write_buffered(state, _dumps(dict(record, type="entry")) + "\n")
+    else:
+        write_buffered(state, ("," if state["count"] else "") + "\n" + _dumps(record))
+    state["count"] += 1
+
+
+def finish_report(state: dict, summary: dict):
+    """输出汇总并写出全部缓冲"""
+    if state["format"] == "ndjson":
+        write_buffered(state, _dumps(dict(summary, type="summary")) + "\n", force=True)
+    else:
+        write_buffered(state, "\n],\"summary\":" + _dumps(summary) + "}\n", force=True)
+
+
+def write_record(record: dict, stream=None):
+    """输出单个记录（如 --check 的结果），json 与 ndjson 格式相同"""
+    stream = stream or sys.stdout
+    stream.write(_dumps(record) + "\n")
+    stream.flush()
+
+
+def entry_record(kind: str, result: dict) -> dict:
+    """校验结果 → 条目记录"""
+    return {
+        "kind": kind,
+        "name": result["name"],
+        "status": result["status"],
+        "errors": result["errors"],
+        "warnings": result["warnings"],
+    }
+
+
+def summary_record(kind: str, results: list, diff: dict = None, index_name: str = None) -> dict:
+    """扫描结果与索引差异 → 汇总记录"""
+    counts = {"pass": 0, "warn": 0, "error": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    summary = {"kind": kind, "total": len(results)}
+    summary.update(counts)
+    if diff is not None:
+        summary["index"] = {
+            "file": index_name,
+            "added": diff["added"],
+            "removed": diff["removed"],
+            "modified": diff["modified"],
+            "written": diff["written"],
+            "dry_run": diff["dry_run"],
+        }
+    return summary
+
+
+def check_record(kind: str, index_name: str, fresh: bool, stamp: str = None) -> dict:
+    """--check 的结果 → 检查记录"""
+    return {"type": "check", "kind": kind, "index": index_name, "fresh": fresh, "stamp": stamp}
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+规则检索（BM25）
+
+触发词路由（见 specmode.triggers）只认完整出现的关键词，"改一下用户登录接口" 这类模糊请求
+往往一个词也不命中。这里对规则的相关关键词、description 与 Markdown 标题建立倒排索引，
+按 BM25 打分返回最相关的规则。
+
+- 分词：先按 specmode.triggers.normalize 归一化；连续的中文切为相邻二字组（bigram，单字保留为一元），
+  ASCII 按字母 / 数字切词（"user_login"、"user-login" 均切为 user、login）
+- 字段权重：关键词 ×3、标题 ×2、description ×1（词频乘以权重，文档长度为加权词频之和）
+- 倒排表保存在 SQLite 目录（见 specmode.db 的 postings / documents 表），随规则条目增量更新：
+  内容未变化的规则不重新分词；校验出错的规则不进入索引
+
+用法:
+    python3 .comate/lib/specmode/search.py [--root DIR] [--limit N] "改一下用户登录接口"
+"""
+
+import argparse
+import heapq
+import json
+import math
+import re
+import sys
+from pathlib import Path
+
+if __name__ == "__main__" and not __package__:
+    # 作为脚本运行：把 .comate/lib/ 加入导入路径
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from specmode import triggers
+
+# BM25 参数
+K1 = 1.2
+B = 0.75
+
+# 字段 → 词频权重
+FIELD_WEIGHTS = {"keywords": 3, "headings": 2, "description": 1}
+
+# 默认返回的规则数
+DEFAULT_LIMIT = 10
+
+# ASCII 单词 | 连续的中日韩统一表意文字（含扩展 A 区与兼容区）
+_TOKEN_RE = re.compile(r"([0-9a-z]+)|([\u3400-\u4dbf\u4e00-\u9fff\uf900-\ufaff]+)")
+
+
+def tokenize(text: str) -> list:
+    """归一化后切词：ASCII 单词 + 中文二字组"""
+    tokens = []
+    for word, han in _TOKEN_RE.findall(triggers.normalize(text)):
+        if word:
+            tokens.append(word)
+        elif len(han) == 1:
+            tokens.append(han)
+        else:
+            tokens += [han[i:i + 2] for i in range(len(han) - 1)]
+    return tokens
+
+
+def document_terms(keywords: list, headings: list, description: str) -> dict:
+    """规则各字段 → {词: 加权词频}"""
+    terms = {}
+    # 逐个关键词 / 标题分词：归一化会去掉中文之间的空白，拼接后会产生跨词的二字组
+    fields = {"keywords": keywords, "headings": headings, "description": [description]}
+    for field, texts in fields.items():
+        weight = FIELD_WEIGHTS[field]
+        for text in texts:
+            for token in tokenize(text):
+                terms[token] = terms.get(token, 0) + weight
+    return terms
+
+
+def query_terms(query: str) -> list:
+    """查询 → 去重后的词（保持出现顺序）"""
+    return list(dict.fromkeys(tokenize(query)))
+
+
+def rank(postings: dict, count: int, total_length: int, limit: int = DEFAULT_LIMIT) -> list:
+    """
+    BM25 打分
+
+    postings 为 {词: [(文档, 加权词频, 文档长度)]}，count / total_length 为全部文档数与长度之和；
+    返回 [(文档, 得分)]，按得分降序（同分按文档排序），最多 limit 个。
+    """
+    if not count:
+        return []
+    average = total_length / count or 1
+    scores = {}
+    for found in postings.values():
+        if not found:
+            continue
+        idf = math.log(1 + (count - len(found) + 0.5) / (len(found) + 0.5))
+        for document, tf, length in found:
+            norm = K1 * (1 - B + B * length / average)
+            scores[document] = scores.get(document, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+    def order(item):
+        return -item[1], item[0]
+
+    if limit is None:
+        return sorted(scores.items(), key=order)
+    return heapq.nsmallest(limit, scores.items(), key=order)
+
+
+def main(argv: list = None):
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="按 BM25 检索与请求相关的规则",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        help="项目目录或 .comate 目录（默认本文件所在的 .comate）"
+    )
+    parser.add_argument("query", help="用户请求文本")
+    parser.add_argument("--limit", type=int, default=DEFAULT_LIMIT, help=f"最多返回的规则数（默认 {DEFAULT_LIMIT}）")
+    args = parser.parse_args(argv)
+    if args.limit < 0:
+        parser.error("--limit 不能为负数")
+
+    from specmode import db, paths
+
+    try:
+        comate_dir = paths.find_comate(args.root) if args.root else Path(__file__).resolve().parents[2]
+        conn = db.connect(db.db_path(comate_dir), create=False)
+    except (ValueError, db.CatalogError) as e:
+        print(f"❌ 错误：{e}")
+        sys.exit(1)
+    try:
+        result = db.search_rules(conn, args.query, args.limit)
+    finally:
+        conn.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,214 @@
+"""
+同步脚本的公共流程
+
+sync_skills.py / sync_rules.py 只在校验规则、索引行格式与条目列举上不同，
+命令行参数、目录数据库写入、--check、--self-check 与 --watch 的流程由本模块按条目类型复用。
+
+条目类型描述（由各同步脚本定义）:
+    {
+        "kind": "skill" / "rule"（目录数据库与机器可读输出中的类型）,
+        "label": 条目的中文名（"技能" / "规则"）,
+        "dir": .comate 下的条目目录名,
+        "index": 索引文件名,
+        "script": 脚本文件名（用于提示信息）,
+        "version": 校验器版本（缓存、生成戳与目录数据库共用）,
+        "inputs": 函数 (条目目录) -> [(缓存键, 输入文件路径)]，--check 时列举输入文件,
+        "scan": 函数 (条目目录, 缓存条目, jobs, executor) -> 校验结果,
+        "update_index": 函数 (条目目录, 校验结果, stamp=, rows=) -> 索引变化
+    }
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+
+from specmode import cache, changes, db, index, parallel, report
+
+
+def build_parser(spec: dict, doc: str) -> argparse.ArgumentParser:
+    """同步脚本的命令行参数（doc 为脚本的模块文档，作为帮助信息的结尾）"""
+    label, index_name = spec["label"], spec["index"]
+    parser = argparse.ArgumentParser(
+        description=f"扫描校验{label}并更新 {index_name}",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=doc
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        help="项目目录或 .comate 目录（默认本脚本所在的 .comate）"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help=f"仅扫描校验，不更新 {index_name}，也不写入缓存与目录数据库"
+    )
+    parser.add_argument(
+        "--no-cache",
+        action="store_true",
+        help="不读取也不写入 .comate/.cache/ 中的校验结果缓存"
+    )
+    parser.add_argument(
+        "--jobs", "-j",
+        type=int,
+        default=1,
+        help="并行校验的工作线程 / 进程数（默认 1；0 表示 CPU 核数）"
+    )
+    parser.add_argument(
+        "--executor",
+        choices=parallel.EXECUTORS,
+        default="thread",
+        help="并行方式：thread（I/O 受限）或 process（解析 / 正则受限），默认 thread"
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help=f"常驻监听 .comate/{spec['dir']}/，变化时增量更新 {index_name}（Ctrl-C 退出）"
+    )
+    parser.add_argument(
+        "--poll",
+        action="store_true",
+        help="--watch 时强制使用轮询代替 inotify"
+    )
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help=f"只检查 {index_name} 是否过期（不扫描校验、不写入），过期时退出码为 1"
+    )
+    parser.add_argument(
+        "--format",
+        choices=report.FORMATS,
+        default="text",
+        help="输出格式：text（默认）、json 或 ndjson（逐条流式输出校验结果，最后输出汇总）"
+    )
+    parser.add_argument(
+        "--quiet", "-q",
+        action="store_true",
+        help="不输出逐条结果，只输出统计"
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REV",
+        help=f"只重新校验相对 REV 有变化的{label}（git diff REV 与未跟踪文件），其余使用缓存结果"
+    )
+    parser.add_argument(
+        "--staged",
+        action="store_true",
+        help=f"只重新校验 git 已暂存变化涉及的{label}，其余使用缓存结果"
+    )
+    parser.add_argument(
+        "--self-check",
+        action="store_true",
+        help="同步后全量重新扫描校验（不使用缓存）并与本次结果比对，不一致时退出码为 1"
+    )
+    return parser
+
+
+def check_args(parser: argparse.ArgumentParser, args: argparse.Namespace):
+    """检查互斥的参数组合（出错时由 parser.error 退出）"""
+    if args.watch and args.dry_run:
+        parser.error("--watch 不能与 --dry-run 同时使用")
+    if args.check and (args.watch or args.dry_run):
+        parser.error("--check 不能与 --watch / --dry-run 同时使用")
+    if args.watch and args.format != "text":
+        parser.error("--watch 只支持 --format text")
+    if args.since is not None and args.staged:
+        parser.error("--since 不能与 --staged 同时使用")
+    scoped = args.since is not None or args.staged
+    if (scoped or args.self_check) and (args.watch or args.check):
+        parser.error("--since / --staged / --self-check 不能与 --watch / --check 同时使用")
+    if scoped and args.no_cache:
+        parser.error("--since / --staged 需要复用缓存中的校验结果，不能与 --no-cache 同时使用")
+
+
+def catalog_rows(spec: dict, directory: Path, results: list, entries: dict, dry_run: bool = False) -> list:
+    """
+    在一个事务中把扫描结果写入 SQLite 目录（见 specmode.db），返回由目录渲染的索引表格行
+
+    --dry-run 时不打开数据库（不创建文件），与数据库不可用时一样返回 None（索引由扫描结果直接渲染）。
+    """
+    if dry_run:
+        return None
+    try:
+        return db.update_entries(db.db_path(directory.parent), spec["kind"], results, entries, spec["version"])
+    except db.CatalogError as e:
+        print(f"⚠️  目录数据库不可用，索引由扫描结果直接生成: {e}", file=sys.stderr)
+        return None
+
+
+def check_index(spec: dict, directory: Path, entries: dict) -> tuple:
+    """按 stat 与签名缓存检查索引的生成戳，返回 (是否最新, 索引中的生成戳或 None)"""
+    return index.check_stamp(directory / spec["index"], spec["version"], spec["inputs"](directory), entries)
+
+
+def run_check(spec: dict, directory: Path, entries: dict, fmt: str = "text"):
+    """--check：输出索引是否过期并退出（过期时退出码为 1）"""
+    index_name = spec["index"]
+    fresh, found = check_index(spec, directory, entries)
+    if fmt != "text":
+        report.write_record(report.check_record(spec["kind"], index_name, fresh, found))
+        sys.exit(0 if fresh else 1)
+    if fresh:
+        print(f"✅ {index_name} 是最新的")
+        sys.exit(0)
+    if found is None:
+        print(f"❌ {index_name} 中没有生成戳，请运行 {spec['script']} 重新生成")
+    else:
+        print(f"❌ {index_name} 已过期，请运行 {spec['script']} 更新")
+    sys.exit(1)
+
+
+def self_check(spec: dict, directory: Path, results: list, stamp: str, jobs: int = 1,
+               executor: str = "thread") -> list:
+    """
+    不使用缓存全量重新扫描校验，与增量结果比对
+
+    返回结果不一致的条目名；生成戳不一致时还包含索引文件名。
+    索引由校验结果与生成戳决定，两者一致即索引一致。
+    """
+    entries = {}
+    expected = spec["scan"](directory, entries, jobs, executor)
+    mismatched = changes.diff_results(results, expected)
+    if index.entries_stamp(spec["version"], entries) != stamp:
+        mismatched.append(spec["index"])
+    return mismatched
+
+
+def watch_index(spec: dict, directory: Path, entries: dict, cache_file: Path = None, jobs: int = 1,
+                executor: str = "thread", force_poll: bool = False):
+    """常驻监听条目目录：每批变化重新扫描一次（未变化的条目命中内存缓存，不重新读取）"""
+    index_name = spec["index"]
+    index_file = str(directory / index_name)
+
+    def rebuild(changed):
+        if changed is not None:
+            # 自身写入索引产生的事件不触发重建
+            changed.discard(index_file)
+            if not changed:
+                return
+        results = spec["scan"](directory, entries, jobs, executor)
+        if cache_file is not None:
+            cache.save_cache(cache_file, spec["version"], entries)
+        diff = spec["update_index"](
+            directory, results, stamp=index.entries_stamp(spec["version"], entries),
+            rows=catalog_rows(spec, directory, results, entries)
+        )
+
+        stamp = time.strftime("%H:%M:%S")
+        source = "事件丢失，全量扫描" if changed is None else f"{len(changed)} 个路径变化"
+        batch = [f"+{name}" for name in diff["added"]]
+        batch += [f"-{name}" for name in diff["removed"]]
+        batch += [f"~{name}" for name in diff["modified"]]
+        if len(batch) > 10:
+            batch = batch[:10] + [f"等 {len(batch)} 项"]
+        status = "已更新" if diff["written"] else "无变化"
+        print(f"🔄 [{stamp}] {source} → {index_name} {status} {' '.join(batch)}".rstrip())
+        for r in results:
+            if r["status"] == "error":
+                print(f"   ❌ {r['name']} - 错误: {'; '.join(r['errors'])}")
+
+    from specmode import watch  # 只有 --watch 需要
+
+    watch.watch_loop(directory, rebuild, force_poll=force_poll)
+
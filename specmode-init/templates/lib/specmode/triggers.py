@@ -0,0 +1,256 @@
+#!/usr/bin/env python3
+"""
+触发词路由（Aho-Corasick）
+
+把技能的 **触发词** 与规则的相关关键词编译为一个 Aho-Corasick 自动机，
+对用户请求只做一遍线性扫描即可找出全部命中的词，与触发词个数无关。
+
+- 归一化：NFKC（全角 / 半角统一）、casefold（大小写）、繁体 → 简体（常用字对照表）、连续空白合并为一个空格，
+  中文等非 ASCII 字符两侧的空白去掉（"同步 skills" 与 "同步skills" 等价）；触发词与请求使用同一归一化
+- 排序：命中词的归一化长度之和（长词更具体）降序，其次命中词个数，再按类型（技能在前）与名称
+- 同步脚本在 SQLite 目录（见 specmode.db）的条目变化时重建自动机，写入 catalog.db 旁的 triggers.json；
+  文件中的 generation 与数据库 meta 表一致，不一致（或文件缺失）时查询方由数据库重新构建，结果不会过期
+
+自动机（内存中）:
+
+    {"format": 2, "generation": 代数,
+     "terms": {"words": [原词], "lengths": [归一化长度], "kinds": [类型], "names": [名称]},
+     "goto": {状态 << 21 | 字符码: 状态}, "fail": [失败指针],
+     "out": {状态: [以该状态结尾的词序号]}, "link": {状态: 失败链上最近的有输出的状态}}
+
+转移表是以整数为键的单个字典（而不是每个状态一个字典），输出只记录在词的末状态、沿 link 收集，
+文件中以平行的整数列表保存，加载时不需要为每个状态构造对象。
+
+用法:
+    python3 .comate/lib/specmode/triggers.py [--root DIR] [--kind skill|rule] [--limit N] "新建一个技能模板"
+"""
+
+import argparse
+import json
+import re
+import sys
+import unicodedata
+from pathlib import Path
+
+if __name__ == "__main__" and not __package__:
+    # 作为脚本运行：把 .comate/lib/ 加入导入路径
+    sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from specmode import cache
+
+AUTOMATON_FORMAT = 2
+
+AUTOMATON_NAME = "triggers.json"
+
+# 繁体 → 简体（常用字，一对一；一简对多繁、含义有分歧的字如 著 / 乾 不转换）
+_T2S_PAIRS = """
+這这 個个 們们 來来 時时 會会 對对 說说 還还 經经 進进 過过 開开 關关 發发 現现 點点 後后 從从 頭头
+問问 題题 應应 該该 與与 將将 為为 實实 際际 體体 驗验 證证 據据 當当 變变 數数 庫库 檔档 資资 設设
+組组 態态 環环 執执 測测 試试 單单 錯错 誤误 異异 處处 請请 響响 務务 戶户 網网 絡络 連连 線线 協协
+議议 規规 則则 範范 標标 準准 樣样 編编 輯辑 檢检 審审 導导 匯汇 載载 讀读 寫写 刪删 創创 掃扫 觸触
+詞词 鍵键 場场 專专 項项 團团 隊队 員员 劃划 術术 語语 義义 邏逻 運运 機机 學学 習习 訊讯 傳传 遞递
+並并 緒绪 記记 憶忆 儲储 緩缓 衝冲 區区 塊块 鏈链 結结 構构 層层 級级 類类 參参 預预 選选 擇择 權权
+認认 錄录 註注 冊册 帳帐 號号 碼码 產产 質质 監监 報报 統统 計计 圖图 顯显 視视 頁页 屬属 轉转 換换
+簡简 優优 負负 擴扩 縮缩 壓压 籤签 歷历 曆历 佈布 釋释 譯译 啟启 動动 職职 責责 內内 勢势 條条 狀状
+況况 訂订 買买 賣卖 價价 錢钱 費费 額额 銀银 讓让 給给 嗎吗 麼么 種种 兩两 裡里 裏里 邊边 業业 門门
+間间 閱阅 覽览 聽听 見见 覺觉 親亲 觀观 順顺 須须 領领 頻频 顏颜 風风 飛飞 馬马 魚鱼 鳥鸟 麥麦 黃黄
+齊齐 齒齿 龍龙 龜龟 電电 雲云 陽阳 陰阴 隨随 險险 雜杂 雙双 難难 離离 鐘钟 鋼钢 鎖锁 長长 閉闭 閒闲
+陣阵 陸陆 韓韩 飯饭 飲饮 餘余 館馆 髮发 鬥斗 魯鲁 鮮鲜 黨党 齡龄 夾夹 鏡镜 節节 叢丛 調调 佇伫 疊叠
+棧栈 樹树 湊凑 尋寻 濾滤 驅驱 蓋盖 維维 護护 遷迁 紀纪 遊游 戲戏 購购 車车 倉仓 輸输 貨货 寶宝 貝贝
+郵邮 盤盘 閘闸 牆墙 書书 鑰钥 簽签 憑凭 話话 詢询 併并 競竞 爭争 舉举 冪幂 補补 償偿 斷断 藍蓝 綠绿
+絲丝 衛卫 紅红 圓圆 寬宽 細细 彈弹 鈕钮 欄栏 側侧 頂顶 適适 瀏浏 繼继 裝装 飾饰 廠厂 沒没 無无 愛爱
+東东 萬万 億亿 歲岁 樂乐 氣气 漢汉 滿满 遠远 鐵铁 陳陈 隱隐 靜静 顧顾 願愿 驚惊 髒脏 鬆松 麗丽 歡欢
+歸归 殺杀 決决 減减 濟济 灣湾 爾尔 獨独 畫画 療疗 盡尽 確确 礎础 禮礼 稱称 積积 穩稳 筆笔 糧粮 約约
+純纯 紙纸 紹绍 終终 絕绝 綜综 緊紧 練练 縣县 總总 績绩 續续 罷罢 聯联 聲声 肅肃 腦脑 臺台 興兴 艱艰
+莊庄 華华 葉叶 蘇苏 蟲虫 製制 複复 許许 訪访 診诊 詳详 誠诚 課课 談谈 論论 諮咨 講讲 謝谢 識识 豐丰
+財财 貢贡 賽赛 趕赶 軌轨 軟软 較较 輕轻 農农 週周 達达 違违 遺遗 鄉乡 醫医 針针 鉤钩 銷销 鋪铺 閃闪
+閣阁 階阶 雖虽 雞鸡 靈灵 韌韧 鬧闹 麵面 係系 繫系 隻只 徵征 於于 衆众 眾众
+"""
+
+
+def _t2s_table() -> dict:
+    """由对照表构造 str.translate 使用的映射"""
+    table = {}
+    for pair in _T2S_PAIRS.split():
+        table[ord(pair[0])] = pair[1]
+    return table
+
+
+_T2S = _t2s_table()
+
+# 非 ASCII 字符两侧的空格
+_CJK_SPACE_RE = re.compile(r"(?<=[^\x00-\x7f]) | (?=[^\x00-\x7f])")
+
+
+def normalize(text: str) -> str:
+    """归一化触发词 / 请求文本（全角 / 半角、大小写、繁简、空白）"""
+    text = unicodedata.normalize("NFKC", text).casefold().translate(_T2S)
+    return _CJK_SPACE_RE.sub("", " ".join(text.split()))
+
+
+def build(terms, generation: str = None) -> dict:
+    """
+    由 [(词, 类型, 名称)] 构造自动机
+
+    同一条目的重复词（归一化后相同）只保留一个；归一化后为空的词忽略。
+    """
+    from collections import deque
+
+    columns = {"words": [], "lengths": [], "kinds": [], "names": []}
+    seen = set()
+    children = [{}]
+    out = {}
+    for word, kind, name in terms:
+        key = normalize(word)
+        if not key or (key, kind, name) in seen:
+            continue
+        seen.add((key, kind, name))
+        state = 0
+        for char in key:
+            nxt = children[state].get(char)
+            if nxt is None:
+                nxt = len(children)
+                children[state][char] = nxt
+                children.append({})
+            state = nxt
+        out.setdefault(state, []).append(len(columns["words"]))
+        columns["words"].append(word)
+        columns["lengths"].append(len(key))
+        columns["kinds"].append(kind)
+        columns["names"].append(name)
+
+    # 按层（BFS）计算失败指针与输出链接
+    goto = {}
+    fail = [0] * len(children)
+    link = {}
+    queue = deque()
+    for char, nxt in children[0].items():
+        goto[ord(char)] = nxt
+        queue.append(nxt)
+    while queue:
+        state = queue.popleft()
+        for char, nxt in children[state].items():
+            goto[state << 21 | ord(char)] = nxt
+            queue.append(nxt)
+            target = fail[state]
+            while target and char not in children[target]:
+                target = fail[target]
+            fail[nxt] = children[target].get(char, 0)
+            if fail[nxt] in out:
+                link[nxt] = fail[nxt]
+            elif fail[nxt] in link:
+                link[nxt] = link[fail[nxt]]
+    return {
+        "format": AUTOMATON_FORMAT, "generation": generation,
+        "terms": columns, "goto": goto, "fail": fail, "out": out, "link": link,
+    }
+
+
+def save(automaton_file: Path, automaton: dict):
+    """原子写入自动机文件（字典展开为平行的整数列表）"""
+    out_states = [state for state, ids in automaton["out"].items() for _ in ids]
+    out_terms = [term_id for ids in automaton["out"].values() for term_id in ids]
+    data = {
+        "format": automaton["format"], "generation": automaton["generation"],
+        "terms": automaton["terms"], "fail": automaton["fail"],
+        "goto": [list(automaton["goto"]), list(automaton["goto"].values())],
+        "out": [out_states, out_terms],
+        "link": [list(automaton["link"]), list(automaton["link"].values())],
+    }
+    cache.make_cache_dir(automaton_file.parent)
+    cache._write_json(automaton_file, data)
+
+
+def load(automaton_file: Path, generation: str):
+    """读取自动机文件；不存在、损坏或 generation 不一致时返回 None"""
+    try:
+        data = json.loads(automaton_file.read_text(encoding="utf-8"))
+        if data.get("format") != AUTOMATON_FORMAT or data.get("generation") != generation:
+            return None
+        out = {}
+        for state, term_id in zip(*data["out"]):
+            out.setdefault(state, []).append(term_id)
+        return {
+            "format": data["format"], "generation": data["generation"],
+            "terms": data["terms"], "fail": data["fail"],
+            "goto": dict(zip(*data["goto"])), "out": out, "link": dict(zip(*data["link"])),
+        }
+    except (OSError, ValueError, AttributeError, KeyError, TypeError):
+        return None
+
+
+def match(automaton: dict, text: str, kind: str = None, limit: int = None) -> list:
+    """
+    一遍扫描请求文本，返回命中的条目（按得分排序）
+
+    [{"kind", "name", "score", "matched": [命中的原词]}]；score 为命中词归一化长度之和。
+    """
+    goto = automaton["goto"]
+    fail = automaton["fail"]
+    out = automaton["out"]
+    link = automaton["link"]
+    found = set()
+    state = 0
+    for char in normalize(text):
+        code = ord(char)
+        nxt = goto.get(state << 21 | code)
+        while nxt is None and state:
+            state = fail[state]
+            nxt = goto.get(state << 21 | code)
+        state = nxt or 0
+        hit = state if state in out else link.get(state)
+        while hit:
+            found.update(out[hit])
+            hit = link.get(hit)
+
+    terms = automaton["terms"]
+    hits = {}
+    for term_id in sorted(found):
+        term_kind = terms["kinds"][term_id]
+        if kind is not None and term_kind != kind:
+            continue
+        name = terms["names"][term_id]
+        hit = hits.setdefault((term_kind, name), {"kind": term_kind, "name": name, "score": 0, "matched": []})
+        hit["score"] += terms["lengths"][term_id]
+        hit["matched"].append(terms["words"][term_id])
+    ranked = sorted(
+        hits.values(),
+        key=lambda hit: (-hit["score"], -len(hit["matched"]), hit["kind"] != "skill", hit["name"])
+    )
+    return ranked if limit is None else ranked[:limit]
+
+
+def main(argv: list = None):
+    """主函数"""
+    parser = argparse.ArgumentParser(
+        description="按触发词 / 关键词匹配用户请求",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog=__doc__
+    )
+    parser.add_argument(
+        "--root",
+        type=Path,
+        help="项目目录或 .comate 目录（默认本文件所在的 .comate）"
+    )
+    parser.add_argument("prompt", help="用户请求文本")
+    parser.add_argument("--kind", choices=["skill", "rule"], help="只匹配技能或规则")
+    parser.add_argument("--limit", type=int, help="最多返回的条目数")
+    args = parser.parse_args(argv)
+
+    from specmode import db, paths
+
+    try:
+        comate_dir = paths.find_comate(args.root) if args.root else Path(__file__).resolve().parents[2]
+        conn = db.connect(db.db_path(comate_dir), create=False)
+    except (ValueError, db.CatalogError) as e:
+        print(f"❌ 错误：{e}")
+        sys.exit(1)
+    try:
+        result = db.match_prompt(conn, args.prompt, args.kind, args.limit)
+    finally:
+        conn.close()
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
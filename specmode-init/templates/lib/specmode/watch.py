@@ -0,0 +1,213 @@
+"""
+目录监听
+
+同步脚本的 --watch 使用：监听目录树的变化，合并一批连续事件后回调一次。
+
+- Linux 上通过 ctypes 调用 inotify（递归监听，新建的子目录自动加入）
+- 其他平台或 inotify 不可用时，按间隔轮询 stat 签名
+- 去抖：收到事件后等待目录安静 debounce 秒再回调，
+  git checkout 一次改动数百个文件只触发一次重建
+- inotify 事件队列溢出时回调 None，表示需要全量重新扫描
+"""
+
+import errno
+import os
+import select
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+# inotify 事件掩码（linux/inotify.h）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+_WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO
+               | IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF)
+_EVENT_HEADER = struct.Struct("iIII")
+
+# 默认去抖时间与轮询间隔（秒）
+DEFAULT_DEBOUNCE = 0.3
+DEFAULT_POLL_INTERVAL = 1.0
+
+
+def _load_libc():
+    """加载 libc 中的 inotify 函数，不可用时返回 None"""
+    if not sys.platform.startswith("linux"):
+        return None
+    # ctypes 只在真正监听时导入
+    import ctypes
+    import ctypes.util
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        return libc
+    except (OSError, AttributeError):
+        return None
+
+
+def _skip(name: str) -> bool:
+    """隐藏文件与临时文件（包括索引的原子写入临时文件）不触发重建"""
+    return name.startswith(".") or name.endswith(".tmp")
+
+
+def _add_inotify_tree(watch: dict, root: str):
+    """递归为目录树添加 inotify 监听"""
+    import ctypes
+
+    libc = watch["libc"]
+    for dirpath, dirnames, _ in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not _skip(d)]
+        wd = libc.inotify_add_watch(watch["fd"], os.fsencode(dirpath), _WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOENT:
+                continue
+            raise OSError(err, os.strerror(err), dirpath)
+        watch["wds"][wd] = dirpath
+
+
+def _snapshot(root: str) -> dict:
+    """轮询模式：{路径: (大小, mtime_ns, inode)}"""
+    snapshot = {}
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames[:] = [d for d in dirnames if not _skip(d)]
+        for name in filenames:
+            if _skip(name):
+                continue
+            path = os.path.join(dirpath, name)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            snapshot[path] = (st.st_size, st.st_mtime_ns, st.st_ino)
+    return snapshot
+
+
+def open_watch(root: Path, poll_interval: float = DEFAULT_POLL_INTERVAL, force_poll: bool = False) -> dict:
+    """开始监听 root 目录树，inotify 不可用时退化为轮询"""
+    root = str(root)
+    libc = None if force_poll else _load_libc()
+    if libc is not None:
+        fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd >= 0:
+            watch = {"mode": "inotify", "root": root, "libc": libc, "fd": fd, "wds": {}}
+            try:
+                _add_inotify_tree(watch, root)
+                return watch
+            except OSError:
+                # 例如 fs.inotify.max_user_watches 耗尽
+                os.close(fd)
+    return {"mode": "poll", "root": root, "interval": poll_interval, "snapshot": _snapshot(root)}
+
+
+def close_watch(watch: dict):
+    """停止监听"""
+    if watch["mode"] == "inotify":
+        os.close(watch["fd"])
+
+
+def _read_inotify(watch: dict, timeout: Optional[float]) -> Optional[set]:
+    """等待并读取一批 inotify 事件，返回变化的路径集合；队列溢出时返回 None"""
+    changed = set()
+    ready, _, _ = select.select([watch["fd"]], [], [], timeout)
+    if not ready:
+        return changed
+    try:
+        data = os.read(watch["fd"], 64 * 1024)
+    except BlockingIOError:
+        return changed
+
+    offset = 0
+    while offset < len(data):
+        wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+        offset += _EVENT_HEADER.size
+        name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+        offset += length
+        if mask & IN_Q_OVERFLOW:
+            return None
+        dirpath = watch["wds"].get(wd)
+        if dirpath is None:
+            continue
+        if mask & IN_IGNORED:
+            del watch["wds"][wd]
+            continue
+        if name and _skip(name):
+            continue
+        path = os.path.join(dirpath, name) if name else dirpath
+        if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+            # 新目录：加入监听，并把其中已有的文件视为变化
+            _add_inotify_tree(watch, path)
+            changed.update(_snapshot(path))
+        changed.add(path)
+    return changed
+
+
+def _read_poll(watch: dict, timeout: Optional[float]) -> set:
+    """轮询一次（最多等待 timeout 秒），返回签名变化的路径集合"""
+    time.sleep(watch["interval"] if timeout is None else min(timeout, watch["interval"]))
+    snapshot = _snapshot(watch["root"])
+    old = watch["snapshot"]
+    watch["snapshot"] = snapshot
+    changed = {path for path, signature in snapshot.items() if old.get(path) != signature}
+    changed.update(path for path in old if path not in snapshot)
+    return changed
+
+
+def wait_changes(watch: dict, debounce: float = DEFAULT_DEBOUNCE) -> Optional[set]:
+    """
+    阻塞直到有变化，再等待目录安静 debounce 秒，返回这段时间内变化的全部路径
+
+    返回 None 表示事件丢失（inotify 队列溢出），调用方应全量重新扫描。
+    """
+    read = _read_inotify if watch["mode"] == "inotify" else _read_poll
+    changed = set()
+    overflow = False
+    while not changed and not overflow:
+        batch = read(watch, None)
+        if batch is None:
+            overflow = True
+        else:
+            changed |= batch
+
+    deadline = time.monotonic() + debounce
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        batch = read(watch, remaining)
+        if batch is None:
+            overflow = True
+        elif batch:
+            changed |= batch
+            deadline = time.monotonic() + debounce
+    return None if overflow else changed
+
+
+def watch_loop(root: Path, on_change: Callable[[Optional[set]], None],
+               debounce: float = DEFAULT_DEBOUNCE, poll_interval: float = DEFAULT_POLL_INTERVAL,
+               force_poll: bool = False):
+    """持续监听 root，每批变化回调一次 on_change(变化的路径集合或 None)，Ctrl-C 退出"""
+    watch = open_watch(root, poll_interval, force_poll)
+    print(f"👀 监听 {root}（{'inotify' if watch['mode'] == 'inotify' else '轮询'}），Ctrl-C 退出")
+    try:
+        while True:
+            on_change(wait_changes(watch, debounce))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        close_watch(watch)
@@ -3,7 +3,10 @@
 规则初始化脚本
 
 用法:
-    python3 init_rule.py <rule-name>
+    python3 init_rule.py <rule-name> [--root DIR]
+
+参数:
+    --root    项目目录或 .comate 目录（默认本脚本所在的 .comate）
 
 示例:
     python3 init_rule.py my-new-rule
@@ -14,8 +17,8 @@ import sys
 from pathlib import Path
 
 RULE_TEMPLATE = '''---
-description: [{rule_title}规则描述，一句话说明用途]
-globs: [文件匹配模式，如 **/*.go, conf/**/*.toml]
+description: {rule_title} 规则描述，一句话说明用途
+globs: ["**/*.go", "conf/**/*.toml"]
 alwaysApply: false
 ---
 
@@ -72,11 +75,14 @@ alwaysApply: false
 '''
 
 
-def create_rule(rule_name: str) -> None:
+def create_rule(rule_name: str, comate_dir: Path = None) -> None:
     """创建新规则文件"""
     
     # 确定规则目录路径
-    script_dir = Path(__file__).parent.parent.parent.parent  # .comate/
+    if comate_dir is not None:
+        script_dir = comate_dir
+    else:
+        script_dir = Path(__file__).parent.parent.parent.parent  # .comate/
     rules_dir = script_dir / "rules"
     rule_file = rules_dir / f"{rule_name}.mdr"
     
@@ -110,13 +116,35 @@ def create_rule(rule_name: str) -> None:
 """)
 
 
-def main():
+def parse_root(args: list) -> Path:
+    """从 args 中取出 --root DIR（原地移除），返回 .comate 目录；未指定时返回 None"""
+    if "--root" not in args:
+        return None
+    i = args.index("--root")
+    if i + 1 >= len(args):
+        print("❌ 错误：--root 需要目录参数")
+        sys.exit(1)
+    root = Path(args.pop(i + 1))
+    del args[i]
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "lib"))  # .comate/lib/
+    from specmode import paths
+    try:
+        return paths.find_comate(root)
+    except ValueError as e:
+        print(f"❌ 错误：{e}")
+        sys.exit(1)
+
+
+def main(argv: list = None):
     """主函数"""
-    if len(sys.argv) != 2:
+    args = sys.argv[1:] if argv is None else list(argv)
+    comate_dir = parse_root(args)
+    if len(args) != 1:
         print(__doc__)
         sys.exit(1)
     
-    rule_name = sys.argv[1].lower().strip()
+    rule_name = args[0].lower().strip()
     
     # 验证规则名称
     if not rule_name:
@@ -127,7 +155,7 @@ def main():
         print("❌ 错误：规则名称只能包含字母、数字和连字符")
         sys.exit(1)
     
-    create_rule(rule_name)
+    create_rule(rule_name, comate_dir)
 
 
 if __name__ == "__main__":
@@ -5,60 +5,49 @@
 扫描 .comate/rules/ 目录下所有 .mdr 文件，校验格式并更新 RULES_INDEX.md
 
 用法:
-    python3 sync_rules.py [--dry-run]
+    python3 sync_rules.py [--dry-run] [--no-cache] [--jobs N] [--executor thread|process]
+    python3 sync_rules.py --watch [--poll] [--no-cache] [--jobs N]
+    python3 sync_rules.py --check [--no-cache]
+    python3 sync_rules.py --format ndjson [--quiet] [--jobs N]
+    python3 sync_rules.py --since REV | --staged [--self-check]
 
 参数:
-    --dry-run    仅扫描校验，不更新 RULES_INDEX.md
+    --root       项目目录或 .comate 目录（默认本脚本所在的 .comate）
+    --dry-run    仅扫描校验，不更新 RULES_INDEX.md，也不写入缓存与目录数据库
+    --no-cache   不读取也不写入 .comate/.cache/ 中的校验结果缓存
+    --jobs       并行校验的工作线程 / 进程数（默认 1，即串行；0 表示 CPU 核数）
+    --executor   并行方式：thread（I/O 受限，默认）或 process（解析 / 正则受限）
+    --watch      常驻监听 .comate/rules/，变化时（合并一批事件后）只重新校验变化的条目并更新索引
+    --poll       监听时强制使用轮询（网络文件系统等 inotify 不可用的场景）
+    --check      只检查 RULES_INDEX.md 是否过期（供 CI 使用）：按 stat 与缓存比对索引中的生成戳，
+                 不扫描校验、不写入任何文件；过期时退出码为 1
+    --format     输出格式：text（默认）、json 或 ndjson；json / ndjson 在每个条目校验完成时
+                 立即输出一条记录，最后输出汇总记录（含索引变化），见 specmode.report
+    --quiet, -q  不输出逐条结果，只输出统计（json / ndjson 时只输出汇总记录）
+    --since      只重新校验相对 REV 有变化（含未提交、未跟踪）的规则，其余直接使用缓存结果
+    --staged     只重新校验 git 已暂存变化涉及的规则（pre-commit 使用），其余直接使用缓存结果
+    --self-check 同步后不使用缓存全量重新扫描校验，与本次结果及生成戳比对，不一致时退出码为 1
 """
 
 import os
 import re
 import sys
 from pathlib import Path
-from typing import Optional
-
-
-def parse_frontmatter(content: str) -> Optional[dict]:
-    """解析 YAML frontmatter"""
-    if not content.startswith("---"):
-        return None
-    
-    # 查找第二个 ---
-    end_match = re.search(r'\n---\s*\n', content[3:])
-    if not end_match:
-        return None
-    
-    yaml_content = content[3:end_match.start() + 3]
-    
-    # 简单解析 YAML（不依赖 pyyaml）
-    result = {}
-    current_key = None
-    current_value = []
-    
-    for line in yaml_content.split('\n'):
-        # 检查是否是新的顶级键
-        key_match = re.match(r'^(\w+):\s*(.*)', line)
-        if key_match:
-            # 保存之前的键值
-            if current_key:
-                value = '\n'.join(current_value).strip()
-                if value.startswith('|'):
-                    value = '\n'.join(current_value[1:]) if len(current_value) > 1 else ''
-                result[current_key] = value.strip()
-            
-            current_key = key_match.group(1)
-            current_value = [key_match.group(2)] if key_match.group(2) else []
-        elif current_key and (line.startswith('  ') or line.strip() == ''):
-            current_value.append(line)
-    
-    # 保存最后一个键值
-    if current_key:
-        value = '\n'.join(current_value).strip()
-        if value.startswith('|'):
-            value = '\n'.join(current_value[1:]) if len(current_value) > 1 else ''
-        result[current_key] = value.strip()
-    
-    return result if result else None
+from typing import Callable
+
+# .comate/lib/（打包为 zipapp 时 specmode 位于归档根目录，该路径不存在也无妨）
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "lib"))
+from specmode import cache, changes, index, parallel, paths, report, sync
+from specmode.frontmatter import parse_frontmatter
+
+# 校验逻辑、索引行格式、关键词 / 标题提取或 frontmatter 解析变化时递增，使已有缓存失效
+VALIDATOR_VERSION = 4
+
+# 按流式列表解析的 frontmatter 键；其余键的 [...] 保留原文（如模板中的 description: [规则描述]）
+FLOW_KEYS = frozenset(("globs", "keywords"))
+
+# 索引表格表头
+TABLE_HEADER = "| name | description | globs | alwaysApply | keywords |"
 
 
 def extract_keywords(content: str) -> list:
@@ -74,6 +63,32 @@ def extract_keywords(content: str) -> list:
     return keywords
 
 
+def extract_headings(content: str) -> list:
+    """提取 Markdown 标题文本（跳过 frontmatter 与代码块，供规则检索使用）"""
+    headings = []
+    lines = content.split('\n')
+    start = 0
+    if lines and lines[0].strip() == '---':
+        for i in range(1, len(lines)):
+            if lines[i].strip() == '---':
+                start = i + 1
+                break
+    fence = None
+    for line in lines[start:]:
+        stripped = line.strip()
+        if fence:
+            if stripped.startswith(fence):
+                fence = None
+            continue
+        if stripped.startswith('```') or stripped.startswith('~~~'):
+            fence = stripped[:3]
+            continue
+        match = re.match(r'#{1,6}\s+(.+?)\s*#*$', stripped)
+        if match:
+            headings.append(match.group(1))
+    return headings
+
+
 def validate_rule(rule_file: Path) -> dict:
     """校验单个规则文件"""
     result = {
@@ -82,9 +97,11 @@ def validate_rule(rule_file: Path) -> dict:
         "errors": [],
         "warnings": [],
         "description": "",
-        "globs": "",
+        "globs": [],
         "alwaysApply": False,
-        "keywords": []
+        "keywords": [],
+        "headings": [],
+        "frontmatter": None
     }
     
     # 读取文件
@@ -96,17 +113,26 @@ def validate_rule(rule_file: Path) -> dict:
         return result
     
     # 解析 YAML frontmatter
-    frontmatter = parse_frontmatter(content)
+    try:
+        frontmatter = parse_frontmatter(content, FLOW_KEYS)
+    except ValueError as e:
+        result["status"] = "error"
+        result["errors"].append(f"无法解析 YAML frontmatter: {e}")
+        return result
     
     if not frontmatter:
         result["status"] = "error"
         result["errors"].append("缺少或无法解析 YAML frontmatter")
         return result
+    result["frontmatter"] = frontmatter
     
     # 检查 description 字段
     if "description" not in frontmatter or not frontmatter["description"]:
         result["status"] = "error"
         result["errors"].append("缺少 description 字段")
+    elif not isinstance(frontmatter["description"], str):
+        result["status"] = "error"
+        result["errors"].append("description 字段必须是字符串")
     else:
         result["description"] = frontmatter["description"]
     
@@ -116,16 +142,28 @@ def validate_rule(rule_file: Path) -> dict:
         if result["status"] == "pass":
             result["status"] = "warn"
     else:
-        result["globs"] = frontmatter.get("globs", "")
+        # 支持流式列表 [a, b] 与逗号分隔的字符串，空值表示不按文件匹配
+        globs = frontmatter["globs"]
+        if isinstance(globs, str):
+            globs = globs.split(',')
+        if isinstance(globs, list):
+            result["globs"] = [str(g).strip() for g in globs if str(g).strip()]
+        elif globs is not None:
+            result["warnings"].append("globs 应为列表或逗号分隔的字符串")
+            if result["status"] == "pass":
+                result["status"] = "warn"
     
     # 检查 alwaysApply 字段
     if "alwaysApply" not in frontmatter:
         result["warnings"].append("缺少 alwaysApply 字段")
         if result["status"] == "pass":
             result["status"] = "warn"
+    elif isinstance(frontmatter["alwaysApply"], bool):
+        result["alwaysApply"] = frontmatter["alwaysApply"]
     else:
-        always_apply = frontmatter.get("alwaysApply", "").lower()
-        result["alwaysApply"] = always_apply == "true"
+        result["warnings"].append("alwaysApply 应为 true 或 false")
+        if result["status"] == "pass":
+            result["status"] = "warn"
     
     # 检查触发条件章节
     if "## 触发条件" not in content:
@@ -141,26 +179,102 @@ def validate_rule(rule_file: Path) -> dict:
     
     # 提取关键词
     result["keywords"] = extract_keywords(content)
+    result["headings"] = extract_headings(content)
     
     return result
 
 
-def scan_rules(rules_dir: Path) -> list:
-    """扫描所有规则文件"""
-    results = []
+def render_index_row(result: dict) -> str:
+    """渲染规则在索引表格中的一行"""
+    name = result["name"]
+    # 将 description 处理为单行
+    desc = result["description"].replace('\n', ' ').strip()
+    # 转义表格中的管道符
+    desc = desc.replace('|', '\\|')
     
-    for item in sorted(rules_dir.iterdir()):
-        # 只处理 .mdr 文件
-        if not item.is_file():
-            continue
-        if not item.suffix == ".mdr":
-            continue
-        if item.name.startswith('.'):
-            continue
-        
-        result = validate_rule(item)
-        results.append(result)
+    # globs 处理：添加代码标记
+    globs = ', '.join(f'`{g}`' for g in result["globs"]) if result["globs"] else "-"
+    
+    # alwaysApply 处理
+    always_apply = "✅" if result["alwaysApply"] else "❌"
     
+    # keywords 处理
+    keywords = ", ".join(result["keywords"]) if result["keywords"] else "-"
+    
+    return f"| {name} | {desc} | {globs} | {always_apply} | {keywords} |"
+
+
+def with_index_row(result: dict) -> dict:
+    """为校验通过的规则记录索引行（随校验结果一起缓存，未变化的规则不重新渲染）"""
+    if result["status"] != "error":
+        result["row"] = render_index_row(result)
+    return result
+
+
+def validate_rule_row(rule_file: Path) -> dict:
+    """校验规则并渲染索引行（模块级函数，可在进程池中执行）"""
+    return with_index_row(validate_rule(rule_file))
+
+
+def list_rule_names(rules_dir: Path) -> list:
+    """列出规则文件名（排序；scandir 的类型信息免去逐个 stat）"""
+    names = []
+    with os.scandir(str(rules_dir)) as it:
+        for entry in it:
+            # 只处理 .mdr 文件
+            if not entry.name.endswith(".mdr") or entry.name.startswith('.'):
+                continue
+            if not entry.is_file():
+                continue
+            names.append(entry.name)
+    return sorted(names)
+
+
+def scan_rules(rules_dir: Path, entries: dict = None, jobs: int = 1, executor: str = "thread",
+               on_result: Callable = None, changed: set = None) -> list:
+    """
+    扫描所有规则文件，结果按文件名排序
+
+    entries 为缓存条目（见 specmode.cache），扫描后只保留本次见到的规则；
+    未命中缓存的规则按 jobs / executor 并行校验（见 specmode.parallel）。
+    on_result 按排序顺序对每个结果回调一次，条目一完成（且之前的条目都已完成）即回调，
+    不等待整个扫描结束。
+    changed 为 git 报告有变化的规则文件名（见 specmode.changes）时，不在其中且有缓存结果的规则
+    直接复用缓存，不 stat、不读取。
+    """
+    # 只为需要 stat / 校验的规则构造路径：--since / --staged 时大部分规则直接复用缓存
+    names = list_rule_names(rules_dir)
+    base = str(rules_dir)
+    
+    results = [None] * len(names)
+    records = [None] * len(names)
+    if entries is not None:
+        for i, name in enumerate(names):
+            if changed is not None and name not in changed:
+                results[i], records[i] = cache.cached(entries, name)
+                if results[i] is not None:
+                    continue
+            try:
+                results[i], records[i] = cache.lookup(entries, name, os.path.join(base, name))
+            except OSError:
+                pass  # 扫描后被删除，交给校验报告错误
+    
+    misses = [i for i, result in enumerate(results) if result is None]
+    validated = parallel.imap_ordered(validate_rule_row, [rules_dir / names[i] for i in misses], jobs, executor)
+    try:
+        for i, result in enumerate(results):
+            if result is None:
+                results[i] = next(validated)
+            if on_result is not None:
+                on_result(results[i])
+    finally:
+        validated.close()
+    
+    if entries is not None:
+        entries.clear()
+        for name, record, result in zip(names, records, results):
+            if record is not None:
+                cache.store(entries, name, record, result)
     return results
 
 
@@ -173,36 +287,14 @@ def generate_index_content(results: list) -> str:
         "",
         "## 规则列表",
         "",
-        "| name | description | globs | alwaysApply | keywords |",
+        TABLE_HEADER,
         "|------|-------------|-------|-------------|----------|",
     ]
     
     for r in results:
         if r["status"] == "error":
             continue  # 跳过有错误的规则
-        
-        name = r["name"]
-        # 将 description 处理为单行
-        desc = r["description"].replace('\n', ' ').strip()
-        # 转义表格中的管道符
-        desc = desc.replace('|', '\\|')
-        
-        # globs 处理
-        globs = r["globs"]
-        if globs:
-            # 格式化 globs，添加代码标记
-            globs_list = [g.strip() for g in globs.split(',') if g.strip()]
-            globs = ', '.join(f'`{g}`' for g in globs_list)
-        else:
-            globs = "-"
-        
-        # alwaysApply 处理
-        always_apply = "✅" if r["alwaysApply"] else "❌"
-        
-        # keywords 处理
-        keywords = ", ".join(r["keywords"]) if r["keywords"] else "-"
-        
-        lines.append(f"| {name} | {desc} | {globs} | {always_apply} | {keywords} |")
+        lines.append(r.get("row") or render_index_row(r))
     
     lines.extend([
         "",
@@ -239,53 +331,56 @@ def generate_index_content(results: list) -> str:
     return '\n'.join(lines)
 
 
-def get_existing_rules(index_file: Path) -> set:
-    """从现有 RULES_INDEX.md 获取规则列表"""
-    if not index_file.exists():
-        return set()
-    
-    content = index_file.read_text(encoding="utf-8")
-    rules = set()
-    
-    # 匹配表格行
-    for line in content.split('\n'):
-        match = re.match(r'^\| (\S+) \|', line)
-        if match and match.group(1) not in ('name', '------'):
-            rules.add(match.group(1))
-    
-    return rules
-
+def update_rules_index(rules_dir: Path, results: list, dry_run: bool = False, stamp: str = None,
+                       rows: list = None) -> dict:
+    """
+    增量更新 RULES_INDEX.md
 
-def update_rules_index(rules_dir: Path, results: list, dry_run: bool = False) -> dict:
-    """更新 RULES_INDEX.md"""
+    只替换规则列表表格中的行（表格之外的内容保持原样），内容不变时不写入文件；
+    stamp 为生成戳（见 specmode.index.entries_stamp）；rows 为由 SQLite 目录渲染的表格行
+    （见 specmode.sync.catalog_rows），为 None 时由扫描结果渲染。
+    """
     index_file = rules_dir / "RULES_INDEX.md"
     
-    # 获取现有规则
-    existing = get_existing_rules(index_file)
+    # 新表格行（排除错误的规则）
+    if rows is None:
+        rows = [(r["name"], r.get("row") or render_index_row(r)) for r in results if r["status"] != "error"]
+    diff, new_content = index.patch_index(
+        index_file, TABLE_HEADER, rows, lambda: generate_index_content(results), stamp
+    )
+    diff["dry_run"] = dry_run
+    diff["written"] = False
     
-    # 获取新规则（排除错误的）
-    new_rules = {r["name"] for r in results if r["status"] != "error"}
-    
-    # 计算差异
-    added = new_rules - existing
-    removed = existing - new_rules
-    
-    diff = {
-        "added": sorted(added),
-        "removed": sorted(removed),
-        "updated": not dry_run
-    }
-    
-    if not dry_run:
-        new_content = generate_index_content(results)
-        index_file.write_text(new_content, encoding="utf-8")
+    if new_content is not None and not dry_run:
+        index.write_index(index_file, new_content)
+        diff["written"] = True
     
     return diff
 
 
-def print_report(results: list, diff: dict):
-    """打印校验报告"""
-    print("\n🔍 扫描 .comate/rules/ 目录...\n")
+def index_inputs(rules_dir: Path) -> list:
+    """索引的输入文件：[(缓存键, 规则文件路径)]（--check 按 stat 与签名缓存比对）"""
+    base = str(rules_dir)
+    return [(name, os.path.join(base, name)) for name in list_rule_names(rules_dir)]
+
+
+# 条目类型描述（见 specmode.sync）
+SYNC_SPEC = {
+    "kind": "rule",
+    "label": "规则",
+    "dir": "rules",
+    "index": "RULES_INDEX.md",
+    "script": "sync_rules.py",
+    "version": VALIDATOR_VERSION,
+    "inputs": index_inputs,
+    "scan": scan_rules,
+    "update_index": update_rules_index,
+}
+
+
+def print_report(results: list, diff: dict, quiet: bool = False):
+    """打印校验报告（quiet 时只打印统计），拼接完整后一次写出"""
+    lines = ["\n🔍 扫描 .comate/rules/ 目录...\n"]
     
     pass_count = 0
     warn_count = 0
@@ -296,62 +391,146 @@ def print_report(results: list, diff: dict):
         status = r["status"]
         
         if status == "pass":
-            print(f"✅ {name}.mdr - 通过")
+            lines.append(f"✅ {name}.mdr - 通过")
             pass_count += 1
         elif status == "warn":
             warnings = "; ".join(r["warnings"])
-            print(f"⚠️  {name}.mdr - 警告: {warnings}")
+            lines.append(f"⚠️  {name}.mdr - 警告: {warnings}")
             warn_count += 1
         else:
             errors = "; ".join(r["errors"])
-            print(f"❌ {name}.mdr - 错误: {errors}")
+            lines.append(f"❌ {name}.mdr - 错误: {errors}")
             error_count += 1
     
     total = len(results)
-    print(f"\n📊 扫描结果: {total} 个规则, {pass_count} 通过, {warn_count} 警告, {error_count} 错误")
+    counts = f"📊 扫描结果: {total} 个规则, {pass_count} 通过, {warn_count} 警告, {error_count} 错误"
+    if quiet:
+        sys.stdout.write(counts + "\n")
+        return
+    lines.append("\n" + counts)
     
     # 打印索引更新信息
-    if diff["updated"]:
-        print("\n🔄 更新 RULES_INDEX.md...")
+    if not diff["dry_run"]:
+        lines.append("\n🔄 更新 RULES_INDEX.md...")
         for name in diff["added"]:
-            print(f"   + 新增: {name}")
+            lines.append(f"   + 新增: {name}")
         for name in diff["removed"]:
-            print(f"   - 移除: {name}")
-        if not diff["added"] and not diff["removed"]:
-            print("   (无变化)")
-        print("✅ RULES_INDEX.md 已更新")
+            lines.append(f"   - 移除: {name}")
+        for name in diff["modified"]:
+            lines.append(f"   ~ 修改: {name}")
+        if diff["written"]:
+            lines.append("✅ RULES_INDEX.md 已更新")
+        else:
+            lines.append("   (无变化)")
+            lines.append("✅ RULES_INDEX.md 已是最新，未写入")
     else:
-        print("\n📝 --dry-run 模式，未更新 RULES_INDEX.md")
+        lines.append("\n📝 --dry-run 模式，未更新 RULES_INDEX.md")
         if diff["added"]:
-            print(f"   将新增: {', '.join(diff['added'])}")
+            lines.append(f"   将新增: {', '.join(diff['added'])}")
         if diff["removed"]:
-            print(f"   将移除: {', '.join(diff['removed'])}")
+            lines.append(f"   将移除: {', '.join(diff['removed'])}")
+        if diff["modified"]:
+            lines.append(f"   将修改: {', '.join(diff['modified'])}")
+    
+    sys.stdout.write("\n".join(lines) + "\n")
 
 
-def main():
+def main(argv: list = None):
     """主函数"""
-    dry_run = "--dry-run" in sys.argv
+    parser = sync.build_parser(SYNC_SPEC, __doc__)
+    args = parser.parse_args(argv)
+    sync.check_args(parser, args)
+    scoped = args.since is not None or args.staged
+    dry_run = args.dry_run
+    use_cache = not args.no_cache
+    jobs = args.jobs or parallel.default_jobs()
     
     # 确定规则目录路径
-    script_path = Path(__file__).resolve()
-    rules_dir = script_path.parent.parent.parent / "rules"  # .comate/rules/
+    if args.root:
+        try:
+            rules_dir = paths.find_comate(args.root) / "rules"
+        except ValueError as e:
+            print(f"❌ 错误：{e}")
+            sys.exit(1)
+    else:
+        script_path = Path(__file__).resolve()
+        rules_dir = script_path.parent.parent.parent.parent / "rules"  # .comate/rules/
     
     if not rules_dir.exists():
         print(f"❌ 错误：规则目录不存在: {rules_dir}")
         sys.exit(1)
     
-    # 扫描并校验
-    results = scan_rules(rules_dir)
+    cache_file = cache.cache_path(rules_dir.parent, "sync_rules")
+    if args.check:
+        # 只读取签名与哈希，不加载完整的校验结果
+        sync.run_check(SYNC_SPEC, rules_dir, cache.load_signatures(cache_file) if use_cache else {}, args.format)
+    
+    # 扫描并校验（未变化的规则文件直接使用缓存结果）
+    # --no-cache 时仍在内存中记录内容哈希（用于生成戳），只是不读写缓存文件；
+    # 监听模式下每批变化也只重新校验变化的条目
+    entries = cache.load_cache(cache_file, VALIDATOR_VERSION) if use_cache else {}
+    
+    # --since / --staged：只重新校验 git 报告有变化的规则，其余复用缓存结果
+    changed = None
+    if scoped:
+        try:
+            paths_changed = changes.changed_paths(rules_dir, args.since, args.staged)
+        except ValueError as e:
+            print(f"❌ 错误：无法获取 git 变化: {e}")
+            sys.exit(1)
+        changed = {path for path in paths_changed if "/" not in path}
+        if args.format == "text" and not args.quiet:
+            print(f"📌 git 变化涉及 {len(changed)} 个规则，其余规则使用缓存结果")
+    
+    # json / ndjson：每个条目校验完成即输出一条记录
+    output = None
+    on_result = None
+    if args.format != "text":
+        output = report.open_report(args.format, args.quiet)
+        
+        def on_result(result):
+            report.write_entry(output, report.entry_record("rule", result))
+    
+    results = scan_rules(rules_dir, entries, jobs, args.executor, on_result, changed)
+    if use_cache and not dry_run:
+        cache.save_cache(cache_file, VALIDATOR_VERSION, entries)
     
-    if not results:
+    if not results and not args.watch:
+        if output is not None:
+            report.finish_report(output, report.summary_record("rule", results))
+            sys.exit(0)
         print("⚠️  未找到任何 .mdr 规则文件")
         sys.exit(0)
     
     # 更新索引
-    diff = update_rules_index(rules_dir, results, dry_run=dry_run)
+    stamp = index.entries_stamp(VALIDATOR_VERSION, entries)
+    rows = sync.catalog_rows(SYNC_SPEC, rules_dir, results, entries, dry_run)
+    diff = update_rules_index(rules_dir, results, dry_run=dry_run, stamp=stamp, rows=rows)
+    
+    # 自检：全量重建的结果与生成戳应与本次一致
+    mismatched = None
+    if args.self_check:
+        mismatched = sync.self_check(SYNC_SPEC, rules_dir, results, stamp, jobs, args.executor)
     
     # 打印报告
-    print_report(results, diff)
+    if output is not None:
+        summary = report.summary_record("rule", results, diff, "RULES_INDEX.md")
+        if mismatched is not None:
+            summary["self_check"] = {"ok": not mismatched, "mismatched": mismatched}
+        report.finish_report(output, summary)
+    else:
+        print_report(results, diff, args.quiet)
+        if mismatched:
+            print(f"\n❌ 自检失败：增量结果与全量重建不一致: {', '.join(mismatched)}")
+            print("   缓存与 git 记录不一致（如未同步就提交过修改），请不带 --since / --staged 重新同步")
+        elif mismatched is not None:
+            print("\n✅ 自检通过：增量结果与全量重建一致")
+    if mismatched:
+        sys.exit(1)
+    
+    if args.watch:
+        sync.watch_index(SYNC_SPEC, rules_dir, entries, cache_file if use_cache else None, jobs,
+                         args.executor, args.poll)
 
 
 if __name__ == "__main__":
@@ -3,7 +3,10 @@
 技能初始化脚本
 
 用法:
-    python3 init_skill.py <skill-name>
+    python3 init_skill.py <skill-name> [--root DIR]
+
+参数:
+    --root    项目目录或 .comate 目录（默认本脚本所在的 .comate）
 
 示例:
     python3 init_skill.py my-new-skill
@@ -80,11 +83,14 @@ metadata:
 '''
 
 
-def create_skill(skill_name: str) -> None:
+def create_skill(skill_name: str, comate_dir: Path = None) -> None:
     """创建新技能的目录结构并初始化相关文件"""
     
     # 确定技能目录路径
-    script_dir = Path(__file__).parent.parent.parent  # .comate/skills/
+    if comate_dir is not None:
+        script_dir = comate_dir / "skills"
+    else:
+        script_dir = Path(__file__).parent.parent.parent  # .comate/skills/
     skill_dir = script_dir / skill_name
     
     if skill_dir.exists():
@@ -127,12 +133,35 @@ def create_skill(skill_name: str) -> None:
 """)
 
 
-def main():
-    if len(sys.argv) != 2:
+def parse_root(args: list) -> Path:
+    """从 args 中取出 --root DIR（原地移除），返回 .comate 目录；未指定时返回 None"""
+    if "--root" not in args:
+        return None
+    i = args.index("--root")
+    if i + 1 >= len(args):
+        print("❌ 错误：--root 需要目录参数")
+        sys.exit(1)
+    root = Path(args.pop(i + 1))
+    del args[i]
+
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent.parent / "lib"))  # .comate/lib/
+    from specmode import paths
+    try:
+        return paths.find_comate(root)
+    except ValueError as e:
+        print(f"❌ 错误：{e}")
+        sys.exit(1)
+
+
+def main(argv: list = None):
+    """主函数"""
+    args = sys.argv[1:] if argv is None else list(argv)
+    comate_dir = parse_root(args)
+    if len(args) != 1:
         print(__doc__)
         sys.exit(1)
     
-    skill_name = sys.argv[1].lower().strip()
+    skill_name = args[0].lower().strip()
     
     # 验证技能名称
     if not skill_name:
@@ -143,7 +172,7 @@ def main():
         print("❌ 错误：技能名称只能包含字母、数字和连字符")
         sys.exit(1)
     
-    create_skill(skill_name)
+    create_skill(skill_name, comate_dir)
 
 
 if __name__ == "__main__":
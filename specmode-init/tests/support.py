@@ -0,0 +1,39 @@
+"""
+测试辅助：在临时目录中初始化项目，以子进程运行脚本（与用户的调用方式一致）
+"""
+
+import subprocess
+import sys
+from pathlib import Path
+
+SPECMODE_DIR = Path(__file__).resolve().parent.parent
+SCRIPTS_DIR = SPECMODE_DIR / "scripts"
+TEMPLATES_DIR = SPECMODE_DIR / "templates"
+
+
+def run(args: list, cwd: Path = None, check: bool = True) -> subprocess.CompletedProcess:
+    """用当前解释器运行脚本，返回结果（stdout / stderr 为文本）"""
+    result = subprocess.run(
+        [sys.executable] + [str(arg) for arg in args],
+        cwd=str(cwd) if cwd else None,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        universal_newlines=True,
+    )
+    if check and result.returncode != 0:
+        raise AssertionError(f"{args} 退出码 {result.returncode}\n{result.stdout}\n{result.stderr}")
+    return result
+
+
+def init_project(target: Path, name: str = "Demo") -> Path:
+    """在 target 中初始化 Spec Mode，返回 .comate 目录"""
+    target.mkdir(parents=True, exist_ok=True)
+    run([SCRIPTS_DIR / "init_specmode.py", "--target", target, "--name", name])
+    return target / ".comate"
+
+
+def sync_script(comate_dir: Path, kind: str) -> Path:
+    """项目中的 sync_skills.py / sync_rules.py"""
+    if kind == "skill":
+        return comate_dir / "skills" / "skill-creator" / "scripts" / "sync_skills.py"
+    return comate_dir / "skills" / "rules-creator" / "scripts" / "sync_rules.py"
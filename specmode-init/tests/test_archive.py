@@ -0,0 +1,69 @@
+"""
+init_specmode.py --output-archive：标准输出只包含 tar 流；归档逐字节可复现
+"""
+
+import os
+import tarfile
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import SCRIPTS_DIR, run
+
+INIT = SCRIPTS_DIR / "init_specmode.py"
+
+
+class ArchiveOutputTest(unittest.TestCase):
+    def test_errors_go_to_stderr(self):
+        result = run([INIT, "--git-rev", "no-such-rev", "--output-archive", "-"], check=False)
+        self.assertNotEqual(result.returncode, 0)
+        self.assertEqual(result.stdout, "")
+        self.assertIn("❌", result.stderr)
+
+    def test_rejects_options_that_write_to_disk(self):
+        for option in ("--upgrade", "--hardlink", "--store=/tmp/specmode-store"):
+            result = run([INIT, "--output-archive", "-", option], check=False)
+            self.assertEqual(result.returncode, 2, option)
+            self.assertEqual(result.stdout, "", option)
+
+    def test_broken_template_is_reported(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            overlay = Path(tmp) / "overlay"
+            overlay.mkdir()
+            (overlay / "broken.md.tmpl").write_bytes(b"\xff\xfe {{name}}")
+            archive = Path(tmp) / "out.tar"
+            result = run([INIT, "--name", "Demo", "--overlay", overlay, "--output-archive", archive])
+            self.assertIn("渲染模板失败 broken.md.tmpl", result.stderr)
+            with tarfile.open(str(archive)) as tar:
+                names = tar.getnames()
+            self.assertIn(".comate/spec.md", names)
+            self.assertNotIn(".comate/broken.md", names)
+
+    def test_archive_is_reproducible(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            overlay = Path(tmp) / "overlay"
+            overlay.mkdir()
+            extra = overlay / "extra.md.tmpl"
+            extra.write_text("{{project_name}}\n", encoding="utf-8")
+            archives = []
+            for i, mtime in enumerate((1000000000, 1700000000)):
+                # 源文件 mtime 不同，归档仍应逐字节一致
+                os.utime(str(extra), (mtime, mtime))
+                archive = Path(tmp) / f"out-{i}.tar"
+                run([INIT, "--name", "Demo", "--overlay", overlay, "--output-archive", archive])
+                archives.append(archive.read_bytes())
+            self.assertEqual(archives[0], archives[1])
+
+            # 归档内容与直接初始化写出的文件一致
+            project = Path(tmp) / "project"
+            project.mkdir()
+            run([INIT, "--name", "Demo", "--overlay", overlay, "--target", project])
+            with tarfile.open(str(Path(tmp) / "out-0.tar")) as tar:
+                for member in tar.getmembers():
+                    if member.isfile() and not member.name.endswith(".specmode-manifest.json"):
+                        self.assertEqual(tar.extractfile(member).read(),
+                                         (project / member.name).read_bytes(), member.name)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,62 @@
+"""
+specmode 统一命令行：--help 与参数错误只加载命令分发器
+"""
+
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import init_project, run
+
+# 在子进程中调用 cli.main，输出调用结束后已导入的模块
+PROBE = """
+import json, sys
+sys.path.insert(0, sys.argv[1])
+from specmode import cli
+try:
+    cli.main(json.loads(sys.argv[2]))
+except SystemExit:
+    pass
+sys.stdout = sys.__stdout__
+print(json.dumps(sorted(sys.modules)))
+"""
+
+# 分发器不应加载的模块：校验 / 建索引脚本、监听、目录数据库、守护进程
+HEAVY_MODULES = {
+    "sync_skills", "sync_rules", "init_skill", "init_rule",
+    "specmode.watch", "specmode.db", "specmode.daemon", "specmode.catalog",
+    "sqlite3", "ctypes", "concurrent.futures",
+}
+
+
+class CliImportTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.comate_dir = init_project(Path(cls.tmp.name) / "project")
+        cls.lib_dir = cls.comate_dir / "lib"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp.cleanup()
+
+    def imported(self, argv: list) -> set:
+        result = run(["-c", PROBE, self.lib_dir, json.dumps(argv)])
+        return set(json.loads(result.stdout.splitlines()[-1]))
+
+    def test_help_and_errors_load_only_dispatcher(self):
+        for argv in (["--help"], [], ["no-such-command"], ["--bogus"]):
+            loaded = self.imported(argv) & HEAVY_MODULES
+            self.assertEqual(loaded, set(), argv)
+
+    def test_command_help_skips_watch_and_sqlite(self):
+        for command in ("sync-skills", "sync-rules"):
+            loaded = self.imported(["--root", str(self.comate_dir), command, "--help"])
+            self.assertIn(command.replace("-", "_"), loaded)
+            self.assertEqual(loaded & {"specmode.watch", "sqlite3", "ctypes", "concurrent.futures"},
+                             set(), command)
+
+
+if __name__ == "__main__":
+    unittest.main()
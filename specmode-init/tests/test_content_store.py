@@ -0,0 +1,46 @@
+"""
+共享存储：未显式开启时不使用硬链接，本地编辑不会写穿共享对象
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import SCRIPTS_DIR
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+import content_store  # noqa: E402
+from copy_engine import reset_capabilities  # noqa: E402
+
+
+class ContentStoreTest(unittest.TestCase):
+    def setUp(self):
+        reset_capabilities()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.store = Path(self.tmp.name) / "store"
+        self.project = Path(self.tmp.name) / "project"
+        self.project.mkdir()
+
+    def tearDown(self):
+        reset_capabilities()
+        self.tmp.cleanup()
+
+    def test_default_never_shares_inode(self):
+        target = self.project / "a.md"
+        method = content_store.store_file(self.store, b"shared\n", target)
+        self.assertIn(method, (content_store.STORE_REFLINK, content_store.STORE_COPY))
+        self.assertEqual(os.stat(str(target)).st_nlink, 1)
+        target.write_bytes(b"edited\n")
+        self.assertEqual(content_store.verify_store(self.store), [])
+
+    def test_hardlink_is_opt_in(self):
+        target = self.project / "b.md"
+        method = content_store.store_file(self.store, b"linked\n", target, hardlink=True)
+        if method == content_store.STORE_HARDLINK:
+            self.assertEqual(os.stat(str(target)).st_nlink, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,50 @@
+"""
+复制引擎：策略失败时回退，目标内容完整
+"""
+
+import errno
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from support import SCRIPTS_DIR
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+import copy_engine  # noqa: E402
+
+
+class CopyEngineTest(unittest.TestCase):
+    def setUp(self):
+        copy_engine.reset_capabilities()
+        self.tmp = tempfile.TemporaryDirectory()
+        self.src = Path(self.tmp.name) / "src.bin"
+        self.src.write_bytes(os.urandom(64 * 1024))
+        self.dst = Path(self.tmp.name) / "dst.bin"
+
+    def tearDown(self):
+        copy_engine.reset_capabilities()
+        self.tmp.cleanup()
+
+    @unittest.skipUnless(hasattr(os, "copy_file_range"), "copy_file_range 不可用")
+    def test_zero_length_copy_file_range_falls_back(self):
+        with mock.patch.object(os, "copy_file_range", return_value=0):
+            strategy = copy_engine.copy_file(
+                str(self.src), str(self.dst), (copy_engine.STRATEGY_COPY_FILE_RANGE, copy_engine.STRATEGY_COPY)
+            )
+        self.assertEqual(strategy, copy_engine.STRATEGY_COPY)
+        self.assertEqual(self.dst.read_bytes(), self.src.read_bytes())
+
+    @unittest.skipUnless(hasattr(os, "copy_file_range"), "copy_file_range 不可用")
+    def test_permission_error_is_not_a_capability(self):
+        denied = OSError(errno.EPERM, "denied")
+        with mock.patch.object(os, "copy_file_range", side_effect=denied):
+            with self.assertRaises(PermissionError):
+                copy_engine.copy_file(str(self.src), str(self.dst), (copy_engine.STRATEGY_COPY_FILE_RANGE,))
+        self.assertFalse(copy_engine._unsupported)
+
+
+if __name__ == "__main__":
+    unittest.main()
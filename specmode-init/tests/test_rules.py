@@ -0,0 +1,44 @@
+"""
+规则脚本：init_rule.py 生成的规则应能直接通过 sync_rules.py 校验并进入索引
+"""
+
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import init_project, run, sync_script
+
+
+class InitRuleSyncTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.comate_dir = init_project(Path(self.tmp.name) / "project")
+        self.init_rule = self.comate_dir / "skills" / "rules-creator" / "scripts" / "init_rule.py"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_scaffolded_rules_are_indexed(self):
+        names = [f"rule-{i}" for i in range(3)]
+        for name in names:
+            run([self.init_rule, name])
+        result = run([sync_script(self.comate_dir, "rule")])
+        self.assertIn("0 错误", result.stdout)
+        index = (self.comate_dir / "rules" / "RULES_INDEX.md").read_text(encoding="utf-8")
+        for name in names:
+            self.assertIn(f"| {name} |", index)
+
+    def test_bracketed_description_stays_a_string(self):
+        # 旧版模板生成的占位写法
+        (self.comate_dir / "rules" / "legacy.mdr").write_text(
+            "---\ndescription: [legacy 规则描述，一句话说明用途]\nglobs: [\"**/*.go\", conf/**/*.toml]\n"
+            "alwaysApply: false\n---\n\n# Rule: legacy\n\n## 触发条件\n\n## 检查清单\n",
+            encoding="utf-8"
+        )
+        run([sync_script(self.comate_dir, "rule")])
+        index = (self.comate_dir / "rules" / "RULES_INDEX.md").read_text(encoding="utf-8")
+        self.assertIn("| legacy | [legacy 规则描述，一句话说明用途] | `**/*.go`, `conf/**/*.toml` |", index)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,106 @@
+"""
+同步脚本：缓存目录与 --dry-run；并行校验与 --since 增量同步的索引与全量重建一致
+"""
+
+import shutil
+import subprocess
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import init_project, run, sync_script
+
+INDEX_FILES = {"skill": "skills/SKILLS_INDEX.md", "rule": "rules/RULES_INDEX.md"}
+
+
+class SyncCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.comate_dir = init_project(Path(self.tmp.name) / "project")
+        self.cache_dir = self.comate_dir / ".cache"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_cache_dir_is_gitignored(self):
+        run([sync_script(self.comate_dir, "skill")])
+        self.assertEqual((self.cache_dir / ".gitignore").read_text(encoding="utf-8"), "*\n")
+
+    def test_dry_run_does_not_write_cache(self):
+        for kind in ("skill", "rule"):
+            run([sync_script(self.comate_dir, kind), "--dry-run"])
+        self.assertEqual(sorted(p.name for p in self.cache_dir.glob("sync_*")), [])
+
+    def test_dry_run_does_not_create_catalog(self):
+        for kind in ("skill", "rule"):
+            result = run([sync_script(self.comate_dir, kind), "--dry-run"])
+            self.assertIn("--dry-run 模式", result.stdout)
+        self.assertFalse(self.cache_dir.exists())
+
+
+class SyncIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.project = Path(self.tmp.name) / "project"
+        self.comate_dir = init_project(self.project)
+        scripts = {
+            "skill": self.comate_dir / "skills" / "skill-creator" / "scripts" / "init_skill.py",
+            "rule": self.comate_dir / "skills" / "rules-creator" / "scripts" / "init_rule.py",
+        }
+        for kind, script in scripts.items():
+            for i in range(6):
+                run([script, f"demo-{kind}-{i}"])
+        # 一个校验出错的技能
+        (self.comate_dir / "skills" / "broken").mkdir()
+        (self.comate_dir / "skills" / "broken" / "SKILL.md").write_text("没有 frontmatter\n", encoding="utf-8")
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def sync(self, kind: str, *args) -> bytes:
+        run([sync_script(self.comate_dir, kind)] + list(args))
+        return (self.comate_dir / INDEX_FILES[kind]).read_bytes()
+
+    def git(self, *args):
+        subprocess.run(["git", "-c", "user.name=test", "-c", "user.email=test@example.com"] + list(args),
+                       cwd=str(self.project), stdout=subprocess.DEVNULL, check=True)
+
+    def test_jobs_match_serial(self):
+        for kind in INDEX_FILES:
+            index_file = self.comate_dir / INDEX_FILES[kind]
+            original = index_file.read_bytes()
+            outputs = []
+            for args in (["--jobs", "1"], ["--jobs", "4"], ["--jobs", "4", "--executor", "process"]):
+                index_file.write_bytes(original)
+                outputs.append(self.sync(kind, "--no-cache", *args))
+            self.assertNotEqual(outputs[0], original, kind)
+            self.assertEqual(outputs[1], outputs[0], kind)
+            self.assertEqual(outputs[2], outputs[0], kind)
+
+    @unittest.skipUnless(shutil.which("git"), "需要 git")
+    def test_since_matches_full_rebuild(self):
+        before = {kind: self.sync(kind) for kind in INDEX_FILES}
+        self.git("init", "-q")
+        self.git("add", "-A")
+        self.git("commit", "-q", "-m", "init")
+
+        skills = self.comate_dir / "skills"
+        rules = self.comate_dir / "rules"
+        shutil.rmtree(str(skills / "demo-skill-0"))
+        (rules / "demo-rule-0.mdr").unlink()
+        for path in (skills / "demo-skill-1" / "SKILL.md", rules / "demo-rule-1.mdr"):
+            path.write_text(path.read_text(encoding="utf-8").replace("description:", "description: 已修改", 1),
+                            encoding="utf-8")
+        shutil.copytree(str(skills / "demo-skill-2"), str(skills / "demo-skill-new"))
+        shutil.copy(str(rules / "demo-rule-2.mdr"), str(rules / "demo-rule-new.mdr"))
+        for path in (skills / "demo-skill-new" / "SKILL.md", rules / "demo-rule-new.mdr"):
+            path.write_text(path.read_text(encoding="utf-8").replace("demo-", "new-demo-"), encoding="utf-8")
+
+        for kind in INDEX_FILES:
+            scoped = self.sync(kind, "--since", "HEAD")
+            self.assertNotEqual(scoped, before[kind], kind)
+            self.assertEqual(self.sync(kind, "--no-cache"), scoped, kind)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+"""
+模板渲染引擎：编译缓存有界，按最近使用淘汰；流式渲染与整体渲染输出一致
+"""
+
+import io
+import sys
+import unittest
+
+from support import SCRIPTS_DIR
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+import template_engine  # noqa: E402
+
+
+class CompileCacheTest(unittest.TestCase):
+    def setUp(self):
+        template_engine.clear_template_cache()
+
+    def tearDown(self):
+        template_engine.clear_template_cache()
+
+    def test_cache_is_bounded(self):
+        size = template_engine.COMPILE_CACHE_SIZE
+        first = template_engine.compile_template("{{name}} 0")
+        for i in range(1, size * 2):
+            template_engine.compile_template(f"{{{{name}}}} {i}")
+            # 反复使用的模板不被淘汰
+            self.assertIs(template_engine.compile_template("{{name}} 0"), first)
+        self.assertEqual(len(template_engine._compiled_cache), size)
+        self.assertNotIn(template_engine.template_hash("{{name}} 1"), template_engine._compiled_cache)
+
+
+# 覆盖跨块占位符、孤立花括号、未绑定变量、超长"变量名"与多字节字符
+SAMPLE = (
+    "# {{project_name}}\n{{{project_name}}}} {{ unbound }} {{missing}}\n"
+    "{" + "{" + "x" * (template_engine.MAX_NAME_LENGTH + 1) + "}}\n"
+    "中文 {{project_description}}{{project_name}}{\n{{"
+)
+VARIABLES = {"project_name": "演示{{project_name}}", "project_description": "描述"}
+
+
+class StreamRenderTest(unittest.TestCase):
+    def test_stream_matches_in_memory(self):
+        expected = template_engine.render_template(SAMPLE, VARIABLES)
+        expected_unbound = template_engine.find_unbound(template_engine.compile_template(SAMPLE), VARIABLES)
+        for chunk_size in list(range(1, 20)) + [64, len(SAMPLE)]:
+            dst = io.StringIO()
+            unbound = template_engine.render_stream(io.StringIO(SAMPLE), dst, VARIABLES, chunk_size)
+            self.assertEqual(dst.getvalue(), expected, chunk_size)
+            self.assertEqual(unbound, expected_unbound, chunk_size)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,100 @@
+"""
+模板树写出：超大模板流式渲染中途失败时不留下半截文件，错误进入常规报告；
+流式写出与整体写出结果一致；安装清单直接使用写入时计算的哈希
+"""
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+from support import SCRIPTS_DIR, TEMPLATES_DIR
+
+sys.path.insert(0, str(SCRIPTS_DIR))
+import template_tree  # noqa: E402
+import upgrade  # noqa: E402
+from install_manifest import build_install_manifest, file_sha256  # noqa: E402
+from template_engine import STREAM_CHUNK_SIZE  # noqa: E402
+
+# 前几个分块可正常解码，末尾是非法 UTF-8
+BROKEN_STREAM = b"# {{project_name}}\n" * (STREAM_CHUNK_SIZE // 8) + b"\xff\xfe\n"
+
+
+class StreamFailureTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        base = Path(self.tmp.name)
+        self.templates = base / "templates"
+        self.templates.mkdir()
+        (self.templates / "big.md.tmpl").write_bytes(BROKEN_STREAM)
+        (self.templates / "ok.md.tmpl").write_text("{{project_name}}\n", encoding="utf-8")
+        self.comate = base / "project" / ".comate"
+        self.threshold = template_tree.STREAM_THRESHOLD
+        template_tree.STREAM_THRESHOLD = 1024
+
+    def tearDown(self):
+        template_tree.STREAM_THRESHOLD = self.threshold
+        self.tmp.cleanup()
+
+    def test_write_tree_leaves_no_partial_file(self):
+        tree = template_tree.load_template_tree(self.templates)
+        self.assertTrue(tree["files"][0]["stream"])
+        stats = template_tree.write_tree(tree, self.comate, {"project_name": "Demo"})
+        self.assertEqual(len(stats["errors"]), 1)
+        self.assertTrue(stats["errors"][0].startswith("big.md.tmpl: "))
+        self.assertEqual(sorted(os.listdir(str(self.comate))), ["ok.md"])
+
+    def test_upgrade_keeps_existing_target(self):
+        tree = template_tree.load_template_tree(self.templates)
+        self.comate.mkdir(parents=True)
+        (self.comate / "big.md").write_text("old\n", encoding="utf-8")
+        result = upgrade.upgrade_tree(tree, self.comate, {"project_name": "Demo"})
+        self.assertEqual(len(result["errors"]), 1)
+        self.assertEqual((self.comate / "big.md").read_text(encoding="utf-8"), "old\n")
+        self.assertEqual(result["actions"]["added"], ["ok.md"])
+        self.assertFalse(any(name.endswith(".specmode-tmp") for name in os.listdir(str(self.comate))))
+
+
+class WriteHashesTest(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.comate = Path(self.tmp.name) / ".comate"
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_streamed_tree_matches_in_memory(self):
+        threshold = template_tree.STREAM_THRESHOLD
+        outputs = []
+        for stream_threshold in (threshold, 0):
+            template_tree.STREAM_THRESHOLD = stream_threshold
+            try:
+                tree = template_tree.load_template_tree(TEMPLATES_DIR)
+            finally:
+                template_tree.STREAM_THRESHOLD = threshold
+            comate = self.comate.with_name(f"comate-{stream_threshold}")
+            stats = template_tree.write_tree(tree, comate, {"project_name": "Demo"})
+            self.assertEqual(stats["errors"], [])
+            outputs.append((stats["hashes"], {
+                rel_path: (comate / rel_path).read_bytes() for rel_path in stats["hashes"]
+            }))
+        self.assertTrue(all(entry["stream"] for entry in tree["files"] if entry["template"]))
+        self.assertEqual(outputs[0], outputs[1])
+
+    def test_manifest_matches_written_files(self):
+        tree = template_tree.load_template_tree(TEMPLATES_DIR)
+        variables = template_tree.build_variables("Demo", defaults=tree["variables"])
+        stats = template_tree.write_tree(tree, self.comate, variables)
+        manifest = build_install_manifest(self.comate, variables, stats["hashes"])
+        written = {
+            str(path.relative_to(self.comate)).replace(os.sep, "/")
+            for path in self.comate.rglob("*") if path.is_file()
+        }
+        self.assertEqual(set(manifest["files"]), written)
+        for rel_path, record in manifest["files"].items():
+            self.assertEqual(record["sha256"], file_sha256(self.comate / rel_path), rel_path)
+
+
+if __name__ == "__main__":
+    unittest.main()